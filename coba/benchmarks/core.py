@@ -1,16 +1,18 @@
 from coba.simulations.core import Interaction
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from itertools import product
-from typing import Iterable, Sequence, cast, Optional, overload, List, Union
+from typing import Iterable, Sequence, cast, Optional, overload, List, Union, Callable
 
-from coba.learners import Learner
-from coba.simulations import Simulation, Take, Shuffle
+from coba.learners import Learner, LearnerFactory
+from coba.simulations import Simulation, Take, Shuffle, OpenmlSimulation
 from coba.registry import CobaRegistry
-from coba.config import CobaConfig, CobaFatal
-from coba.pipes import Pipe, Filter, Source, JsonDecode, ResponseToLines, HttpSource, MemorySource, DiskSource
-from coba.multiprocessing import MultiprocessFilter
+from coba.config import CobaConfig, CobaFatal, NoneCacher
+from coba.pipes import Pipe, Filter, Source, JsonDecode, ResponseToLines, HttpSource, MemorySource, DiskSource, IdentityFilter
+from coba.multiprocessing import MultiprocessFilter, CobaExecutor
+from coba.distributed import CobaCoordinator, DistributedFilter
 
-from coba.benchmarks.tasks import ChunkByNone, Tasks, Unfinished, ChunkByTask, ChunkBySource, Transactions
+from coba.benchmarks.tasks import ChunkByNone, Tasks, Unfinished, ChunkByTask, ChunkBySource, ChunkBySourceShared, Transactions, PrefetchSources, LongestFirst, PreloadSources, PreloadedSource, SharedSource, Checkpoints
 from coba.benchmarks.transactions import Transaction, TransactionSink
 from coba.benchmarks.results import Result
 
@@ -72,15 +74,26 @@ class Benchmark:
         self._maxtasksperchild    : Optional[int]                = None
         self._maxtasksperchild_set: bool                         = False
         self._chunk_by            : Optional[str]                = None
+        self._prefetch            : Optional[int]                = None
+        self._preload             : Union[bool,Callable[[Source[Simulation]],bool]] = False
+        self._max_process_mb      : Optional[float]              = None
+        self._min_free_mb         : Optional[float]              = None
+        self._timeout             : Optional[float]              = None
+        self._retry               : bool                         = False
+        self._lockstep            : bool                         = False
+        self._batch_size          : int                          = 1
+        self._checkpoint          : Optional[int]                = None
+        self._segments            : Optional[int]                = None
 
     def chunk_by(self, value: str = 'source') -> 'Benchmark':
         """Determines how tasks are chunked for processing.
         
         Args:
-            value: Allowable values are 'task', 'source' and 'none'.
+            value: Allowable values are 'task', 'source', 'source_shared' and 'none'. With 'source_shared' each 
+                source is loaded once and written to a file that every process reads so its tasks can run in parallel.
         """
 
-        assert value in ['task', 'source', 'none'], "The given chunk_by value wasn't recognized. Allowed values are 'task', 'source' and 'none'"
+        assert value in ['task', 'source', 'source_shared', 'none'], "The given chunk_by value wasn't recognized. Allowed values are 'task', 'source', 'source_shared' and 'none'"
 
         self._chunk_by = value
 
@@ -108,13 +121,155 @@ class Benchmark:
         self._maxtasksperchild = value
         return self
 
-    def evaluate(self, learners: Sequence[Learner], result_file:str = None, seed:int = 1) -> Result:
+    def memory(self, max_process_mb: float = None, min_free_mb: float = None) -> 'Benchmark':
+        """Determines how much memory processes can use while processing Benchmark chunks.
+
+        Args:
+            max_process_mb: A process using more memory than this after a chunk is torn down and recreated.
+                Unlike `maxtasksperchild` only the processes that are using too much memory are recreated.
+            min_free_mb: Processes wait to start a chunk while the machine has less memory available than this 
+                and another process is still working. This keeps many large chunks from running out of memory.
+
+        Remarks:
+            Memory is only measured on Linux. When an executor is given to `evaluate` its memory limits are used.
+        """
+
+        self._max_process_mb = max_process_mb
+        self._min_free_mb    = min_free_mb
+        return self
+
+    def timeout(self, seconds: float = None, retry: bool = False) -> 'Benchmark':
+        """Determines how long a learner can take to be evaluated on a simulation before it is stopped.
+
+        Args:
+            seconds: The most seconds a learner may take on a simulation. A learner that takes longer is stopped,
+                its process is recreated and a failure is recorded in `Result.failures`. None means no limit.
+            retry: Indicates if a learner that took too long should be evaluated one more time before failing.
+
+        Remarks:
+            Learners are stopped using signals so a timeout has no effect on Windows. A learner that is running
+            a C extension (e.g., VowpalWabbit) is only stopped once the extension returns control to Python.
+        """
+
+        self._timeout = seconds
+        self._retry   = retry
+        return self
+
+    def lockstep(self, value: bool = True) -> 'Benchmark':
+        """Determines if every learner sees an interaction before the next interaction is given out.
+
+        Args:
+            value: When True a simulation's interactions are walked once and given to each of its learners in turn
+                instead of being walked once per learner. Each learner still chooses actions with its own random seed
+                so results don't change. A learner that raises an exception is dropped without stopping the others.
+
+        Remarks:
+            When learners in lockstep run out of time (see `timeout`) they are evaluated again one at a time so the
+            learner that is too slow can be found.
+        """
+
+        self._lockstep = value
+        return self
+
+    def batch_size(self, value: int = 1) -> 'Benchmark':
+        """Determines how many interactions a learner predicts before it learns from them.
+
+        Args:
+            value: The number of interactions given to a learner's `predict_batch` before they are given to its
+                `learn_batch`. This models a learner that is only updated periodically once it has been deployed.
+                Learners that don't implement these methods are still given one interaction at a time.
+        """
+
+        assert value >= 1, "The given batch_size must be at least 1."
+
+        self._batch_size = value
+        return self
+
+    def checkpoint(self, every: Optional[int] = 10000) -> 'Benchmark':
+        """Determines how often a learner's progress on a simulation is saved so it can continue after a crash.
+
+        Args:
+            every: The number of interactions between saves or None to never save. Progress is saved to a 
+                '.checkpoints' directory next to the `result_file` given to `evaluate` and is only saved when a
+                `result_file` is given. When an evaluation is resumed each learner continues from its last save and
+                its final results are the same as if it had never stopped.
+
+        Remarks:
+            A learner is saved by pickling it so learners that can't be pickled (see `Learner.__reduce__`) can't be 
+            saved. When evaluating with a `CobaCoordinator` the directory must be on a file system every worker shares.
+        """
+
+        assert every is None or every >= 1, "The given checkpoint interval must be at least 1."
+
+        self._checkpoint = every
+        return self
+
+    def segments(self, every: Optional[int] = 10000) -> 'Benchmark':
+        """Determines how many interactions a learner evaluates before its results so far are written.
+
+        Args:
+            every: The number of interactions in each partial result that is written or None to only write
+                a learner's results once it has been evaluated on every interaction of a simulation. Partial
+                results are merged when a Result is loaded so a learner's results look the same either way.
+
+        Remarks:
+            Writing partial results keeps memory from growing with the length of a simulation and keeps results
+            from being lost when a benchmark stops. A resumed benchmark evaluates a learner with partial results 
+            again and skips writing what was already written. To also skip evaluating what was already written use
+            `checkpoint` with the same number of interactions.
+        """
+
+        assert every is None or every >= 1, "The given segment size must be at least 1."
+
+        self._segments = every
+        return self
+
+    def prefetch(self, value: int = 4) -> 'Benchmark':
+        """Determines how many threads will be used to download and cache sources before evaluation begins.
+
+        Args:
+            value: This is the number of sources that will be downloaded at once. If this value is 0 sources 
+                will be downloaded when they are first needed during evaluation.
+
+        Remarks:
+            Prefetching only applies to sources whose data is cached (i.e., OpenmlSimulation) and is skipped 
+            when there is no cacher (i.e., `CobaConfig.Cacher` is a NoneCacher).
+        """
+
+        self._prefetch = value
+        return self
+
+    def preload(self, value: Union[bool,Callable[[Source[Simulation]],bool]] = True) -> 'Benchmark':
+        """Determines if sources are loaded in the main process before processes are created for evaluation.
+
+        Args:
+            value: Indicates if sources should be preloaded. This can also be a function which is given each of the 
+                benchmark's simulation sources and returns whether that source should be preloaded.
+
+        Remarks:
+            When processes are created with `fork` (the default on Linux) preloaded sources are pickled once in the 
+            main process and the pickled bytes are shared with every process rather than each process creating the 
+            sources again. Each process still unpickles its own copy of a source when it evaluates the source. This 
+            requires memory for every preloaded source at once in the main process so it is most useful for a few 
+            sources that are expensive to create, which can be selected by giving a function. When an executor is 
+            given to `evaluate` its processes are restarted after preloading so they can share sources.
+        """
+
+        self._preload = value
+        return self
+
+    def evaluate(self, learners: Sequence[Union[Learner,LearnerFactory]], result_file:str = None, seed:int = 1, executor: Union[CobaExecutor,CobaCoordinator] = None) -> Result:
         """Collect observations of a Learner playing the benchmark's simulations to calculate Results.
 
         Args:
-            learners: The collection of learners that we'd like to evalute.
+            learners: The collection of learners that we'd like to evalute. A `LearnerFactory` may be given in place
+                of a learner that is large or can't be copied so that every evaluation creates a new learner instead.
             result_file: The file we'd like to use for writing/restoring results for the requested evaluation.
             seed: The random seed we'd like to use when choosing which action to take from the learner's predictions.
+            executor: The processes to evaluate with. When given the executor's processes are kept alive to be used 
+                in later evaluations and the benchmark's `processes` and `maxtasksperchild` are ignored. When this is
+                a `CobaCoordinator` chunks are evaluated by the `CobaWorker`s connected to it (these may be on other
+                machines, in which case 'source_shared' chunking requires a file system that every machine shares).
 
         Returns:
             See the base class for more information.
@@ -138,23 +293,66 @@ class Benchmark:
         cb = self._chunk_by         if self._chunk_by             else CobaConfig.Benchmark['chunk_by']
         mp = self._processes        if self._processes            else CobaConfig.Benchmark['processes']
         mt = self._maxtasksperchild if self._maxtasksperchild_set else CobaConfig.Benchmark['maxtasksperchild']
+        pf = self._prefetch         if self._prefetch is not None else CobaConfig.Benchmark.get('prefetch', 0)
             
+        shared_dir       = TemporaryDirectory() if cb == 'source_shared' else None
+
         tasks            = Tasks(self._simulations, learners, seed)
         unfinished       = Unfinished(restored)
         chunked          = ChunkByTask() if cb == 'task' else ChunkByNone() if cb == 'none' else ChunkBySource()
-        process          = Transactions()
+        chunked          = ChunkBySourceShared(shared_dir.name) if shared_dir else chunked
+        checkpoints      = Checkpoints(f"{result_file}.checkpoints", self._checkpoint) if result_file and self._checkpoint else None
+        process          = Transactions(self._timeout, self._retry, self._lockstep, self._batch_size, checkpoints, self._segments)
         transaction_sink = TransactionSink(result_file, restored)
 
-        if mp > 1 or mt is not None  : process = MultiprocessFilter([process], mp, mt) #type: ignore
+        distributed = isinstance(executor, CobaCoordinator)
+
+        if executor is not None and not distributed: mp = executor.processes
+
+        #learners import heavy packages (e.g., numpy) lazily so we import them in workers before they're given tasks
+        imports = list(dict.fromkeys(module for learner in learners for module in getattr(learner, 'imports', [])))
+
+        if distributed:
+            process = DistributedFilter([process], executor) #type: ignore
+        elif executor is not None:
+            process = MultiprocessFilter([process], executor=executor, imports=imports) #type: ignore
+        elif mp > 1 or mt is not None or self._max_process_mb is not None:
+            #like maxtasksperchild a limit on a process' memory needs a background process that can be replaced
+            process = MultiprocessFilter([process], mp, mt, imports=imports, max_process_mb=self._max_process_mb, min_free_mb=self._min_free_mb) #type: ignore
+
+        #when chunks are processed in parallel the order they are started in determines how long the benchmark takes
+        ordered = LongestFirst() if mp > 1 or distributed else IdentityFilter()
+
+        is_cached = lambda source: isinstance(source, OpenmlSimulation)
+        prefetch  = PrefetchSources(pf, is_cached) if pf > 0 and not isinstance(CobaConfig.Cacher, NoneCacher) else IdentityFilter()
 
         try:
-            Pipe.join(MemorySource(preamble), []                            , transaction_sink).run()
-            Pipe.join(tasks                 , [unfinished, chunked, process], transaction_sink).run()
+            if self._preload:
+                #Processes are created when the pipe below starts to run. We therefore
+                #need to preload everything before then if processes are to share it.
+                is_preloaded      = self._preload if callable(self._preload) else None
+                tasks, unfinished = MemorySource(PreloadSources(is_preloaded).filter(unfinished.filter(tasks.read()))), IdentityFilter()
+
+                #an executor's processes were created before we preloaded so we restart them to share what we loaded
+                if executor is not None and not distributed: executor.close()
+
+            Pipe.join(MemorySource(preamble), []                                               , transaction_sink).run()
+            Pipe.join(tasks                 , [unfinished, prefetch, chunked, ordered, process], transaction_sink).run()
         except KeyboardInterrupt:
             CobaConfig.Logger.log("Benchmark evaluation was manually aborted via Ctrl-C")
         except CobaFatal:
             raise
         except Exception as ex:
             CobaConfig.Logger.log_exception(ex)
+        finally:
+            if shared_dir: shared_dir.cleanup()
+            if checkpoints: checkpoints.clear()
+            PreloadedSource.loaded.clear()
+            PreloadedSource.clear()
+            SharedSource.clear()
+
+            #an executor's processes outlive this evaluation so they have to release what they read as well
+            if shared_dir and executor is not None and not distributed: executor.broadcast(SharedSource.clear)
+            if self._preload and executor is not None and not distributed: executor.broadcast(PreloadedSource.clear)
 
         return transaction_sink.result
\ No newline at end of file
@@ -1,6 +1,7 @@
 import re
 import collections
 
+from array import array
 from numbers import Number
 from operator import truediv
 from itertools import chain, repeat, product, accumulate, compress
@@ -161,6 +162,9 @@ class Table:
         row_flat = dict(zip(self._primary, key if isinstance(key,tuple) else [key]), **values)
         row_pack = row_flat.pop("_packed", {})
 
+        #packed columns may arrive as arrays when they were sent between processes in shared memory
+        row_pack = { col: value.tolist() if isinstance(value, array) else value for col, value in row_pack.items() }
+
         if row_pack:
             assert len(set([len(value) for value in row_pack.values()])) == 1, "All packed columns must be equal length."
 
@@ -171,6 +175,55 @@ class Table:
         self._rows_pack[key] = row_pack
         self._columns.update(zip(list(row_flat.keys()) + list(row_pack.keys()), repeat(None)))
 
+    def extend(self, key: Union[Hashable, Sequence[Hashable]], values: Dict[str,Any], start: int) -> None:
+        """Add a segment of packed values to a row.
+
+        Args:
+            key: The primary key of the row that is being extended.
+            values: The values to add to the row. Packed values are appended while other values are replaced.
+            start: The position of the segment's first packed value. Values at or after this are replaced so
+                a segment that is added again (e.g., when a benchmark is resumed) is never repeated.
+        """
+
+        key = self._key(key)
+
+        if key not in self._rows_flat or not self._rows_pack[key] or start == 0:
+            #the row's packed values are copied since later segments are appended to them in place
+            self[key] = dict(values, _packed={ col: list(value) for col, value in values["_packed"].items() }) if "_packed" in values else values
+            return
+
+        row_flat = dict(values)
+        row_pack = row_flat.pop("_packed", {})
+        row_pack = { col: value.tolist() if isinstance(value, array) else value for col, value in row_pack.items() }
+
+        pack  = self._rows_pack[key]
+        start = min(start, len(pack['index']))
+        size  = len(list(row_pack.values())[0]) if row_pack else 0
+
+        assert len(set([len(value) for value in row_pack.values()])) <= 1, "All packed columns must be equal length."
+
+        for col, value in pack.items():
+            del value[start:]
+
+        #a column that is only in some segments is filled in with missing values so that every column is equal length
+        for col in row_pack.keys() - pack.keys():
+            pack[col] = [None]*start
+
+        for col, value in pack.items():
+            value.extend(row_pack[col] if col in row_pack else range(start+1,start+size+1) if col == 'index' else [None]*size)
+
+        self._rows_flat[key].update(row_flat)
+        self._columns.update(zip(list(row_flat.keys()) + list(row_pack.keys()), repeat(None)))
+
+    def pop(self, key: Union[Hashable, Sequence[Hashable]]) -> Dict[str,Any]:
+        """Remove a row and return its values as they would be given to the table."""
+
+        key      = self._key(key)
+        row_flat = { col: value for col, value in self._rows_flat.pop(key).items() if col not in self._primary }
+        row_pack = { col: value for col, value in self._rows_pack.pop(key).items() if col != 'index' }
+
+        return dict(row_flat, _packed=row_pack) if row_pack else row_flat
+
     def __getitem__(self, key: Union[Hashable, Sequence[Hashable]]) -> Dict[str,Any]:
         return dict(**self._rows_flat[self._key(key)], **self._rows_pack[self._key(key)])
 
@@ -205,7 +258,8 @@ class Result:
             if trx[0] == "benchmark": result.benchmark = trx[1]
             if trx[0] == "L"        : result._learners    [trx[1]       ] = trx[2]
             if trx[0] == "S"        : result._simulations [trx[1]       ] = trx[2]
-            if trx[0] == "I"        : result._interactions[tuple(trx[1])] = trx[2]
+            if trx[0] == "I"        : result._add_interactions(tuple(trx[1]), trx[2])
+            if trx[0] == "F"        : result._failures    [tuple(trx[1])] = trx[2]
 
         return result
 
@@ -219,6 +273,30 @@ class Result:
         self._interactions = Table("Interactions", ['simulation_id', 'learner_id'])
         self._learners     = Table("Learners"    , ['learner_id'])
         self._simulations  = Table("Simulations" , ['simulation_id'])
+        self._failures     = Table("Failures"    , ['simulation_id', 'learner_id'])
+
+        #interactions are kept apart until their final segment is written so that a learner which
+        #stops part way through a simulation (e.g., it raised an exception) isn't seen as a short run
+        self._segments = Table("Interactions", ['simulation_id', 'learner_id'])
+        self._partial: Dict[Tuple[int,int], int] = {}
+
+    def _add_interactions(self, key: Tuple[int,int], values: Dict[str,Any]) -> None:
+
+        if "_start" not in values:
+            self._interactions[key] = values
+            return
+
+        values  = dict(values)
+        start   = values.pop("_start")
+        partial = values.pop("_partial", False)
+
+        self._segments.extend(key, values, start)
+
+        if partial:
+            self._partial[key] = len(self._segments[key].get('index',[]))
+        else:
+            self._partial.pop(key, None)
+            self._interactions[key] = self._segments.pop(key)
 
     @property
     def learners(self) -> Table:
@@ -242,6 +320,13 @@ class Result:
         """
         return self._interactions
 
+    @property
+    def failures(self) -> Table:
+        """The collection of learner and simulation pairs that couldn't be evaluated (e.g., because they ran out of time).
+            Pairs that failed are evaluated again when a Benchmark is resumed from its transaction log.
+        """
+        return self._failures
+
     def plot_learners(self, 
         source_pattern :Union[str,int] = ".*",
         learner_pattern:Union[str,int] = ".*", 
@@ -1,15 +1,29 @@
+import os
+import re
+import json
+import time
+import pickle
+import uuid
+import signal
+import threading
+
+from array import array
+
 from coba.simulations.core import Interaction
-from copy import deepcopy
-from itertools import groupby, product, count
+from copy import deepcopy, copy
+from itertools import groupby, product, count, chain, islice
 from collections import defaultdict
-from typing import Iterable, Sequence, Any, Optional, Dict, Hashable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Iterable, Sequence, Any, Optional, Dict, Hashable, Callable, Tuple, List, Union, Iterator
 
 from coba.random import CobaRandom
-from coba.learners import Learner
+from coba.learners import Learner, LearnerFactory
 from coba.config import CobaConfig
 from coba.pipes import Pipe, Filter, Source, IdentityFilter
-from coba.simulations import Context, Action, Key, Simulation, SimulationFilter
+from coba.simulations import Context, Action, Key, Simulation, SimulationFilter, Take
 
+from coba.multiprocessing import MultiprocessFilter
 from coba.benchmarks.transactions import Transaction
 from coba.benchmarks.results import Result
 
@@ -31,7 +45,7 @@ class BenchmarkTask:
             except AttributeError:
                 return {}
 
-        def __init__(self, learner: Learner, seed: Optional[int]) -> None:
+        def __init__(self, learner: Union[Learner,LearnerFactory], seed: Optional[int]) -> None:
             self._learner = learner
             self._random  = CobaRandom(seed)
 
@@ -60,7 +74,7 @@ class BenchmarkTask:
         def __repr__(self) -> str:
             return self._pipe.__repr__()
 
-    def __init__(self, src_id:int, sim_id: int, lrn_id: int, simulation: Source[Simulation], learner: Learner, seed: int = None) -> None:
+    def __init__(self, src_id:int, sim_id: int, lrn_id: int, simulation: Source[Simulation], learner: Union[Learner,LearnerFactory], seed: int = None) -> None:
         self.src_id     = src_id
         self.sim_id     = sim_id
         self.lrn_id     = lrn_id
@@ -71,7 +85,7 @@ class BenchmarkTask:
 
 class Tasks(Source[Iterable[BenchmarkTask]]):
 
-    def __init__(self, simulations: Sequence[Source[Simulation]], learners: Sequence[Learner], seed: int = None) -> None:
+    def __init__(self, simulations: Sequence[Source[Simulation]], learners: Sequence[Union[Learner,LearnerFactory]], seed: int = None) -> None:
         self._simulations = simulations
         self._learners    = learners
         self._seed        = seed
@@ -95,12 +109,226 @@ class Unfinished(Filter[Iterable[BenchmarkTask], Iterable[BenchmarkTask]]):
     def filter(self, tasks: Iterable[BenchmarkTask]) -> Iterable[BenchmarkTask]:
 
         def is_not_complete(sim_id: int, learn_id: int):
+            #a task whose interactions were only partially written is evaluated again and its
+            #segments that were already written are skipped by the transaction sink
             return (sim_id,learn_id) not in self._restored._interactions
 
         for task in tasks:
             if is_not_complete(task.sim_id, task.lrn_id):
                 yield task
 
+class PrefetchSources(Filter[Iterable[BenchmarkTask], Iterable[BenchmarkTask]]):
+    """Download the raw data of the distinct sources of the given tasks concurrently so it is cached before evaluation.
+
+    Remarks:
+        Without prefetching each source is downloaded when the first chunk that needs it is processed. This
+        means processes can sit idle waiting on network I/O and two processes may download the same source.
+        Only sources with a `prefetch` method are prefetched. Prefetching only downloads (which waits on the 
+        network and releases the GIL) so threads are enough. Parsing is left to the processes that evaluate.
+    """
+
+    def __init__(self, threads: int, should_prefetch: Callable[[Simulation],bool] = lambda source: True) -> None:
+        """Instantiate a PrefetchSources filter.
+
+        Args:
+            threads: The most sources that will be downloaded at once.
+            should_prefetch: Determines if a source benefits from being prefetched (e.g., its data is cached).
+        """
+
+        self._threads         = threads
+        self._should_prefetch = should_prefetch
+
+    def filter(self, tasks: Iterable[BenchmarkTask]) -> Iterable[BenchmarkTask]:
+
+        tasks   = list(tasks)
+        sources = { t.src_id: t.simulation.source for t in tasks if self._is_prefetchable(t.simulation.source) }
+
+        if sources:
+
+            with CobaConfig.Logger.time(f"Prefetching {len(sources)} sources..."):
+
+                with ThreadPoolExecutor(max_workers=self._threads) as executor:
+
+                    futures = { executor.submit(source.prefetch): src_id for src_id, source in sources.items() }
+
+                    for n, future in enumerate(as_completed(futures), 1):
+                        src_id = futures[future]
+                        try:
+                            future.result()
+                            CobaConfig.Logger.log(f"Prefetched source {src_id} from {sources[src_id]} ({n}/{len(sources)})")
+                        except Exception as e:
+                            #the source will be read again during evaluation so we log and move on
+                            CobaConfig.Logger.log_exception(e, f"Unable to prefetch source {src_id}:")
+
+        return tasks
+
+    def _is_prefetchable(self, source: Simulation) -> bool:
+        return callable(getattr(source, 'prefetch', None)) and self._should_prefetch(source)
+
+class TaskCosts:
+    """Estimate how long tasks will take to evaluate using what was recorded about their sources in prior runs.
+
+    Remarks:
+        Records are kept in `CobaConfig.Cacher` so estimates only improve across runs when there is a cacher.
+        Sources without a record are assumed to have 1000 interactions that take the average recorded time.
+        Records are keyed by a source's description. Sources whose description doesn't identify them are never
+        recorded (e.g., every LambdaSimulation is described as "LambdaSimulation").
+    """
+
+    default_interactions = 1000
+
+    #These are the descriptions that coba gives to sources which can't be told apart by their description.
+    _unidentified = ['"LambdaSimulation"', '"ConstrainedSimulation"', 'Validation']
+
+    @staticmethod
+    def record(source: Simulation, n_interactions: int, seconds_per_interaction: float) -> None:
+        """Record the size of a source and how long each of its interactions took to evaluate."""
+
+        value = {"interactions": n_interactions, "seconds": seconds_per_interaction}
+        key   = TaskCosts._key(source)
+
+        if key is None: return
+
+        try:
+            CobaConfig.Cacher.put(key, json.dumps(value).encode('utf-8'))
+        except Exception:
+            pass #a record is only used to improve estimates so there is no reason to fail when we can't write it
+
+    @staticmethod
+    def estimates(tasks: Sequence[BenchmarkTask]) -> Sequence[float]:
+        """Estimate the cost (in approximate seconds) of each task."""
+
+        records = { t.src_id: TaskCosts._read(t.simulation.source) for t in tasks }
+        known   = [ r["seconds"] for r in records.values() if r is not None ]
+        default = sum(known)/len(known) if known else 1
+
+        estimates = []
+
+        for task in tasks:
+            record       = records[task.src_id]
+            interactions = record["interactions"] if record else TaskCosts.default_interactions
+            seconds      = record["seconds"]      if record else default
+
+            for filter in getattr(task.simulation.filter, '_filters', [task.simulation.filter]):
+                if isinstance(filter, Take) and filter._count is not None:
+                    interactions = min(interactions, filter._count) if record else filter._count
+
+            estimates.append(interactions * seconds)
+
+        return estimates
+
+    @staticmethod
+    def _read(source: Simulation) -> Optional[Dict[str,float]]:
+        try:
+            key = TaskCosts._key(source)
+            return json.loads(CobaConfig.Cacher.get(key).decode('utf-8')) if key is not None and key in CobaConfig.Cacher else None
+        except Exception:
+            return None
+
+    @staticmethod
+    def _key(source: Simulation) -> Optional[str]:
+        name = str(source)
+
+        #the default description contains a memory address which changes every run
+        if name in TaskCosts._unidentified or re.search(" at 0x[0-9a-fA-F]+", name):
+            return None
+
+        return f"coba://costs/{name}"
+
+class PreloadedSource(Source[Iterable[Interaction]]):
+    """A source whose interactions were loaded by the main process before any worker processes were created.
+
+    Remarks:
+        Loaded sources are kept pickled as a single bytes object. When workers are forked they share these bytes 
+        with the main process copy-on-write so the pickled bytes are never copied into a worker. Unpickling is much
+        cheaper than creating a source (e.g., parsing and encoding) but every process that reads a source still 
+        holds its own unpickled copy of it. A process keeps the last source it read so that consecutive tasks on 
+        the same source only unpickle it once. This copy is kept until `clear` is called in the process or the 
+        process reads a different source. When a source wasn't preloaded in this process (e.g., workers are spawned 
+        rather than forked) the original source is read. Loaded sources are keyed by the preload that loaded them so 
+        that a process which was forked during an earlier evaluation (e.g., by a reused `CobaExecutor`) never reads 
+        a different evaluation's source.
+    """
+
+    loaded: Dict[Tuple[str,int], bytes] = {}
+
+    _last: Tuple[Optional[Tuple[str,int]], Sequence[Interaction]] = (None, [])
+
+    def __init__(self, key: Tuple[str,int], source: Source[Iterable[Interaction]]) -> None:
+        self._key    = key
+        self._source = source
+
+    def read(self) -> Iterable[Interaction]:
+
+        if self._key not in PreloadedSource.loaded:
+            return self._source.read()
+
+        if PreloadedSource._last[0] != self._key:
+            PreloadedSource.clear() #so that we never hold the last source and the next source at once
+            PreloadedSource._last = (self._key, pickle.loads(PreloadedSource.loaded[self._key]))
+
+        return PreloadedSource._last[1]
+
+    @staticmethod
+    def clear() -> None:
+        """Release the last source unpickled by this process."""
+        PreloadedSource._last = (None, [])
+
+    def __repr__(self) -> str:
+        return str(self._source)
+
+class PreloadSources(Filter[Iterable[BenchmarkTask], Iterable[BenchmarkTask]]):
+    """Load the sources of the given tasks in this process and point each task at its loaded source."""
+
+    def __init__(self, is_preloaded: Callable[[Source], bool] = None) -> None:
+        """Instantiate PreloadSources.
+
+        Args:
+            is_preloaded: Determines which sources are preloaded. When None every source is preloaded.
+        """
+        self._token        = uuid.uuid4().hex
+        self._is_preloaded = is_preloaded or (lambda source: True)
+
+    def filter(self, tasks: Iterable[BenchmarkTask]) -> Iterable[BenchmarkTask]:
+
+        tasks   = list(tasks)
+        sources = { t.src_id: t.simulation.source for t in tasks }
+
+        for src_id, source in sources.items():
+            try:
+                if not self._is_preloaded(source): continue
+                with CobaConfig.Logger.time(f"Preloading source {src_id} from {source}..."):
+                    PreloadedSource.loaded[(self._token,src_id)] = pickle.dumps(list(source.read()), protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                CobaConfig.Logger.log_exception(e)
+
+        preloaded_tasks = []
+
+        for task in tasks:
+            if (self._token,task.src_id) in PreloadedSource.loaded:
+                task = copy(task)
+                preloaded = PreloadedSource((self._token,task.src_id), task.simulation.source)
+                task.simulation = BenchmarkTask.BenchmarkTaskSimulation(Pipe.join(preloaded, [task.simulation.filter]))
+            preloaded_tasks.append(task)
+
+        return preloaded_tasks
+
+class LongestFirst(Filter[Iterable[Iterable[BenchmarkTask]], Iterable[Iterable[BenchmarkTask]]]):
+    """Order chunks so that those estimated to take the longest are processed first.
+
+    Remarks:
+        When chunks are processed in parallel starting long chunks first keeps one long chunk from being 
+        processed by itself at the end of a benchmark while every other process sits idle.
+    """
+
+    def filter(self, chunks: Iterable[Iterable[BenchmarkTask]]) -> Iterable[Iterable[BenchmarkTask]]:
+
+        chunks    = [ list(chunk) for chunk in chunks ]
+        estimates = iter(TaskCosts.estimates(list(chain.from_iterable(chunks))))
+        costs     = [ sum(islice(estimates, len(chunk))) for chunk in chunks ]
+
+        return [ chunks[i] for i in sorted(range(len(chunks)), key=costs.__getitem__, reverse=True) ]
+
 class ChunkBySource(Filter[Iterable[BenchmarkTask], Iterable[Iterable[BenchmarkTask]]]):
 
     def filter(self, tasks: Iterable[BenchmarkTask]) -> Iterable[Iterable[BenchmarkTask]]:
@@ -113,6 +341,129 @@ class ChunkBySource(Filter[Iterable[BenchmarkTask], Iterable[Iterable[BenchmarkT
         for _, group in groupby(sorted(tasks, key=srt_key), key=grp_key):
             yield list(group)
 
+class SharedSource(Source[Iterable[Interaction]]):
+    """A source whose loaded interactions are written to a file so that every process can read them.
+
+    Remarks:
+        The first process to read a shared source creates it and writes it to `path` while every other process
+        that reads it waits for the file to be written. Reading the file only unpickles the loaded interactions. 
+        This is much cheaper than creating them (e.g., parsing and encoding) but each process still holds its own 
+        copy of them. A process keeps the last source it read so that consecutive tasks on the same source only 
+        unpickle it once. This copy is kept until `clear` is called in the process (e.g., via `CobaExecutor.broadcast`)
+        or the process reads a different source. Once all `n_readers` have read the file it is removed so that only 
+        the sources which are being evaluated are kept on disk. Any reader after that creates the source itself.
+        When creating a source fails the next reader to read it tries to create it again.
+    """
+
+    _last: Tuple[Optional[str], Sequence[Interaction]] = (None, [])
+
+    def __init__(self, path: str, source: Source[Iterable[Interaction]], n_readers: int) -> None:
+        self._path      = path
+        self._source    = source
+        self._n_readers = n_readers
+        self._has_read  = False
+
+    def read(self) -> Sequence[Interaction]:
+
+        if SharedSource._last[0] != self._path:
+            SharedSource.clear() #so that we never hold the last source and the next source at once
+            SharedSource._last = (self._path, self._load())
+
+        if not self._has_read:
+            self._has_read = True
+            self._count_read()
+
+        return SharedSource._last[1]
+
+    @staticmethod
+    def clear() -> None:
+        """Release the last source read by this process."""
+        SharedSource._last = (None, [])
+
+    def _load(self) -> Sequence[Interaction]:
+
+        while True:
+            try:
+                os.close(os.open(f"{self._path}.lock", os.O_CREAT | os.O_EXCL))
+            except FileExistsError:
+                pass
+            else:
+                return self._create()
+
+            try:
+                with open(self._path, 'rb') as f:
+                    return pickle.load(f)
+            except FileNotFoundError:
+                pass
+
+            if os.path.exists(f"{self._path}.removed"):
+                return list(self._source.read())
+
+            time.sleep(.05)
+
+    def _create(self) -> Sequence[Interaction]:
+
+        #we claimed the source so it is our job to create it for every other reader
+        try:
+            with CobaConfig.Logger.time(f"Creating source {self._source}..."):
+                interactions = list(self._source.read())
+                with open(f"{self._path}.partial", 'wb') as f:
+                    pickle.dump(interactions, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(f"{self._path}.partial", self._path)
+        except BaseException:
+            #we give up our claim so that the next reader can try to create the source
+            os.remove(f"{self._path}.lock")
+            raise
+
+        return interactions
+
+    def _count_read(self) -> None:
+
+        #appending a single byte is atomic so the file's size is the number of readers that are done with the file
+        with open(f"{self._path}.reads", 'ab') as f:
+            f.write(b'.')
+
+        if os.path.getsize(f"{self._path}.reads") >= self._n_readers:
+            open(f"{self._path}.removed", 'ab').close()
+            try:
+                os.remove(self._path)
+            except FileNotFoundError:
+                pass
+
+    def __repr__(self) -> str:
+        return str(self._source)
+
+class ChunkBySourceShared(Filter[Iterable[BenchmarkTask], Iterable[Iterable[BenchmarkTask]]]):
+    """Make a chunk for every task so that each source is created once and shared by all of its tasks.
+
+    Remarks:
+        Sources are created by the first process that evaluates one of their tasks and written to `directory`
+        (see `SharedSource`). The directory must not be removed until every chunk has been processed. Loading a 
+        written source is much cheaper than creating it (e.g., parsing and encoding) so the tasks for a large 
+        source can be spread across processes without much repeated work. No source is created by this filter 
+        so chunks can be ordered and dispatched right away.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self._directory = directory
+
+    def filter(self, tasks: Iterable[BenchmarkTask]) -> Iterable[Iterable[BenchmarkTask]]:
+
+        srt_key = lambda t: t.src_id
+        grp_key = lambda t: t.src_id
+
+        for src_id, group in groupby(sorted(tasks, key=srt_key), key=grp_key):
+
+            group  = list(group)
+            source = group[0].simulation.source
+            path   = os.path.join(self._directory, f"{src_id}.pickle")
+
+            for task in group:
+                shared = SharedSource(path, source, len(group))
+                task   = copy(task)
+                task.simulation = BenchmarkTask.BenchmarkTaskSimulation(Pipe.join(shared, [task.simulation.filter]))
+                yield [ task ]
+
 class ChunkByTask(Filter[Iterable[BenchmarkTask], Iterable[Iterable[BenchmarkTask]]]):
 
     def filter(self, tasks: Iterable[BenchmarkTask]) -> Iterable[Iterable[BenchmarkTask]]:
@@ -125,8 +476,221 @@ class ChunkByNone(Filter[Iterable[BenchmarkTask], Iterable[Iterable[BenchmarkTas
     def filter(self, tasks: Iterable[BenchmarkTask]) -> Iterable[Iterable[BenchmarkTask]]:
         yield list(tasks)
 
+class InteractionColumns:
+    """The reward and info a learner has on each interaction of a simulation kept as columns.
+
+    Remarks:
+        A column whose first value is a number is kept in an `array('d')` so that long simulations don't
+        keep a boxed float for every interaction. The arrays are given to transactions as they are. A column
+        is only changed to a list when a value that isn't a number is added to it. The keys of a learner's
+        info are found on its first interaction and only looked at again when a later info has other keys.
+    """
+
+    def __init__(self) -> None:
+        self._columns: Dict[str, Union[array, List[Any]]] = {}
+        self._keys   : Tuple[str,...] = ()
+        self._missing: List[str]      = []
+        self._length = 0
+
+    @property
+    def columns(self) -> Dict[str, Union[array, List[Any]]]:
+        """The columns that have been added to so far."""
+        return self._columns
+
+    def append(self, reward: float, info: Optional[Dict[str,Any]]) -> None:
+        """Add a row for the next interaction."""
+
+        columns = self._columns
+        keys    = tuple(info.keys()) if info else ()
+
+        if keys != self._keys:
+            #a column that isn't in this info is given a missing value so that every column stays equal length
+            self._keys    = keys
+            self._missing = [ key for key in columns if key != 'reward' and key not in keys ]
+
+        #columns are appended to directly since this is done for every interaction of every learner
+        try:
+            columns['reward'].append(reward)
+        except (KeyError, TypeError):
+            self._add('reward', reward)
+
+        for key in keys:
+            try:
+                columns[key].append(info[key])
+            except (KeyError, TypeError):
+                self._add(key, info[key])
+
+        for key in self._missing:
+            self._add(key, None)
+
+        self._length += 1
+
+    def _add(self, key: str, value: Any) -> None:
+
+        column = self._columns.get(key)
+
+        is_number = isinstance(value, (int,float)) and not isinstance(value, bool)
+
+        if column is None:
+            column = self._columns[key] = array('d') if is_number and not self._length else [None]*self._length
+
+        if isinstance(column, array) and not is_number:
+            column = self._columns[key] = column.tolist()
+
+        column.append(value)
+
+    def __len__(self) -> int:
+        return self._length
+
+class Checkpoints:
+    """Files that hold a learner's progress on a simulation so that its evaluation can continue after a crash.
+
+    Remarks:
+        A checkpoint is a pickle of the learner (using its `__reduce__`), its CobaRandom, the index of the next
+        interaction and the rows it has evaluated so far. Checkpoints are written every `every` interactions to 
+        `directory` and are removed once the learner's evaluation on the simulation finishes. A learner that runs 
+        out of time keeps its checkpoint so that its next attempt continues from where the last one stopped.
+    """
+
+    def __init__(self, directory: str, every: int) -> None:
+        """Instantiate Checkpoints.
+
+        Args:
+            directory: The directory where checkpoints are written. It is created if it doesn't exist.
+            every: The number of interactions between checkpoints.
+        """
+        self._directory = directory
+        self._every     = every
+
+    @property
+    def every(self) -> int:
+        """The number of interactions between checkpoints."""
+        return self._every
+
+    def read(self, sim_id: int, lrn_id: int) -> Optional[Tuple[int, Learner, CobaRandom, InteractionColumns]]:
+        """Read the last checkpoint written for a learner on a simulation if there is one."""
+
+        try:
+            with open(self._path(sim_id, lrn_id), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            #a checkpoint that can't be read (e.g., it was written by an older version of a learner) is ignored
+            return None
+
+    def write(self, sim_id: int, lrn_id: int, index: int, learner: Learner, random: CobaRandom, row_data: InteractionColumns) -> None:
+        """Write a learner's progress on a simulation."""
+
+        os.makedirs(self._directory, exist_ok=True)
+
+        path = self._path(sim_id, lrn_id)
+
+        #we write to a temporary file first so that a crash while writing never leaves a partial checkpoint
+        with open(f"{path}.tmp", 'wb') as f:
+            pickle.dump((index, learner, random, row_data), f)
+
+        os.replace(f"{path}.tmp", path)
+
+    def remove(self, sim_id: int, lrn_id: int) -> None:
+        """Remove the checkpoint for a learner on a simulation."""
+
+        try:
+            os.remove(self._path(sim_id, lrn_id))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """Remove the checkpoint directory if every checkpoint in it has been removed."""
+
+        try:
+            os.rmdir(self._directory)
+        except OSError:
+            pass #the directory doesn't exist or still has checkpoints that a resumed evaluation will need
+
+    def _path(self, sim_id: int, lrn_id: int) -> str:
+        return os.path.join(self._directory, f"{sim_id}_{lrn_id}.pickle")
+
+class TaskTimeout(BaseException):
+    """Raised when a task runs longer than its time budget.
+
+    Remarks:
+        This isn't an Exception so that a learner which catches every Exception can't keep running.
+    """
+
+class TaskTimer:
+    """Raise TaskTimeout in the block it manages once the block has run for more than the given seconds.
+
+    Remarks:
+        The timer uses SIGALRM so it only works on the main thread of a process on Unix (e.g., in every process
+        of a CobaExecutor). Elsewhere blocks are never timed out. Code running in a C extension is only stopped 
+        when it returns to Python.
+    """
+
+    def __init__(self, seconds: Optional[float]) -> None:
+        self._seconds = seconds
+        self._started = False
+
+    def __enter__(self) -> 'TaskTimer':
+        is_main = threading.current_thread() is threading.main_thread()
+
+        if self._seconds and is_main and hasattr(signal, 'setitimer'):
+            self._previous = signal.signal(signal.SIGALRM, TaskTimer._timeout)
+            self._started  = True
+            signal.setitimer(signal.ITIMER_REAL, self._seconds)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._started:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous)
+            self._started = False
+
+    @contextmanager
+    def paused(self) -> Iterator['TaskTimer']:
+        """Stop the timer while the block it manages runs and then start it again with the time it had left."""
+
+        if not self._started:
+            yield self
+        else:
+            remaining, _ = signal.setitimer(signal.ITIMER_REAL, 0)
+            try:
+                yield self
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, max(remaining, 1e-6))
+
+    @staticmethod
+    def _timeout(signum, frame) -> None:
+        raise TaskTimeout()
+
 class Transactions(Filter[Iterable[Iterable[BenchmarkTask]], Iterable[Any]]):
 
+    #a process keeps the factory it is first given for each learner so the factory's work is only done once
+    _factories: Dict[int, LearnerFactory] = {}
+
+    def __init__(self, timeout: float = None, retry: bool = False, lockstep: bool = False, batch_size: int = 1, checkpoints: Checkpoints = None, segment: int = None) -> None:
+        """Instantiate a Transactions filter.
+
+        Args:
+            timeout: The most seconds a learner may take to be evaluated on a simulation. When a learner takes
+                longer its evaluation is stopped, its process is replaced and a failure transaction is written.
+            retry: Indicates if a learner that ran out of time should be evaluated one more time before failing.
+            lockstep: Indicates if every learner for a simulation should be given each interaction before the next
+                interaction is given out (i.e., the interactions are walked once instead of once per learner).
+            batch_size: The number of interactions a learner with `predict_batch` and `learn_batch` predicts before
+                it learns from them. Learners without these methods are still given one interaction at a time.
+            checkpoints: Where learners write their progress on a simulation and continue from after a crash.
+            segment: The number of interactions in each partial interactions transaction. When None each learner
+                writes one interactions transaction per simulation once it has been evaluated on every interaction.
+        """
+        self._timeout     = timeout
+        self._retry       = retry
+        self._lockstep    = lockstep
+        self._batch_size  = batch_size
+        self._checkpoints = checkpoints
+        self._segment     = segment
+
     def filter(self, chunks: Iterable[Iterable[BenchmarkTask]]) -> Iterable[Any]:
 
         for chunk in chunks:
@@ -153,6 +717,9 @@ class Transactions(Filter[Iterable[Iterable[BenchmarkTask]], Iterable[Any]]):
                         #Rhis is not ideal. I'm not sure how it should be improved and leaving this for now.
                         loaded_source = list(source_by_id[src_id].read())
 
+                    evaluated_seconds      = 0.
+                    evaluated_interactions = 0
+
                     for sim_id, tasks_by_src_sim in groupby(sorted(tasks_by_src, key=srt_sim), key=grp_sim):
 
                         tasks_by_src_sim_list = list(tasks_by_src_sim)
@@ -162,6 +729,7 @@ class Transactions(Filter[Iterable[Iterable[BenchmarkTask]], Iterable[Any]]):
 
                         learner_ids.reverse()
                         learners.reverse() 
+                        seeds.reverse()
 
                         with CobaConfig.Logger.time(f"Creating simulation {sim_id} from source {src_id}..."):
                             interactions = filter_by_id[sim_id].filter(loaded_source)
@@ -170,32 +738,64 @@ class Transactions(Filter[Iterable[Iterable[BenchmarkTask]], Iterable[Any]]):
                             CobaConfig.Logger.log(f"Simulation {sim_id} has nothing to evaluate (likely due to `take` being larger than the simulation).")
                             continue
 
+                        if self._lockstep and len(learners) > 1:
+                            try:
+                                with CobaConfig.Logger.time(f"Evaluating learners {sorted(learner_ids)} on Simulation {sim_id} in lockstep..."):
+                                    start = time.time()
+
+                                    #the learners share one budget so that a learner which is too slow is found below
+                                    with TaskTimer(self._timeout and self._timeout*len(learners)) as timer:
+                                        new_learners = [ self._new_learner(lrn_id, learner) for lrn_id, learner in zip(learner_ids[::-1], learners[::-1]) ]
+                                        new_randoms  = [ CobaRandom(seed) for seed in seeds[::-1] ]
+
+                                        for transaction in self._evaluate(sim_id, learner_ids[::-1], new_learners, new_randoms, interactions):
+                                            with timer.paused(): yield transaction
+
+                                    evaluated_seconds      += time.time()-start
+                                    evaluated_interactions += len(interactions) * len(learners)
+
+                                learner_ids.clear()
+                                learners.clear()
+
+                            except TaskTimeout:
+                                MultiprocessFilter.Processor.retire = True
+                                CobaConfig.Logger.log(f"Learners on simulation {sim_id} took more than their time in lockstep and will be evaluated one at a time.")
+
+                            except Exception:
+                                #a learner couldn't be created so each learner is evaluated by itself to log its exception
+                                pass
+
                         for index in sorted(range(len(learners)), reverse=True):
 
-                            lrn_id  = learner_ids[index]
-                            learner = deepcopy(learners[index])
-                            random  = CobaRandom(seeds[index])
+                            lrn_id   = learner_ids[index]
+                            attempts = 2 if self._retry else 1
 
                             try:
-                                with CobaConfig.Logger.time(f"Evaluating learner {lrn_id} on Simulation {sim_id}..."):
-
-                                    row_data = defaultdict(list)
-
-                                    for i, interaction in enumerate(interactions):
-                                        probs  = learner.predict(i, interaction.context, interaction.actions)
-                                        
-                                        assert abs(sum(probs) - 1) < .0001, "The learner returned invalid proabilities for action choices."
-                                        
-                                        action = random.choice(interaction.actions, probs)
-                                        reward = interaction.feedbacks[interaction.actions.index(action)]
-                                        prob   = probs[interaction.actions.index(action)]
-                                        
-                                        info = learner.learn(i, interaction.context, action, reward, prob) or {}
-                                                                                
-                                        for key,value in info.items() | {('reward',reward)}: 
-                                            row_data[key].append(value)
-
-                                    yield Transaction.interactions(sim_id, lrn_id, _packed=row_data)
+                                for attempt in range(1, attempts+1):
+                                    try:
+                                        with CobaConfig.Logger.time(f"Evaluating learner {lrn_id} on Simulation {sim_id}..."):
+                                            start = time.time()
+
+                                            with TaskTimer(self._timeout) as timer:
+                                                new_learner = self._new_learner(lrn_id, learners[index])
+
+                                                for transaction in self._evaluate(sim_id, [lrn_id], [new_learner], [CobaRandom(seeds[index])], interactions):
+                                                    with timer.paused(): yield transaction
+
+                                            evaluated_seconds      += time.time()-start
+                                            evaluated_interactions += len(interactions)
+
+                                        break
+
+                                    except TaskTimeout:
+                                        #a stopped learner may have left its process in a bad state so the process is replaced
+                                        MultiprocessFilter.Processor.retire = True
+
+                                        if attempt < attempts:
+                                            CobaConfig.Logger.log(f"Learner {lrn_id} took more than {self._timeout} seconds on simulation {sim_id} and will be tried again.")
+                                        else:
+                                            CobaConfig.Logger.log(f"Learner {lrn_id} took more than {self._timeout} seconds on simulation {sim_id} and has failed.")
+                                            yield Transaction.failure(sim_id, lrn_id, reason="timeout", seconds=self._timeout, attempts=attempts)
 
                             except Exception as e:
                                 CobaConfig.Logger.log_exception(e)
@@ -204,5 +804,102 @@ class Transactions(Filter[Iterable[Iterable[BenchmarkTask]], Iterable[Any]]):
                                 del learner_ids[index]
                                 del learners[index]
 
+                    if evaluated_interactions:
+                        TaskCosts.record(source_by_id[src_id], len(loaded_source), evaluated_seconds/evaluated_interactions)
+
+                except Exception as e:
+                    CobaConfig.Logger.log_exception(e)
+
+    def _new_learner(self, lrn_id: int, learner: BenchmarkTask.BenchmarkTaskLearner) -> Learner:
+
+        if not isinstance(learner._learner, LearnerFactory):
+            return deepcopy(learner._learner)
+
+        if Transactions._factories.get(lrn_id) != learner._learner:
+            Transactions._factories[lrn_id] = learner._learner
+
+        return Transactions._factories[lrn_id].create()
+
+    def _evaluate(self, sim_id: int, lrn_ids: Sequence[int], learners: Sequence[Learner], randoms: Sequence[CobaRandom], interactions: Sequence[Interaction]) -> Iterable[Any]:
+
+        batch_size  = self._batch_size
+        checkpoints = self._checkpoints
+        segment     = self._segment
+        is_batched  = lambda learner: batch_size > 1 and hasattr(learner, 'predict_batch') and hasattr(learner, 'learn_batch')
+
+        #each evaluation is [lrn_id, learner, random, row_data, the index it continues at, is_batched]
+        evaluated = [ [lrn_id, learner, random, InteractionColumns(), 0] for lrn_id, learner, random in zip(lrn_ids, learners, randoms) ]
+
+        if checkpoints:
+            for evaluation in evaluated:
+                checkpoint = checkpoints.read(sim_id, evaluation[0])
+
+                #a checkpoint taken in the middle of a batch (i.e., with a different batch_size) can't be continued
+                if checkpoint and checkpoint[0] % batch_size == 0:
+                    CobaConfig.Logger.log(f"Learner {evaluation[0]} is continuing from interaction {checkpoint[0]} on simulation {sim_id}.")
+                    evaluation[1:] = [checkpoint[1], checkpoint[2], checkpoint[3], checkpoint[0]]
+
+        for evaluation in evaluated: evaluation.append(is_batched(evaluation[1]))
+
+        for start in range(min([e[4] for e in evaluated], default=0), len(interactions), batch_size):
+
+            block = interactions[start:start+batch_size]
+            keys  = range(start, start+len(block))
+            end   = start+len(block)
+
+            for evaluation in evaluated:
+                lrn_id, learner, random, row_data, continue_at, batched = evaluation
+
+                if start < continue_at: continue
+
+                try:
+                    if batched:
+                        contexts = [ interaction.context for interaction in block ]
+                        probs    = learner.predict_batch(keys, contexts, [ interaction.actions for interaction in block ])
+                        choices  = [ self._choose(random, interaction, prob) for interaction, prob in zip(block, probs) ]
+                        infos    = learner.learn_batch(keys, contexts, *map(list,zip(*choices))) or [None]*len(block)
+                    else:
+                        choices, infos = [], []
+                        for key, interaction in zip(keys, block):
+                            choices.append(self._choose(random, interaction, learner.predict(key, interaction.context, interaction.actions)))
+                            infos.append(learner.learn(key, interaction.context, *choices[-1]))
+
+                    for (_, reward, _), info in zip(choices, infos):
+                        row_data.append(reward, info)
+
                 except Exception as e:
-                    CobaConfig.Logger.log_exception(e)
\ No newline at end of file
+                    #a learner that fails is dropped without stopping the learners it is in lockstep with
+                    CobaConfig.Logger.log_exception(e)
+                    evaluated = [ other for other in evaluated if other is not evaluation ]
+                    continue
+
+                if segment and end // segment > start // segment and end < len(interactions):
+                    #we let go of the rows in a segment once it is written to keep memory from growing with the simulation
+                    yield self._interactions(sim_id, lrn_id, end-len(row_data), row_data, False)
+                    evaluation[3] = row_data = InteractionColumns()
+
+                if checkpoints and end // checkpoints.every > start // checkpoints.every and end < len(interactions):
+                    checkpoints.write(sim_id, lrn_id, end, learner, random, row_data)
+
+        for lrn_id, learner, random, row_data, continue_at, batched in evaluated:
+            yield self._interactions(sim_id, lrn_id, len(interactions)-len(row_data), row_data, True)
+            if checkpoints: checkpoints.remove(sim_id, lrn_id)
+
+    def _interactions(self, sim_id: int, lrn_id: int, start: int, row_data: InteractionColumns, final: bool) -> Any:
+
+        if not self._segment:
+            return Transaction.interactions(sim_id, lrn_id, _packed=row_data.columns)
+
+        if final:
+            return Transaction.interactions(sim_id, lrn_id, _packed=row_data.columns, _start=start)
+        else:
+            return Transaction.interactions(sim_id, lrn_id, _packed=row_data.columns, _start=start, _partial=True)
+
+    def _choose(self, random: CobaRandom, interaction: Interaction, probs: Sequence[float]) -> Tuple[Action, float, float]:
+
+        assert abs(sum(probs) - 1) < .0001, "The learner returned invalid proabilities for action choices."
+
+        action = random.choice(interaction.actions, probs)
+        index  = interaction.actions.index(action)
+
+        return action, interaction.feedbacks[index], probs[index]
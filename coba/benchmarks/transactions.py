@@ -103,6 +103,18 @@ class Transaction:
 
         return ["I", (simulation_id, learner_id), kwargs]
 
+    @staticmethod
+    def failure(simulation_id:int, learner_id:int, **kwargs) -> Any:
+        """Write a row to Result recording that a learner couldn't be evaluated on a simulation.
+
+        Args:
+            learner_id: The primary key for the learner that failed.
+            simulation_id: The primary key for the simulation the learner failed on.
+            kwargs: The metadata to store about the failure (e.g., its reason).
+        """
+
+        return ["F", (simulation_id, learner_id), kwargs]
+
 class TransactionIsNew(Filter):
 
     def __init__(self, existing: Result):
@@ -121,7 +133,7 @@ class TransactionIsNew(Filter):
             if tipe == "benchmark" and len(self._existing.benchmark) != 0:
                 continue
 
-            if tipe == "I" and transaction[1] in self._existing._interactions:
+            if tipe == "I" and self._is_written(transaction):
                 continue
 
             if tipe == "S" and transaction[1] in self._existing._simulations:
@@ -132,13 +144,28 @@ class TransactionIsNew(Filter):
 
             yield transaction
 
+    def _is_written(self, transaction: Any) -> bool:
+        key = tuple(transaction[1])
+
+        if key in self._existing._interactions:
+            return True
+
+        if key not in self._existing._partial:
+            return False
+
+        #a segment that was written before a benchmark stopped is written again when the benchmark is resumed
+        rows = transaction[2].get("_packed", {}).get("reward", [])
+        return "_start" in transaction[2] and transaction[2]["_start"] + len(rows) <= self._existing._partial[key]
+
 class TransactionSink(Sink):
 
     def __init__(self, transaction_log: Optional[str], restored: Result) -> None:
 
         json_encode = Cartesian(JsonEncode())
 
-        final_sink = Pipe.join([json_encode], DiskSink(transaction_log)) if transaction_log else MemorySink()
+        #Transactions are buffered in a long lived file and flushed at least every second. 
+        #Anything unflushed when a benchmark crashes will simply be redone when resumed.
+        final_sink = Pipe.join([json_encode], DiskSink(transaction_log, flush_seconds=1)) if transaction_log else MemorySink()
         self._sink = Pipe.join([TransactionIsNew(restored)], final_sink)
 
     def write(self, items: Sequence[Any]) -> None:
@@ -155,6 +182,7 @@ class TransactionSink(Sink):
             return Result.from_transactions(final_sink.items)
 
         if isinstance(final_sink, DiskSink):
+            final_sink.close()
             return Result.from_file(final_sink.filename)
 
         raise Exception("Transactions were written to an unrecognized sink.")
@@ -89,7 +89,7 @@ class BasicLogger(Logger):
         except KeyboardInterrupt:
             self.log(message + f" ({round(time.time()-self._starts.pop(),2)} seconds) (interrupt)")
             raise
-        except Exception:
+        except BaseException:
             self.log(message + f" ({round(time.time()-self._starts.pop(),2)} seconds) (exception)")
             raise
         else:
@@ -189,7 +189,7 @@ class IndentLogger(Logger):
             except KeyboardInterrupt:
                 outcome = "(interrupt)"
                 raise
-            except Exception:
+            except BaseException:
                 outcome = "(exception)"
                 raise
             else:
@@ -0,0 +1,266 @@
+import os
+import time
+import queue
+
+from multiprocessing.connection import Listener, Client, Connection
+from threading import Thread, Event, Lock
+from typing    import Sequence, Iterable, Any, Tuple, List
+
+from coba.config import CobaConfig, IndentLogger
+from coba.pipes  import Filter, Sink, Pipe, StopPipe
+
+class ConnectionSink(Sink[Any]):
+    """Write each item as a message on a connection."""
+
+    def __init__(self, connection: Connection, kind: str) -> None:
+        self._connection = connection
+        self._kind       = kind
+
+    def write(self, item: Any) -> None:
+        self._connection.send((self._kind, item))
+
+class CobaCoordinator:
+    """Hand out items to remote `CobaWorker`s over TCP and collect what they return.
+
+    Remarks:
+        Workers connect to the coordinator's address and are given one item at a time. A worker's output for
+        an item is kept by the coordinator until the worker says it is done with the item. When a worker is lost
+        (e.g., its machine restarts) the item it was working on is given to another worker so no output is lost
+        or repeated. Items and their output are pickled so only workers that have the coordinator's `authkey`
+        are able to connect. By default a coordinator only accepts workers on its own machine. To accept remote
+        workers give it an address such as ('', port) and a network that is trusted. A coordinator should be
+        used in a `with` block or closed.
+    """
+
+    def __init__(self, address: Tuple[str,int] = ('localhost', 0), authkey: bytes = None, retries: int = 1) -> None:
+        """Instantiate a CobaCoordinator.
+
+        Args:
+            address: The host and port that workers connect to. A port of 0 lets the operating system pick one.
+            authkey: A secret that workers must also have in order to connect. When None a random secret is
+                made which can be given to workers from the coordinator's `authkey` property.
+            retries: The most times an item is given to another worker after the worker it was given to is lost.
+        """
+
+        #without an authkey a Listener skips authentication and unpickles whatever a client sends
+        self._authkey  = authkey or os.urandom(32)
+        self._listener = Listener(address, authkey=self._authkey)
+        self._retries  = retries
+        self._tasks    = queue.Queue()
+        self._closed   = Event()
+        self._threads  : List[Thread] = []
+        self._lock     = Lock()
+
+        self._accepter = Thread(target=self._accept, daemon=True)
+        self._accepter.start()
+
+    @property
+    def address(self) -> Tuple[str,int]:
+        """The host and port that workers should connect to."""
+        return self._listener.address
+
+    @property
+    def authkey(self) -> bytes:
+        """The secret that workers must be given to connect."""
+        return self._authkey
+
+    @property
+    def workers(self) -> int:
+        """The number of workers that are currently connected."""
+        with self._lock:
+            return sum(thread.is_alive() for thread in self._threads)
+
+    def submit(self, filters: Sequence[Filter], items: Iterable[Any]) -> Iterable[Any]:
+        """Process items with filters on the connected workers and return their output as each item finishes."""
+
+        results   = queue.Queue()
+        cancelled = Event()
+        n_items   = 0
+
+        for n_items, item in enumerate(items, 1):
+            self._tasks.put([n_items, filters, item, results, cancelled, 0])
+
+        try:
+            for _ in range(n_items):
+                for output in results.get(): yield output
+        finally:
+            #items that haven't been given to a worker yet are skipped by the workers' handlers
+            cancelled.set()
+
+    def close(self) -> None:
+        """Tell every worker to stop and stop accepting new workers."""
+
+        if self._closed.is_set(): return
+
+        self._closed.set()
+
+        #accept blocks until a worker connects so we connect to wake it up
+        try:
+            Client(self.address if self.address[0] else ('localhost', self.address[1]), authkey=self._authkey).close()
+        except Exception:
+            pass
+
+        self._accepter.join()
+        self._listener.close()
+
+        for thread in self._threads: thread.join()
+
+    def _accept(self) -> None:
+
+        while not self._closed.is_set():
+            try:
+                connection = self._listener.accept()
+            except Exception:
+                continue #a client failed to authenticate so we wait for the next one
+
+            if self._closed.is_set():
+                connection.close()
+            else:
+                with self._lock:
+                    self._threads = [ thread for thread in self._threads if thread.is_alive() ]
+                    self._threads.append(Thread(target=self._handle, args=(connection,), daemon=True))
+                    self._threads[-1].start()
+
+    def _handle(self, connection: Connection) -> None:
+
+        try:
+            while not self._closed.is_set():
+
+                try:
+                    task = self._tasks.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+
+                task_id, filters, item, results, cancelled, attempts = task
+
+                if cancelled.is_set(): continue
+
+                try:
+                    results.put(self._process(connection, filters, item))
+
+                except (EOFError, OSError):
+                    #the worker was lost so we give its item to another worker
+                    if self._closed.is_set():
+                        pass
+                    elif attempts < self._retries:
+                        CobaConfig.Logger.log(f"A worker was lost while processing item {task_id}. The item will be given to another worker.")
+                        task[-1] += 1
+                        self._tasks.put(task)
+                    else:
+                        CobaConfig.Logger.log(f"A worker was lost while processing item {task_id}. The item has been lost too many times and will be skipped.")
+                        results.put([])
+                    return
+
+                except Exception as e:
+                    #the item couldn't be sent (e.g., it isn't picklable)
+                    CobaConfig.Logger.log_exception(e)
+                    results.put([])
+
+            connection.send(("stop", None))
+
+        except (EOFError, OSError):
+            pass
+
+        finally:
+            connection.close()
+
+    def _process(self, connection: Connection, filters: Sequence[Filter], item: Any) -> Sequence[Any]:
+
+        connection.send(("task", (filters, item)))
+
+        outputs = []
+
+        while True:
+            if not connection.poll(0.1):
+                #when we're closed we stop waiting and the worker stops once it sees that we've gone away
+                if self._closed.is_set(): raise EOFError()
+                continue
+
+            kind, message = connection.recv()
+
+            if kind == "item": outputs.append(message)
+            if kind == "log" : CobaConfig.Logger.sink.write(message)
+            if kind == "done": return outputs
+
+    def __enter__(self) -> 'CobaCoordinator':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+class DistributedFilter(Filter[Iterable[Any], Iterable[Any]]):
+    """Apply filters to each item on the workers of a `CobaCoordinator`."""
+
+    def __init__(self, filters: Sequence[Filter], coordinator: CobaCoordinator) -> None:
+        """Instantiate a DistributedFilter.
+
+        Args:
+            filters: The filters that will be applied to each item by a worker.
+            coordinator: The coordinator whose workers will apply the filters.
+        """
+        self._filters     = filters
+        self._coordinator = coordinator
+
+    def filter(self, items: Iterable[Any]) -> Iterable[Any]:
+        return self._coordinator.submit(self._filters, items)
+
+class CobaWorker:
+    """Process the items given by a remote `CobaCoordinator` until it says to stop."""
+
+    def __init__(self, address: Tuple[str,int], authkey: bytes, wait: float = 60) -> None:
+        """Instantiate a CobaWorker.
+
+        Args:
+            address: The host and port of the coordinator.
+            authkey: The coordinator's secret (see `CobaCoordinator.authkey`).
+            wait: The most seconds to wait for the coordinator to start accepting workers.
+        """
+
+        if not authkey:
+            raise Exception("A CobaWorker must be given its coordinator's authkey.")
+
+        self._address = address
+        self._authkey = authkey
+        self._wait    = wait
+
+    def run(self) -> None:
+        """Connect to the coordinator and process items until the coordinator closes."""
+
+        connection = self._connect()
+
+        try:
+            while True:
+                kind, message = connection.recv()
+
+                if kind == "stop": return
+
+                filters, item = message
+
+                CobaConfig.Logger = IndentLogger(ConnectionSink(connection, "log"), with_name=True)
+
+                try:
+                    for output in Pipe.join(filters).filter([item]):
+                        connection.send(("item", output))
+                except StopPipe:
+                    pass
+                except Exception as e:
+                    CobaConfig.Logger.log_exception(e)
+
+                connection.send(("done", None))
+
+        except (EOFError, OSError):
+            pass #the coordinator has gone away so there is nothing left to do
+
+        finally:
+            connection.close()
+
+    def _connect(self) -> Connection:
+
+        start = time.time()
+
+        while True:
+            try:
+                return Client(self._address, authkey=self._authkey)
+            except ConnectionRefusedError:
+                if time.time() - start > self._wait: raise
+                time.sleep(0.5)
@@ -6,6 +6,7 @@ Remarks:
 
 import json
 
+from itertools import chain
 from collections import defaultdict
 from abc import ABC, abstractmethod
 from typing import Iterator, Sequence, Generic, TypeVar, Any, Dict, Tuple
@@ -48,6 +49,26 @@ class Encoder(Generic[_T_out], ABC):
         """
         ...
 
+    def partial_fit(self, values: Sequence[Any]) -> 'Encoder':
+        """Accumulate training data without finishing the fit.
+
+        Args:
+            values: A collection of values to add to the training data seen so far.
+
+        Returns:
+            An Encoder that remembers all the training data it has been given but is not yet fit.
+
+        Remarks:
+            This allows an Encoder to be fit over a stream of values without holding them all in 
+            memory. The fit is completed by calling `fit` with any remaining values (or an empty 
+            sequence). Encoders that don't need training data to be fit can use this default.
+        """
+
+        if self.is_fit:
+            raise Exception("This encoder has already been fit.")
+
+        return self
+
     @abstractmethod
     def encode(self, values: Sequence[Any]) -> Sequence[_T_out]:
         """Encode the given value into the implementation's generic type.
@@ -207,6 +228,7 @@ class OneHotEncoder(Encoder[Tuple[int,...]]):
         self._singular_if_binary = singular_if_binary
         self._error_if_unknown   = error_if_unknown
         self._is_fit             = len(fit_values) > 0
+        self._partial_values: Dict[Any,None] = {}
 
         if fit_values:
 
@@ -256,13 +278,38 @@ class OneHotEncoder(Encoder[Tuple[int,...]]):
         if self.is_fit:
             raise Exception("This encoder has already been fit.")
 
-        fit_values = sorted(set(values), key=lambda v: values.index(v))
+        #dict keys maintain insertion order so this gives us the distinct values in the order they were first seen
+        fit_values = list(dict.fromkeys(chain(self._partial_values, values)))
 
         return OneHotEncoder(
             fit_values         = fit_values, 
             singular_if_binary = self._singular_if_binary, 
             error_if_unknown   = self._error_if_unknown)
 
+    def partial_fit(self, values: Sequence[Any]) -> 'OneHotEncoder':
+        """Accumulate training data without finishing the fit.
+
+        Args:
+            values: A collection of values to add to the training data seen so far.
+
+        Returns:
+            An Encoder that remembers the distinct values it has been given but is not yet fit.
+
+        Remarks:
+            See the base class for more information.
+        """
+
+        if self.is_fit:
+            raise Exception("This encoder has already been fit.")
+
+        encoder = OneHotEncoder(
+            singular_if_binary = self._singular_if_binary, 
+            error_if_unknown   = self._error_if_unknown)
+
+        encoder._partial_values = dict.fromkeys(chain(self._partial_values, values))
+
+        return encoder
+
     def encode(self, values: Sequence[Any]) -> Sequence[Tuple[int,...]]:
         """Encode the given value as a sequence of 0's and 1's.
 
@@ -298,6 +345,7 @@ class FactorEncoder(Encoder[int]):
         self._fit_values       = fit_values
         self._error_if_unknown = error_if_unknown
         self._is_fit           = len(fit_values) > 0
+        self._partial_values: Dict[Any,None] = {}
 
         if fit_values:
             unknown_level = 0
@@ -339,12 +387,33 @@ class FactorEncoder(Encoder[int]):
         if self.is_fit:
             raise Exception("This encoder has already been fit.")
 
-        fit_values = sorted(set(values))
+        fit_values = sorted(dict.fromkeys(chain(self._partial_values, values)))
 
         return FactorEncoder(
             fit_values         = fit_values, 
             error_if_unknown   = self._error_if_unknown)
 
+    def partial_fit(self, values: Sequence[Any]) -> 'FactorEncoder':
+        """Accumulate training data without finishing the fit.
+
+        Args:
+            values: A collection of values to add to the training data seen so far.
+
+        Returns:
+            An Encoder that remembers the distinct values it has been given but is not yet fit.
+
+        Remarks:
+            See the base class for more information.
+        """
+
+        if self.is_fit:
+            raise Exception("This encoder has already been fit.")
+
+        encoder = FactorEncoder(error_if_unknown=self._error_if_unknown)
+        encoder._partial_values = dict.fromkeys(chain(self._partial_values, values))
+
+        return encoder
+
     def encode(self, values: Sequence[Any]) -> Sequence[int]:
         """Encode the given values as a sequence factor levels.
 
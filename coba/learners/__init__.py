@@ -6,7 +6,7 @@ inherit from this interface to implement new learners. In addition, a number
 of learners are provided out of the box for testing and baseline comparisons.
 """
 
-from coba.learners.core import Learner
+from coba.learners.core import Learner, LearnerFactory
 from coba.learners.bandit import RandomLearner, EpsilonBanditLearner, UcbBanditLearner
 from coba.learners.corral import CorralLearner
 from coba.learners.vowpal import VowpalLearner
@@ -17,6 +17,7 @@ from coba.learners.regCB import RegCBLearner
 
 __all__ = [
     'Learner',
+    'LearnerFactory',
     'RandomLearner',
     'EpsilonBanditLearner',
     'UcbBanditLearner',
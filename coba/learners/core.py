@@ -1,12 +1,20 @@
 """The expected interface for all learner implementations."""
 
 from abc import ABC, abstractmethod
-from typing import Any, Sequence, Dict, Union, Tuple, Optional
+from typing import Any, Sequence, Dict, Union, Tuple, Optional, Callable
 
+from coba.registry import CobaRegistry
 from coba.simulations import Context, Action, Key
 
 class Learner(ABC):
-    """The interface for Learner implementations."""
+    """The interface for Learner implementations.
+
+    Remarks:
+        A learner may also implement `predict_batch(keys, contexts, actions)` and `learn_batch(keys, contexts,
+        actions, rewards, probabilities)`. These take a sequence for each argument of `predict` and `learn`
+        and return a sequence with one result per interaction (`learn_batch` may return None). When a Benchmark 
+        has a `batch_size` these are used to predict a batch of interactions before learning from any of them.
+    """
 
     @property
     @abstractmethod
@@ -76,6 +84,88 @@ class Learner(ABC):
         """
         ...
     
+    @property
+    def imports(self) -> Sequence[str]:
+        """The modules a learner imports lazily (e.g., numpy) while predicting and learning.
+
+        Background processes import these before they are given any tasks so the cost of importing
+        isn't included in how long a task takes. This value is optional and empty by default.
+        """
+        return []
+
     def __reduce__(self) -> Union[str, Tuple[Any, ...]]:
         """An optional method that can be overridden for Learner implimentations that are not picklable by default."""
-        return super().__reduce__()
\ No newline at end of file
+        return super().__reduce__()
+
+class LearnerFactory:
+    """A recipe that creates new learners.
+
+    Remarks:
+        Benchmarks copy a learner for every simulation it is evaluated on and send it to background processes
+        with every chunk of work. A factory can be given to a Benchmark in place of a learner so that only its
+        recipe is sent and each evaluation starts with a call to the learner's constructor instead of a copy.
+        The factory's family, params and imports come from a learner that it creates once in each process.
+    """
+
+    def __init__(self, recipe: Union[Callable[..., Learner], str, Dict[str,Any]], *args: Any, **kwargs: Any) -> None:
+        """Instantiate a LearnerFactory.
+
+        Args:
+            recipe: Either a callable (e.g., a Learner class) that is called with args and kwargs to create a
+                learner or a CobaRegistry recipe (e.g., {"MyLearner": [1,2]}) for a registered learner.
+            args: The positional arguments given to a callable recipe.
+            kwargs: The keyword arguments given to a callable recipe.
+        """
+
+        if isinstance(recipe, (str,dict)) and (args or kwargs):
+            raise Exception("The arguments for a registry recipe should be given in the recipe.")
+
+        self._recipe    = recipe
+        self._args      = args
+        self._kwargs    = kwargs
+        self._prototype = None
+
+    @property
+    def family(self) -> str:
+        """The family of the learners that are created."""
+        try:
+            return self._get_prototype().family
+        except AttributeError:
+            return self._get_prototype().__class__.__name__
+
+    @property
+    def params(self) -> Dict[str,Any]:
+        """The parameters of the learners that are created."""
+        try:
+            return self._get_prototype().params
+        except AttributeError:
+            return {}
+
+    @property
+    def imports(self) -> Sequence[str]:
+        """The modules that the learners that are created import lazily."""
+        return getattr(self._get_prototype(), 'imports', [])
+
+    def create(self) -> Learner:
+        """Create a new learner."""
+
+        if isinstance(self._recipe, (str,dict)):
+            return CobaRegistry.construct(self._recipe)
+        else:
+            return self._recipe(*self._args, **self._kwargs)
+
+    def _get_prototype(self) -> Learner:
+        if self._prototype is None:
+            self._prototype = self.create()
+        return self._prototype
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, LearnerFactory) and (self._recipe, self._args, self._kwargs) == (other._recipe, other._args, other._kwargs)
+
+    def __reduce__(self) -> Union[str, Tuple[Any, ...]]:
+        #we don't send our prototype to other processes since it may be large or unpicklable
+        return (LearnerFactory._from_recipe, (self._recipe, self._args, self._kwargs))
+
+    @staticmethod
+    def _from_recipe(recipe: Any, args: Tuple[Any,...], kwargs: Dict[str,Any]) -> 'LearnerFactory':
+        return LearnerFactory(recipe, *args, **kwargs)
@@ -66,6 +66,14 @@ class CorralLearner(Learner):
         """
         return {"eta": self._eta_init, "B": [ b.family for b in self._base_learners ] }
 
+    @property
+    def imports(self) -> Sequence[str]:
+        """The modules the learner imports lazily.
+
+        See the base class for more information.
+        """
+        return [ module for learner in self._base_learners for module in learner.imports ]
+
     def predict(self, key: Key, context: Context, actions: Sequence[Action]) -> Sequence[float]:
         """Determine a PMF with which to select the given actions.
 
@@ -26,6 +26,14 @@ class LinUCBLearner(Learner):
         dict = {'alpha': self._alpha, 'interactions': self._interactions}
         return dict
 
+    @property
+    def imports(self) -> Sequence[str]:
+        """The modules the learner imports lazily.
+
+        See the base class for more information.
+        """
+        return ["numpy"]
+
     def __init__(self, *, alpha: float, interactions: Sequence[str] = ['a', 'ax'], timeit: bool = False) -> None:
         """Instantiate a linUCBLearner.
         Args:
@@ -88,22 +96,43 @@ class LinUCBLearner(Learner):
         self._times[0] += time.time() - start_predict
 
         theta = np.dot(A_inv, self._b)
-        
-        term_one = np.zeros([len(actions),1])
-        term_two = np.zeros([len(actions),1])
-
-        for i in range(len(actions)):
-            term_one[i] = theta.T @ features[:,i]
-            term_two[i] = self._alpha * np.sqrt(features[:,i].T @ A_inv @ features[:,i])
-
-        action_values = term_one + term_two
 
         if (self._i-1) % 100 == 0 and self._timeit:
             print(self._times[0]/(self._i+1))
             print(self._times[1]/(self._i+1))
 
-        max_indexes = np.where(action_values == np.amax(action_values))[0]
-        return [1/len(max_indexes) if ind in max_indexes else 0 for ind in range(len(actions))]
+        return self._pmf(features, A_inv, theta)
+
+    def predict_batch(self, keys: Sequence[Key], contexts: Sequence[Context], actions: Sequence[Sequence[Action]]) -> Sequence[Sequence[float]]:
+        """Determine a PMF for each of the given interactions before learning from any of them.
+
+        Args:
+            keys: The keys identifying the interactions we are choosing for.
+            contexts: The contexts we're currently in. See the base class for more information.
+            actions: The actions to choose from in each context. See the base class for more information.
+
+        Returns:
+            The probability of taking each action in each interaction. Unlike calling `predict` for each 
+            interaction the learner's parameters are only inverted once for the whole batch.
+        """
+        import numpy as np #type: ignore
+
+        if any(isinstance(acts[0], dict) or isinstance(context, dict) for context, acts in zip(contexts, actions)):
+            raise Exception("Sparse data cannot be handled by this algorithm.")
+
+        self._i += len(keys)
+        self._d  = len(actions[-1][0]) if isinstance(actions[-1][0], collections.Sequence) else 1
+
+        features = [ self._featurize(context, acts) for context, acts in zip(contexts, actions) ]
+
+        if(self._A is None):
+            self._A = np.identity(features[0].shape[0])
+            self._b = np.zeros((features[0].shape[0], 1))
+
+        A_inv = np.linalg.inv(self._A)
+        theta = np.dot(A_inv, self._b)
+
+        return [ self._pmf(f, A_inv, theta) for f in features ]
 
     def learn(self, key: Key, context: Context, action: Action, reward: float, probability: float) -> None:
         """Learn from the given interaction.
@@ -126,6 +155,44 @@ class LinUCBLearner(Learner):
 
         self._times[1] += time.time() - learn_start
 
+    def learn_batch(self, keys: Sequence[Key], contexts: Sequence[Context], actions: Sequence[Action], rewards: Sequence[float], probabilities: Sequence[float]) -> None:
+        """Learn from the given interactions.
+
+        Args:
+            keys: The keys identifying the interactions these observed rewards came from.
+            contexts: The contexts we're learning about. See the base class for more information.
+            actions: The actions that were selected in each context. See the base class for more information.
+            rewards: The rewards that were gained from the actions. See the base class for more information.
+            probabilities: The probabilities that the given actions were taken.
+        """
+        import numpy as np #type: ignore
+
+        learn_start = time.time()
+
+        features = np.hstack([ self._featurize(context, [action]) for context, action in zip(contexts, actions) ])
+
+        self._A = self._A + features@features.T
+        self._b = self._b + features@np.array(rewards, dtype=float).reshape(-1,1)
+
+        self._times[1] += time.time() - learn_start
+
+    def _pmf(self, features, A_inv, theta) -> Sequence[float]:
+        import numpy as np #type: ignore
+
+        n_actions = features.shape[1]
+
+        term_one = np.zeros([n_actions,1])
+        term_two = np.zeros([n_actions,1])
+
+        for i in range(n_actions):
+            term_one[i] = theta.T @ features[:,i]
+            term_two[i] = self._alpha * np.sqrt(features[:,i].T @ A_inv @ features[:,i])
+
+        action_values = term_one + term_two
+
+        max_indexes = np.where(action_values == np.amax(action_values))[0]
+        return [1/len(max_indexes) if ind in max_indexes else 0 for ind in range(n_actions)]
+
     def _featurize(self, context, actions):
         import numpy as np #type: ignore
 
@@ -38,6 +38,14 @@ class RegCBLearner(Learner):
         dict = {'beta': self._beta, 'alpha': self._alpha, 'interactions': self._interactions}
         return dict
 
+    @property
+    def imports(self) -> Sequence[str]:
+        """The modules the learner imports lazily.
+
+        See the base class for more information.
+        """
+        return ["numpy", "scipy.sparse"]
+
     def __init__(self, *, beta: float, alpha: float, learning_rate:float=0.1, interactions: Sequence[str] = ['a', 'ax']) -> None:
         """Instantiate a RegCBLearner.
 
@@ -186,6 +186,14 @@ class VowpalLearner(Learner):
 
         return {'args': self._create_format(None)}
 
+    @property
+    def imports(self) -> Sequence[str]:
+        """The modules the learner imports lazily.
+
+        See the base class for more information.
+        """
+        return ["vowpalwabbit"]
+
     def predict(self, key: Key, context: Context, actions: Sequence[Action]) -> Sequence[float]:
         """Determine a PMF with which to select the given actions.
 
@@ -1,18 +1,46 @@
+import os
 import sys
+import time
+import uuid
+import importlib
 import multiprocessing.pool
 
-from multiprocessing import Manager
-from threading       import Thread
-from typing          import Sequence, Iterable, Any
+from array           import array
+from multiprocessing import SimpleQueue, Array, Value, Barrier
+from itertools       import takewhile, count
+from threading       import Thread, BrokenBarrierError
+from typing          import Sequence, Iterable, Any, Optional, Union, Tuple, Callable, List
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError: #pragma: no cover
+    #shared_memory was added in Python 3.8. Before that we simply send everything through the queue.
+    shared_memory = None
 
 from coba.config import CobaConfig, IndentLogger, CobaFatal
 from coba.pipes  import Filter, Sink, Pipe, StopPipe, QueueSource, QueueSink
 
 super_worker = multiprocessing.pool.worker #type: ignore
 
+class WorkerLifetime(int):
+    """The `maxtasks` given to a pool's worker so that it can also stop taking tasks when it uses too much memory.
+
+    Remarks:
+        A pool's worker keeps taking tasks while `completed < maxtasks`. Because this is a subclass of int Python 
+        evaluates that comparison with our `__gt__` (i.e., `maxtasks > completed`) instead of int's `__lt__`.
+    """
+
+    def __new__(cls, maxtasks: Optional[int]) -> 'WorkerLifetime':
+        lifetime = super().__new__(cls, maxtasks or 1) #the pool's worker requires an int >= 1
+        lifetime._maxtasks = maxtasks
+        return lifetime
+
+    def __gt__(self, completed: int) -> bool:
+        return not MultiprocessFilter.Processor.retire and (self._maxtasks is None or completed < self._maxtasks)
+
 def worker(inqueue, outqueue, initializer=None, initargs=(), maxtasks=None, wrap_exception=False):
         try:
-            super_worker(inqueue, outqueue, initializer, initargs, maxtasks, wrap_exception)
+            super_worker(inqueue, outqueue, initializer, initargs, WorkerLifetime(maxtasks), wrap_exception)
         except KeyboardInterrupt:
             #we handle this exception because otherwise it is thrown and written to console
             #by handling it ourself we can prevent it from being written to console
@@ -24,15 +52,409 @@ def worker(inqueue, outqueue, initializer=None, initargs=(), maxtasks=None, wrap
 
 multiprocessing.pool.worker = worker #type: ignore
 
+class SharedColumn:
+    """A long column of numbers that a worker has placed in shared memory for the main process to take.
+
+    Remarks:
+        Only this small descriptor is pickled and sent through the queue. The numbers themselves are copied 
+        once into shared memory by the worker and once out of shared memory by the main process as an array.
+        Every block's name starts with a prefix so that blocks which are never taken (e.g., because the workers 
+        were terminated while output was still in the queue) can be found and removed by `sweep`.
+    """
+
+    _count = count()
+
+    def __init__(self, values: Sequence[Union[int,float]], typecode: str, prefix: str) -> None:
+
+        values = values if isinstance(values, array) and values.typecode == typecode else array(typecode, values)
+        nbytes = len(values)*values.itemsize
+        name   = f"{prefix}_{os.getpid()}_{next(SharedColumn._count)}"
+        block  = shared_memory.SharedMemory(name=name, create=True, size=max(nbytes,1))
+
+        #the main process takes ownership of the block (or sweeps it) so the worker's tracker shouldn't remove it
+        resource_tracker.unregister(block._name, "shared_memory") #type: ignore
+
+        block.buf[:nbytes] = memoryview(values).cast('B')
+
+        self._name     = block.name
+        self._typecode = typecode
+        self._length   = len(values)
+
+        block.close()
+
+    @staticmethod
+    def share(values: Any, min_length: int, prefix: str = "coba") -> Any:
+        """Replace every homogeneous list (or array) of at least min_length ints or floats in values with a SharedColumn."""
+
+        if isinstance(values, dict):
+            return { key: SharedColumn.share(value, min_length, prefix) for key, value in values.items() }
+
+        if isinstance(values, array) and len(values) >= min_length and values.typecode in ['q','d']:
+            #arrays are already typed so they are copied into shared memory without looking at their items
+            return SharedColumn(values, values.typecode, prefix)
+
+        if isinstance(values, (list,tuple)) and len(values) >= min_length:
+            types    = set(map(type, values))
+            typecode = 'q' if types == {int} else 'd' if types == {float} else None
+
+            try:
+                if typecode: return SharedColumn(values, typecode, prefix)
+            except OverflowError:
+                pass #the ints were too large for an array so we leave them as is
+
+        if isinstance(values, list):
+            return [ SharedColumn.share(value, min_length, prefix) for value in values ]
+
+        return values
+
+    @staticmethod
+    def take(values: Any) -> Any:
+        """Replace every SharedColumn in values with an array of its numbers and release its shared memory."""
+
+        if isinstance(values, SharedColumn):
+            return values._take()
+
+        if isinstance(values, dict):
+            return { key: SharedColumn.take(value) for key, value in values.items() }
+
+        if isinstance(values, list):
+            return [ SharedColumn.take(value) for value in values ]
+
+        return values
+
+    @staticmethod
+    def sweep(prefix: str) -> None:
+        """Remove every block whose name starts with prefix that is still in shared memory (only on Linux)."""
+
+        if not os.path.isdir('/dev/shm'): return
+
+        for name in os.listdir('/dev/shm'):
+            if name.startswith(prefix + "_"):
+                try:
+                    os.remove(os.path.join('/dev/shm', name))
+                except OSError:
+                    pass
+
+    def _take(self) -> 'array':
+        block  = shared_memory.SharedMemory(name=self._name)
+        values = array(self._typecode)
+
+        try:
+            values.frombytes(block.buf[:self._length*values.itemsize])
+        finally:
+            block.close()
+            block.unlink()
+
+        return values
+
+class MyPool(multiprocessing.pool.Pool):
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.missing_definition_error_is_new = True
+        super().__init__(*args, **kwargs)
+
+    def _join_exited_workers(self):
+
+        for worker in self._pool:
+            if worker.exitcode == 1000 and self.missing_definition_error_is_new:
+                #this is a hack... This only works so long as we just 
+                #process one job at a time... This is true in our case.
+                #this is necessary because multiprocessing can get stuck 
+                #waiting for failed workers and that is frustrating for users.
+
+                self.missing_definition_error_is_new = False
+
+                message = (
+                    "Coba attempted to evaluate your benchmark in multiple processes but the pickle module was unable to "
+                    "find all the definitions needed to pass the tasks to the processes. The two most common causes of "
+                    "this error are: 1) a learner or simulation is defined in a Jupyter Notebook cell or 2) a necessary "
+                    "class definition exists inside the `__name__=='__main__'` code block in the main execution script. In "
+                    "either case there are two simple solutions: 1) evalute your benchmark in a single processed with no "
+                    "limit on child tasks or 2) define all you classes in a separate python file that is imported when "
+                    "evaluating."                                    
+                )
+
+                CobaConfig.Logger.log(message)
+
+            if worker.exitcode is not None and worker.exitcode != 0 and self._cache:
+                #A worker exited in an uncontrolled manner and was unable to clean its job
+                #up. We therefore mark one of the jobs as "finished" but failed to prevent an
+                #infinite wait on a failed job to finish that is actually no longer running.
+                list(self._cache.values())[0]._set(None, (False, None))
+
+        return super()._join_exited_workers()
+
+class WorkerInitializer:
+    """Prepare a worker process before it is given any tasks.
+
+    Remarks:
+        Numpy's BLAS library will, by default, start as many threads as there are cores. When every worker does
+        this the cores are oversubscribed many times over and numpy heavy learners become slower. Thread counts are
+        set through the standard environment variables and, if installed, `threadpoolctl`. The environment variables 
+        only affect libraries that haven't been loaded yet so `threadpoolctl` is needed to change BLAS libraries that 
+        were already loaded when a worker was forked.
+    """
+
+    _thread_variables = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS"]
+
+    def __init__(self, blas_threads: Optional[int] = None, affinity: bool = False, imports: Sequence[str] = ()) -> None:
+        """Instantiate a WorkerInitializer.
+
+        Args:
+            blas_threads: The number of threads each worker's BLAS/OpenMP libraries may use. When None this is
+                the number of cores divided by the number of processes (or 1 if there are more processes than cores).
+            affinity: Indicates if each worker should be pinned to its own share of cores (only on Linux).
+            imports: Modules to import in each worker before it is given any tasks.
+        """
+        self._blas_threads = blas_threads
+        self._affinity     = affinity
+        self.imports       = list(imports)
+
+    def __call__(self, index: int, processes: int) -> None:
+        """Prepare the worker with the given index.
+
+        Args:
+            index: A number in [0,processes) that identifies the worker being prepared.
+            processes: The number of workers sharing this machine.
+        """
+
+        #the cores this process may run on can be fewer than the machine's cores (e.g., in a container)
+        cores   = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+        threads = self._blas_threads or max(1, len(cores) // processes)
+
+        for variable in WorkerInitializer._thread_variables:
+            os.environ[variable] = str(threads)
+
+        try:
+            from threadpoolctl import threadpool_limits #type: ignore
+            threadpool_limits(threads)
+        except Exception:
+            pass
+
+        if self._affinity and hasattr(os, 'sched_setaffinity'):
+            try:
+                os.sched_setaffinity(0, [ cores[(index*threads + i) % len(cores)] for i in range(threads) ])
+            except OSError:
+                pass #an exception here would make the pool endlessly replace workers that fail to start
+
+        for module in self.imports:
+            try:
+                importlib.import_module(module)
+            except Exception:
+                pass #if the module is needed then the failed import will be reported when a task runs
+
+class CobaExecutor:
+    """A pool of worker processes that can be reused by many `Benchmark.evaluate` calls.
+
+    Remarks:
+        Creating processes is expensive. Each one has to import coba (and any learner packages) and then fill its 
+        caches (e.g., the last source it loaded). An executor keeps its processes (and their caches) alive until 
+        it is closed. An executor should be used in a `with` block or closed by calling `close`.
+    """
+
+    def __init__(self, 
+        processes       : int               = 1,
+        maxtasksperchild: int               = None,
+        batch_size      : int               = 100,
+        initializer     : WorkerInitializer = None,
+        max_process_mb  : float             = None,
+        min_free_mb     : float             = None) -> None:
+        """Instantiate a CobaExecutor.
+
+        Args:
+            processes: The number of background processes.
+            maxtasksperchild: The number of items a process will handle before it is replaced.
+            batch_size: The most output items (or log lines) a process will send to the main process at once.
+            initializer: Prepares each process before it is given tasks. When None a `WorkerInitializer` with 
+                its default values is used (i.e., BLAS threads are limited to each process' share of cores).
+            max_process_mb: A process whose resident memory is larger than this after an item is replaced.
+            min_free_mb: A process waits to start an item while the machine has less memory available than this 
+                and another process is still working (so at least one process is always making progress).
+
+        Remarks:
+            Memory is only measured on Linux (i.e., from /proc). Elsewhere the memory limits have no effect.
+        """
+        self.processes         = processes
+        self._maxtasksperchild = maxtasksperchild
+        self._batch_size       = batch_size
+        self._initializer      = initializer or WorkerInitializer()
+        self._max_process_mb   = max_process_mb
+        self._min_free_mb      = min_free_mb
+        self._pool             = None
+
+    def start(self, imports: Sequence[str] = ()) -> Tuple[MyPool, Any, Any]:
+        """Start the executor's processes if they aren't running and return them along with their output queues.
+
+        Args:
+            imports: Modules that processes should import before they are given tasks. Processes that are 
+                already running will import these lazily when their tasks need them.
+        """
+
+        self._initializer.imports.extend(module for module in imports if module not in self._initializer.imports)
+
+        if self._pool is None:
+            #SimpleQueue writes directly to its pipe when `put` is called (unlike Queue which writes on a
+            #background thread). This guarantees a worker's output is in the pipe before its task completes
+            #and therefore before the poison pill is put on the queue by `done_or_failed` in this process.
+            self._stdout_queue = SimpleQueue()
+            self._stdlog_queue = SimpleQueue()
+            self._cancelled    = Value('b', 0, lock=False)
+            self._barrier      = Barrier(self.processes)
+
+            self._memory       = (self._max_process_mb, self._min_free_mb, Value('i', 0))
+
+            initargs   = (self._stdout_queue, self._stdlog_queue, self._batch_size, self._initializer, Array('i', self.processes), self._cancelled, self._barrier, self._memory)
+            self._pool = MyPool(self.processes, MultiprocessFilter.Processor.initialize, initargs, self._maxtasksperchild)
+
+        self._pool.missing_definition_error_is_new = True
+        self._cancelled.value = 0
+
+        return self._pool, self._stdout_queue, self._stdlog_queue
+
+    def cancel(self) -> None:
+        """Tell the executor's processes to skip the items they've been given but haven't finished yet.
+
+        Remarks:
+            An item that is being processed stops once it produces its next output. Cancelling lets the main process
+            wait for the processes to become idle rather than terminating them. Terminating a process while it writes 
+            to a queue leaves the queue's lock held forever which can cause `terminate` itself to hang.
+        """
+        if self._pool is not None:
+            self._cancelled.value = 1
+
+    def broadcast(self, function: Callable[[], Any], timeout: float = 10) -> List[Any]:
+        """Call a function once in every one of the executor's running processes and return what each call returned.
+
+        Args:
+            function: A picklable function that takes no arguments (e.g., to clear a cache kept by each process).
+            timeout: The most seconds a process will wait for the other processes to be given their call.
+
+        Remarks:
+            After calling the function each process waits for every other process to call it as well. This keeps one
+            process from being given two of the calls. Broadcasts should only be made while the processes are idle.
+        """
+
+        if self._pool is None: return []
+
+        try:
+            return self._pool.map(MultiprocessFilter.Processor.broadcast, [(function,timeout)]*self.processes, chunksize=1)
+        finally:
+            #a process that timed out breaks the barrier so we reset it for the next broadcast
+            self._barrier.reset()
+
+    def close(self) -> None:
+        """Wait for the executor's processes to finish their work and then stop them."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def terminate(self) -> None:
+        """Stop the executor's processes immediately. They will be recreated if the executor is used again."""
+        if self._pool is not None:
+            pool, workers, self._pool = self._pool, list(self._pool._pool), None
+
+            #Pool.terminate can hang forever when a process is stopped while it holds the lock of the pool's result
+            #queue. The pool's own threads are daemons so we stop waiting on them after the processes have stopped.
+            def terminate():
+                try:
+                    pool.terminate()
+                except:
+                    pass
+
+            terminator = Thread(target=terminate, daemon=True)
+            terminator.start()
+            terminator.join(1)
+
+            for worker in workers:
+                if worker.exitcode is None: worker.kill()
+
+    def __enter__(self) -> 'CobaExecutor':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
 class MultiprocessFilter(Filter[Iterable[Any], Iterable[Any]]):
 
     class Processor:
 
-        def __init__(self, filters: Sequence[Filter], stdout: Sink, stdlog:Sink, n_proc:int) -> None:
-            self._filter = Pipe.join(filters)
-            self._stdout = stdout
-            self._stdlog = stdlog
-            self._n_proc = n_proc
+        #These are set once per worker by `initialize`. Queues can't be pickled along with each
+        #task so they have to be handed to a worker when it is created (i.e., through inheritance).
+        stdout   : Sink = None
+        stdlog   : Sink = None
+        cancelled: Any  = None
+        barrier  : Any  = None
+        memory   : Any  = (None, None, None)
+        retire   : bool = False
+
+        @staticmethod
+        def initialize(stdout_queue: Any, stdlog_queue: Any, batch_size: int, initializer: WorkerInitializer, slots: Any, cancelled: Any, barrier: Any = None, memory: Any = (None,None,None)) -> None:
+            #batches are sent at least every second so that slow tasks still report their output as they go
+            MultiprocessFilter.Processor.stdout    = QueueSink(stdout_queue, batch_size, 1)
+            MultiprocessFilter.Processor.stdlog    = QueueSink(stdlog_queue, batch_size, 1)
+            MultiprocessFilter.Processor.cancelled = cancelled
+            MultiprocessFilter.Processor.barrier   = barrier
+            MultiprocessFilter.Processor.memory    = memory
+            MultiprocessFilter.Processor.retire    = False
+
+            #Each slot holds the pid of the live worker using it. A worker that replaces a retired worker 
+            #(i.e., maxtasksperchild) is only started after the retired worker has exited so it takes its slot.
+            with slots.get_lock():
+                index = next((i for i, pid in enumerate(slots) if not MultiprocessFilter.Processor._is_alive(pid)), 0)
+                slots[index] = os.getpid()
+
+            try:
+                initializer(index, len(slots))
+            except Exception:
+                pass #an exception here would make the pool endlessly replace workers that fail to start
+
+        @staticmethod
+        def broadcast(function_and_timeout: Tuple[Callable[[], Any], float]) -> Any:
+            function, timeout = function_and_timeout
+
+            try:
+                return function()
+            finally:
+                try:
+                    MultiprocessFilter.Processor.barrier.wait(timeout)
+                except BrokenBarrierError:
+                    pass
+
+        @staticmethod
+        def _process_mb() -> Optional[float]:
+            try:
+                with open('/proc/self/statm') as f:
+                    return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+            except (OSError, ValueError, IndexError):
+                return None
+
+        @staticmethod
+        def _free_mb() -> Optional[float]:
+            try:
+                with open('/proc/meminfo') as f:
+                    return next(int(line.split()[1])/2**10 for line in f if line.startswith('MemAvailable:'))
+            except (OSError, ValueError, IndexError, StopIteration):
+                return None
+
+        @staticmethod
+        def _is_alive(pid: int) -> bool:
+            if pid == 0: return False
+
+            try:
+                os.kill(pid, 0)
+                return True
+            except OSError:
+                return False
+
+        def __init__(self, filters: Sequence[Filter], n_proc:int, shared_min: Optional[int] = None, prefix: str = "coba") -> None:
+            self._filter     = Pipe.join(filters)
+            self._n_proc     = n_proc
+            self._shared_min = shared_min
+            self._prefix     = prefix
 
         def process(self, item) -> None:
 
@@ -40,10 +462,24 @@ class MultiprocessFilter(Filter[Iterable[Any], Iterable[Any]]):
             #aren't propogated to this logger. For example, with_stamp and with_name.
             #A possible solution is to deep copy the CobaConfig.Logger, set its `sink`
             #property to the `stdlog` and then pass it to `Processor.__init__`.
-            CobaConfig.Logger = IndentLogger(self._stdlog, with_name=self._n_proc > 1)
+            CobaConfig.Logger = IndentLogger(self.stdlog, with_name=self._n_proc > 1)
+
+            if self.cancelled.value: return
+
+            max_process_mb, min_free_mb, running = self.memory
+
+            if min_free_mb is not None: self._wait_for_memory(min_free_mb, running)
+
+            if running is not None:
+                with running.get_lock(): running.value += 1
 
             try:
-                self._stdout.write(self._filter.filter([item]))
+                items = takewhile(lambda _: not self.cancelled.value, self._filter.filter([item]))
+
+                if self._shared_min is not None:
+                    items = (SharedColumn.share(item, self._shared_min, self._prefix) for item in items)
+
+                self.stdout.write(items)
 
             except StopPipe:
                 pass
@@ -59,10 +495,59 @@ class MultiprocessFilter(Filter[Iterable[Any], Iterable[Any]]):
                 #handle the keyboard interrupt gracefully.
                 pass
 
-    def __init__(self, filters: Sequence[Filter], processes=1, maxtasksperchild=None) -> None:
+            finally:
+                if running is not None:
+                    with running.get_lock(): running.value -= 1
+
+            if max_process_mb is not None:
+                process_mb = self._process_mb()
+
+                if process_mb is not None and process_mb > max_process_mb:
+                    #our pool's workers check this after every item (see `WorkerLifetime`)
+                    MultiprocessFilter.Processor.retire = True
+                    CobaConfig.Logger.log(f"Replacing this process because it is using {process_mb:.0f} MB (the limit is {max_process_mb} MB).")
+
+        def _wait_for_memory(self, min_free_mb: float, running: Any) -> None:
+            logged = False
+
+            while not self.cancelled.value and running.value > 0:
+                free_mb = self._free_mb()
+
+                if free_mb is None or free_mb >= min_free_mb: break
+
+                if not logged:
+                    CobaConfig.Logger.log(f"Waiting for another process to finish because there is less than {min_free_mb} MB free.")
+                    logged = True
+                time.sleep(0.1)
+
+    def __init__(self, filters: Sequence[Filter], processes=1, maxtasksperchild=None, batch_size=100, shared_min=10000, executor: CobaExecutor = None, initializer: WorkerInitializer = None, imports: Sequence[str] = (), max_process_mb: float = None, min_free_mb: float = None) -> None:
+        """Instantiate a MultiprocessFilter.
+
+        Args:
+            filters: The filters that will be applied to each item in a background process.
+            processes: The number of background processes.
+            maxtasksperchild: The number of items a process will handle before it is replaced.
+            batch_size: The most output items (or log lines) a process will send to the main process at once.
+            shared_min: Output lists of ints or floats at least this long are sent through shared memory rather
+                than pickled. These lists are returned from the filter as `array.array`. None turns this off.
+            executor: A long lived executor whose processes will be used. When given `processes`, `maxtasksperchild`,
+                `batch_size`, `initializer` and the memory limits are ignored and the executor's values are used instead.
+            initializer: Prepares each process before it is given tasks (see `CobaExecutor` for more information).
+            imports: Modules that each process should import before it is given tasks (e.g., `Learner.imports`).
+            max_process_mb: A process whose resident memory is larger than this after an item is replaced.
+            min_free_mb: Processes wait to start an item while the machine has less memory available than this
+                (see `CobaExecutor` for more information).
+        """
         self._filters          = filters
-        self._processes        = processes
+        self._processes        = executor.processes if executor else processes
         self._maxtasksperchild = maxtasksperchild
+        self._batch_size       = batch_size
+        self._shared_min       = shared_min if shared_memory is not None else None
+        self._executor         = executor
+        self._initializer      = initializer
+        self._imports          = imports
+        self._max_process_mb   = max_process_mb
+        self._min_free_mb      = min_free_mb
 
     def filter(self, items: Iterable[Any]) -> Iterable[Any]:
 
@@ -70,114 +555,89 @@ class MultiprocessFilter(Filter[Iterable[Any], Iterable[Any]]):
             return items
 
         try:
-            with Manager() as manager:
-
-                stdout_queue = manager.Queue() #type: ignore
-                stdlog_queue = manager.Queue() #type: ignore
-
-                stdout_writer, stdout_reader = QueueSink(stdout_queue), QueueSource(stdout_queue)
-                stdlog_writer, stdlog_reader = QueueSink(stdlog_queue), QueueSource(stdlog_queue)
-
-                class MyPool(multiprocessing.pool.Pool):
-
-                    _missing_error_definition_error_is_new = True
-
-                    def _join_exited_workers(self):
-
-                        for worker in self._pool:
-                            if worker.exitcode == 1000 and MyPool._missing_error_definition_error_is_new:
-                                #this is a hack... This only works so long as we just 
-                                #process one job at a time... This is true in our case.
-                                #this is necessary because multiprocessing can get stuck 
-                                #waiting for failed workers and that is frustrating for users.
-
-                                MyPool._missing_error_definition_error_is_new = False
-
-                                message = (
-                                    "Coba attempted to evaluate your benchmark in multiple processes but the pickle module was unable to "
-                                    "find all the definitions needed to pass the tasks to the processes. The two most common causes of "
-                                    "this error are: 1) a learner or simulation is defined in a Jupyter Notebook cell or 2) a necessary "
-                                    "class definition exists inside the `__name__=='__main__'` code block in the main execution script. In "
-                                    "either case there are two simple solutions: 1) evalute your benchmark in a single processed with no "
-                                    "limit on child tasks or 2) define all you classes in a separate python file that is imported when "
-                                    "evaluating."                                    
-                                )
-
-                                CobaConfig.Logger.log(message)
-
-                            if worker.exitcode is not None and worker.exitcode != 0:
-                                #A worker exited in an uncontrolled manner and was unable to clean its job
-                                #up. We therefore mark one of the jobs as "finished" but failed to prevent an
-                                #infinite wait on a failed job to finish that is actually no longer running.
-                                list(self._cache.values())[0]._set(None, (False, None))
-
-                        return super()._join_exited_workers()
-
-                with MyPool(self._processes, maxtasksperchild=self._maxtasksperchild) as pool:
-
-                    # handle not picklable (this is handled by done_or_failed)
-                    # handle empty list (this is done by checking result.ready())
-                    # handle exceptions in process (unhandled exceptions can cause children to hang so we pass them to stderr)
-                    # handle ctrl-c without hanging 
-                    #   > don't call result.get when KeyboardInterrupt has been hit
-                    #   > handle EOFError,BrokenPipeError errors with queue since ctr-c kills manager
-                    # handle AttributeErrors. These occure when... (this is handled by shadowing several pool methods)
-                    #   > a class that is defined in a Jupyter Notebook cell is pickled
-                    #   > a class that is defined inside the __name__=='__main__' block is pickeled
-                    # handle Benchmark.evaluate not being called inside of __name__=='__main__' (this is handled by a big try/catch)
-
-                    def done_or_failed(results_or_exception=None):
-                        #This method is called one time at the completion of map_async
-                        #in the case that one of our jobs threw an exception the argument
-                        #will contain an exception otherwise it will be the returned results
-                        #of all the jobs. This method is executed on a thread in the Main context.
-
-                        if isinstance(results_or_exception, Exception):
-                            from coba.config import CobaConfig
-
-                            if "Can't pickle" in str(results_or_exception) or "Pickling" in str(results_or_exception):
-
-                                message = (
-                                    str(results_or_exception) + ". Coba attempted to process your Benchmark on multiple processes and "
-                                    "the named class was not able to be pickled. This problem can be fixed in one of two ways: 1) "
-                                    "evaluate the benchmark in question on a single process with no limit on the tasks per child or 2) "
-                                    "modify the named class to be picklable. The easiest way to make the given class picklable is to "
-                                    "add `def __reduce__ (self) return (<the class in question>, (<tuple of constructor arguments>))` to "
-                                    "the class. For more information see https://docs.python.org/3/library/pickle.html#object.__reduce__."
-                                )
-
-                                CobaConfig.Logger.log(message)
-                            else:
-                                CobaConfig.Logger.log_exception(results_or_exception)
-
-                        stdout_writer.write([None])
-                        stdlog_writer.write([None])
-
-                    log_thread = Thread(target=Pipe.join(stdlog_reader, [], CobaConfig.Logger.sink).run)
-                    log_thread.daemon = True
-                    log_thread.start()
-
-                    processor = MultiprocessFilter.Processor(self._filters, stdout_writer, stdlog_writer, self._processes)
-                    result    = pool.map_async(processor.process, items, callback=done_or_failed, error_callback=done_or_failed, chunksize=1)
-
-                    # When items is empty finished_callback will not be called and we'll get stuck waiting for the poison pill.
-                    # When items is empty ready() will be true immediately and this check will place the poison pill into the queues.
-                    if result.ready(): done_or_failed()
-
-                    try:
-                        for item in stdout_reader.read():
-                            yield item
-                        pool.close()
-                    except (KeyboardInterrupt, Exception):
-                        try:
-                            pool.terminate()
-                        except:
-                            pass
-                        raise
-                    finally:
-                        pool.join()
-                        log_thread.join()
+            executor = self._executor or CobaExecutor(self._processes, self._maxtasksperchild, self._batch_size, self._initializer, self._max_process_mb, self._min_free_mb)
+
+            pool, stdout_queue, stdlog_queue = executor.start(self._imports)
+
+            stdout_reader = QueueSource(stdout_queue, batched=True)
+            stdlog_reader = QueueSource(stdlog_queue, batched=True)
+
+            # handle not picklable (this is handled by done_or_failed)
+            # handle empty list (this is done by checking result.ready())
+            # handle exceptions in process (unhandled exceptions can cause children to hang so we pass them to stderr)
+            # handle ctrl-c without hanging 
+            #   > don't call result.get when KeyboardInterrupt has been hit
+            #   > don't wait on the log thread since no poison pill will be put on its queue
+            #   > terminate the executor since its queues may have been left with partial output 
+            # handle the caller closing our generator early (this is done by cancelling and draining the outputs)
+            # handle AttributeErrors. These occure when... (this is handled by shadowing several pool methods)
+            #   > a class that is defined in a Jupyter Notebook cell is pickled
+            #   > a class that is defined inside the __name__=='__main__' block is pickeled
+            # handle Benchmark.evaluate not being called inside of __name__=='__main__' (this is handled by a big try/catch)
+
+            def done_or_failed(results_or_exception=None):
+                #This method is called one time at the completion of map_async
+                #in the case that one of our jobs threw an exception the argument
+                #will contain an exception otherwise it will be the returned results
+                #of all the jobs. This method is executed on a thread in the Main context.
+
+                if isinstance(results_or_exception, Exception):
+                    from coba.config import CobaConfig
+
+                    if "Can't pickle" in str(results_or_exception) or "Pickling" in str(results_or_exception):
+
+                        message = (
+                            str(results_or_exception) + ". Coba attempted to process your Benchmark on multiple processes and "
+                            "the named class was not able to be pickled. This problem can be fixed in one of two ways: 1) "
+                            "evaluate the benchmark in question on a single process with no limit on the tasks per child or 2) "
+                            "modify the named class to be picklable. The easiest way to make the given class picklable is to "
+                            "add `def __reduce__ (self) return (<the class in question>, (<tuple of constructor arguments>))` to "
+                            "the class. For more information see https://docs.python.org/3/library/pickle.html#object.__reduce__."
+                        )
+
+                        CobaConfig.Logger.log(message)
+                    else:
+                        CobaConfig.Logger.log_exception(results_or_exception)
+
+                stdout_queue.put(None)
+                stdlog_queue.put(None)
+
+            log_thread = Thread(target=Pipe.join(stdlog_reader, [], CobaConfig.Logger.sink).run)
+            log_thread.daemon = True
+            log_thread.start()
+
+            #every block of shared memory made for this call starts with prefix so any left behind can be removed
+            prefix    = f"coba_{uuid.uuid4().hex[:8]}"
+            processor = MultiprocessFilter.Processor(self._filters, self._processes, self._shared_min, prefix)
+            result    = pool.map_async(processor.process, items, callback=done_or_failed, error_callback=done_or_failed, chunksize=1)
+
+            # When items is empty finished_callback will not be called and we'll get stuck waiting for the poison pill.
+            # When items is empty ready() will be true immediately and this check will place the poison pill into the queues.
+            if result.ready(): done_or_failed()
+
+            outputs = stdout_reader.read()
+
+            try:
+                for item in outputs:
+                    yield SharedColumn.take(item) if self._shared_min is not None else item
+                log_thread.join()
+            except KeyboardInterrupt:
+                executor.terminate()
+                raise
+            except (GeneratorExit, Exception):
+                #We were stopped early so we skip the remaining items and wait for the processes to become
+                #idle. This leaves the executor usable and releases any output that is left in shared memory.
+                try:
+                    executor.cancel()
+                    for item in outputs: SharedColumn.take(item)
+                    log_thread.join()
+                except BaseException:
+                    executor.terminate()
+                raise
+            finally:
+                if executor is not self._executor: executor.close()
+                if self._shared_min is not None: SharedColumn.sweep(prefix)
 
         except RuntimeError as e:
             #This happens when importing main causes this code to run again
-            raise CobaFatal(str(e))
\ No newline at end of file
+            raise CobaFatal(str(e))
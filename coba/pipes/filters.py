@@ -8,9 +8,10 @@ import collections
 import itertools
 import json
 
+from array import array
 from itertools import islice, count
 from collections import defaultdict
-from typing import Iterable, Any, Sequence, Union, Tuple, List, Dict
+from typing import Iterable, Any, Sequence, Union, Tuple, List, Dict, Optional
 
 from requests import Response
 
@@ -80,7 +81,7 @@ class JsonEncode(Filter[Any, str]):
         if isinstance(obj,float) and obj.is_integer():
             return int(obj)
 
-        if isinstance(obj,tuple):
+        if isinstance(obj,(tuple,array)):
             obj = list(obj)
 
         if isinstance(obj,list):
@@ -101,8 +102,64 @@ class JsonEncode(Filter[Any, str]):
         else:
             self._encoder = CobaJsonEncoder()
 
+    def _encode_numbers(self, values: Sequence[Any]) -> Optional[str]:
+        #This writes a homogeneous list of numbers in bulk. It produces the same string as _intify
+        #and json would. Lists it can't write in this way are left to the general path by returning None.
+
+        #an array's items all have the type of its typecode so we don't need to look at each of them
+        types = {float} if isinstance(values, array) and values.typecode in 'fd' and values else set(map(type, values))
+
+        if types == {int}:
+            return "[" + ",".join(map(str, values)) + "]"
+
+        if not types or not types <= {int,float} or not max(map(abs,values)) < 1e16:
+            #floats >= 1e16 are written by repr in exponent notation so we can't trim them below
+            return None
+
+        #repr writes whole floats as "N.0" so trimming ".0" gives what _intify would
+        #have given. We append "," to the end so every number is followed by ",".
+        numbers = ",".join(map(repr, values)) + ","
+        numbers = numbers.replace(".0,", ",").replace("-0,", "0,")
+
+        if "n" in numbers:
+            numbers = numbers.replace("nan", "NaN")
+
+        return "[" + numbers[:-1] + "]"
+
+    def _encode_interactions(self, item: Any) -> Optional[str]:
+
+        if not isinstance(item[2], dict) or not all(isinstance(k,str) for k in item[2]):
+            return None
+
+        packed = item[2]["_packed"]
+
+        if not isinstance(packed, dict) or not all(isinstance(k,str) for k in packed):
+            return None
+
+        encode  = self._encoder.encode
+        columns = []
+
+        for key, values in packed.items():
+            column = self._encode_numbers(values) if isinstance(values, (list,tuple,array)) else None
+            columns.append(encode(key) + ":" + (column or encode(self._intify(values))))
+
+        values = []
+
+        for key, value in item[2].items():
+            value = "{" + ",".join(columns) + "}" if key == "_packed" else encode(self._intify(value))
+            values.append(encode(key) + ":" + value)
+
+        return "[" + encode(item[0]) + "," + encode(self._intify(item[1])) + ",{" + ",".join(values) + "}]"
+
     def filter(self, item: Any) -> str:
         if self._minify:
+
+            #Interaction transactions can have packed columns with millions of numbers
+            #so we write them in bulk rather than visiting every number with _intify
+            if isinstance(item, list) and len(item) == 3 and item[0] == "I" and isinstance(item[2], dict) and "_packed" in item[2]:
+                encoded = self._encode_interactions(item)
+                if encoded is not None: return encoded
+
             #JsonEncoder writes floats with .0 regardless of if they are integers
             #Therefore we preprocess and turn all float whole numbers into integers
             return self._encoder.encode(self._intify(item))
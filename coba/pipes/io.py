@@ -1,6 +1,17 @@
-from typing import Iterable, TypeVar, List, Any
+import io
+import os
+import bz2
+import gzip
+import lzma
+import time
+import uuid
+
+from itertools import islice
+from threading import Thread, Event, RLock, Condition
+from typing import Iterable, TypeVar, List, Any, Optional, IO, Dict, Callable
 
 import requests
+import requests.adapters
 
 from coba.pipes.core import Sink, Source
 
@@ -15,14 +26,210 @@ class ConsoleSink(Sink[Iterable[_T_in]]):
     def write(self, items: Iterable[_T_in]) -> None:
         for item in items: print(item)
 
+_compressions = { '.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.lzma': 'xz' }
+
+def _compression(filename: str, compression: Optional[str]) -> Optional[str]:
+    """Determine the compression of a file from the given compression or, when None, its extension."""
+
+    if compression is None:
+        return _compressions.get(os.path.splitext(filename)[1].lower())
+
+    if compression not in ['none', 'gzip', 'bz2', 'xz']:
+        raise ValueError(f"The compression {compression} isn't recognized. Allowed values are 'none', 'gzip', 'bz2' and 'xz'.")
+
+    return None if compression == 'none' else compression
+
+def _open_lines(filename: str, mode: str, compression: Optional[str], buffering: int = -1) -> IO[str]:
+    """Open a file to read or write lines of text, transparently (de)compressing as needed."""
+
+    if compression is None:
+        return open(filename, mode, buffering=buffering)
+
+    #the compression modules don't support '+' in their modes
+    mode = mode.replace('+','').replace('t','') + 't'
+
+    if compression == 'gzip': return gzip.open(filename, mode)
+    if compression == 'bz2' : return bz2.open(filename, mode)
+
+    return lzma.open(filename, mode)
+
 class DiskSink(Sink[Iterable[str]]):
-    def __init__(self, filename:str, mode:str='a+'):
+    def __init__(self, 
+        filename     : str, 
+        mode         : str   = 'a+', 
+        flush_items  : int   = None, 
+        flush_seconds: float = None, 
+        buffer_size  : int   = 2**20, 
+        compression  : str   = None):
+        """Instantiate a DiskSink.
+
+        Args:
+            filename: The path of the file to write lines to.
+            mode: The mode to open the file with.
+            flush_items: Keep the file open between writes and flush after this many buffered items.
+            flush_seconds: Keep the file open between writes and flush once this many seconds have passed.
+            buffer_size: The size of the file's write buffer when the file is kept open between writes.
+            compression: One of 'none', 'gzip', 'bz2' or 'xz'. When None this is determined by the file's 
+                extension (i.e., '.gz', '.bz2', '.xz' or '.lzma').
+
+        Remarks:
+            When neither flush_items nor flush_seconds is given the file is opened and closed on every
+            call to write. Otherwise the file stays open until `close` is called and buffered items are
+            also flushed at the end of every call to write (i.e., on chunk boundaries). When flush_seconds
+            is given a background thread also flushes buffered items that are older than flush_seconds so
+            items are written even while a long running write is waiting for its next item. Flushed items are
+            always written as whole lines and, before appending, any partial line left at the end of the
+            file (e.g., by a crash in the middle of a write) is removed. This keeps the file resumable.
+            
+            Compressed files are written as a sequence of complete compressed streams (one per flush). 
+            Every supported compression reads such files back as if they were a single stream.
+        """
+
         self.filename = filename
         self._mode    = mode
 
+        self._flush_items   = flush_items
+        self._flush_seconds = flush_seconds
+        self._buffer_size   = buffer_size
+        self._persistent    = flush_items is not None or flush_seconds is not None
+        self._compression   = _compression(filename, compression)
+
+        self._file       : Optional[IO[str]] = None
+        self._buffer     : List[str]         = []
+        self._last_flush : float             = 0
+        self._repaired   : bool              = False
+
+        #these are created when the file is opened so that unopened sinks can still be pickled
+        self._lock    : Optional[RLock]  = None
+        self._closed  : Optional[Event]  = None
+
     def write(self, items: Iterable[str]) -> None:
-        with open(self.filename, self._mode) as f:
-            for item in items: f.write(item + '\n')
+
+        if not self._persistent:
+            with self._open() as f:
+                for item in items: f.write(item + '\n')
+            return
+
+        if self._file is None:
+            self._lock       = RLock()
+            self._closed     = Event()
+            self._file       = self._open(self._buffer_size)
+            self._last_flush = time.time()
+
+            if self._flush_seconds:
+                Thread(target=self._flush_periodically, args=(self._closed,), daemon=True).start()
+
+        for item in items:
+            with self._lock:
+                self._buffer.append(item + '\n')
+
+                if self._flush_items is not None and len(self._buffer) >= self._flush_items:
+                    self.flush()
+
+                elif self._flush_seconds is not None and time.time() - self._last_flush >= self._flush_seconds:
+                    self.flush()
+
+        self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered items to disk as whole lines."""
+
+        if self._file is None:
+            self._buffer.clear()
+            return
+
+        with self._lock:
+            if self._buffer: self._file.write(''.join(self._buffer))
+
+            if self._compression is None:
+                self._file.flush()
+
+            elif self._buffer:
+                #a compressed stream isn't readable on disk until it is ended so
+                #we end the current stream and append any future items in a new one
+                self._file.close()
+                self._file = _open_lines(self.filename, self._mode.replace('w','a'), self._compression)
+
+            self._buffer.clear()
+            self._last_flush = time.time()
+
+    def close(self) -> None:
+        """Flush any buffered items and close the file if it is being kept open between writes."""
+
+        if self._file is not None:
+            with self._lock:
+                self.flush()
+                self._closed.set()
+                self._file.close()
+                self._file = None
+
+    def _flush_periodically(self, closed: Event) -> None:
+        #writes wait on their next item indefinitely (e.g., while a chunk is evaluated)
+        #so we also check the age of buffered items in the background and flush them
+
+        while not closed.wait(self._flush_seconds/2):
+            with self._lock:
+                if not closed.is_set() and self._buffer and time.time() - self._last_flush >= self._flush_seconds:
+                    self.flush()
+
+    def _open(self, buffering: int = -1) -> IO[str]:
+
+        if self._repaired or 'a' not in self._mode or not os.path.isfile(self.filename):
+            return _open_lines(self.filename, self._mode, self._compression, buffering)
+
+        #this sink only ever writes whole lines so we only need to check once
+        self._repaired = True
+
+        if self._compression is not None:
+            self._remove_partial_compressed_line()
+            return _open_lines(self.filename, self._mode, self._compression, buffering)
+
+        #we remove the partial line using the handle we'll write with rather than opening the file twice
+        f = open(self.filename, 'a+b', buffering=buffering)
+
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+
+        while pos > 0:
+            size = min(pos, 4096)
+            f.seek(pos-size)
+            block = f.read(size)
+
+            if pos == end and block.endswith(b'\n'):
+                break
+
+            newline = block.rfind(b'\n')
+
+            if newline != -1:
+                f.truncate(pos-size+newline+1)
+                break
+
+            pos -= size
+        else:
+            f.truncate(0)
+
+        return io.TextIOWrapper(f)
+
+    def _remove_partial_compressed_line(self) -> None:
+
+        #we can't truncate a compressed file so we check if it
+        #ends cleanly and if it doesn't we rewrite its whole lines
+
+        is_clean = True
+
+        try:
+            with _open_lines(self.filename, 'r', self._compression) as f:
+                for line in f: is_clean = line.endswith('\n')
+        except (EOFError, OSError):
+            is_clean = False
+
+        if not is_clean:
+            repaired = self.filename + ".repair"
+
+            with _open_lines(repaired, 'w', self._compression) as f:
+                f.writelines(line for line in DiskSource(self.filename, self._compression).read() if line.endswith('\n'))
+
+            os.replace(repaired, self.filename)
 
 class MemorySink(Sink[_T_in]):
     def __init__(self):
@@ -36,23 +243,103 @@ class MemorySink(Sink[_T_in]):
             self.items.append(items)
 
 class QueueSink(Sink[Iterable[Any]]):
-    def __init__(self, sink: Any) -> None:
-        self._queue = sink
+    def __init__(self, sink: Any, batch_size: int = None, max_seconds: float = None) -> None:
+        """Instantiate a QueueSink.
+
+        Args:
+            sink: The queue that items will be put on.
+            batch_size: When given items are put on the queue as lists of at most this many items. Batching 
+                means fewer round trips between processes but a QueueSource reading it must be `batched`.
+            max_seconds: When given with `batch_size` a batch is put on the queue after at most this many seconds
+                even if it isn't full. This keeps items from waiting on slow items that come after them.
+        """
+        self._queue       = sink
+        self._batch_size  = batch_size
+        self._max_seconds = max_seconds
 
     def write(self, items:Iterable[Any]) -> None:
         try:
-            for item in items: self._queue.put(item)
+            if self._batch_size is None:
+                for item in items: self._queue.put(item)
+            elif self._max_seconds is None:
+                items = iter(items)
+                for batch in iter(lambda: list(islice(items, self._batch_size)), []): self._queue.put(batch)
+            else:
+                self._write_timed(items)
         except (EOFError,BrokenPipeError):
             pass
 
+    def _write_timed(self, items:Iterable[Any]) -> None:
+
+        batch: List[Any] = []
+        state = {"started": 0.0, "done": False}
+        ready = Condition()
+
+        def flush() -> None:
+            with ready:
+                if batch: self._queue.put(batch.copy())
+                batch.clear()
+
+        def flush_on_time() -> None:
+            #the items we are given may stall (e.g., a slow learner) so a thread puts a batch that has waited too long
+            try:
+                with ready:
+                    while not state["done"]:
+                        waited = time.time()-state["started"]
+                        if batch and waited >= self._max_seconds: flush()
+                        ready.wait(self._max_seconds-waited if batch else None)
+            except (EOFError,BrokenPipeError):
+                pass
+
+        flusher = Thread(target=flush_on_time, daemon=True)
+        flusher.start()
+
+        try:
+            for item in items:
+                with ready:
+                    batch.append(item)
+                    if len(batch) == 1: state["started"] = time.time(); ready.notify()
+                    if len(batch) >= self._batch_size: flush()
+        finally:
+            with ready:
+                state["done"] = True
+                ready.notify()
+            flusher.join()
+            flush()
+
 class DiskSource(Source[Iterable[str]]):
-    def __init__(self, filename:str):
-        self.filename = filename
+    def __init__(self, filename:str, compression: str = None):
+        """Instantiate a DiskSource.
+
+        Args:
+            filename: The path of the file to read lines from.
+            compression: One of 'none', 'gzip', 'bz2' or 'xz'. When None this is determined by the file's 
+                extension (i.e., '.gz', '.bz2', '.xz' or '.lzma').
+
+        Remarks:
+            Compressed files are decompressed while streaming so they are never fully held in memory.
+            If a compressed file ends unexpectedly (e.g., a crash while writing) only its whole lines are read.
+        """
+
+        self.filename     = filename
+        self._compression = _compression(filename, compression)
 
     def read(self) -> Iterable[str]:
-        with open(self.filename, "r+") as f:
-            for line in f:
-                yield line
+
+        if self._compression is None:
+            with open(self.filename, "r+") as f:
+                for line in f:
+                    yield line
+            return
+
+        with _open_lines(self.filename, "r", self._compression) as f:
+            try:
+                for line in f:
+                    yield line
+            except EOFError:
+                #the compressed stream ended early (e.g., a crash while writing). When this
+                #happens the partial line is never decoded so we have only read whole lines.
+                pass
 
 class MemorySource(Source[_T_out]):
     def __init__(self, item: _T_out, __repr__: str = None): #type:ignore
@@ -65,9 +352,18 @@ class MemorySource(Source[_T_out]):
         return repr(self._item)
 
 class QueueSource(Source[Iterable[Any]]):
-    def __init__(self, source: Any, poison=None) -> None:
-        self._queue  = source
-        self._poison = poison
+    def __init__(self, source: Any, poison=None, batched: bool = False) -> None:
+        """Instantiate a QueueSource.
+
+        Args:
+            source: The queue that items will be read from.
+            poison: The item that indicates no more items will be put on the queue.
+            batched: Indicates items were put on the queue in lists by a batched QueueSink. The poison 
+                should still be put on the queue on its own rather than in a list.
+        """
+        self._queue   = source
+        self._poison  = poison
+        self._batched = batched
 
     def read(self) -> Iterable[Any]:
         try:
@@ -77,13 +373,159 @@ class QueueSource(Source[Iterable[Any]]):
                 if item == self._poison:
                     return
 
-                yield item
+                if self._batched:
+                    yield from item
+                else:
+                    yield item
         except (EOFError,BrokenPipeError):
             pass
 
+_sessions: Dict[int, requests.Session] = {}
+
+def _session() -> requests.Session:
+    """Get the pooled session shared by every HttpSource in this process."""
+
+    #sessions aren't safe to share across forked processes so we keep one per process
+    pid = os.getpid()
+
+    if pid not in _sessions:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _sessions[pid] = session
+
+    return _sessions[pid]
+
 class HttpSource(Source[requests.Response]):
-    def __init__(self, url: str) -> None:
-        self._url = url
+    def __init__(self, 
+        url       : str, 
+        retries   : int   = 3, 
+        backoff   : float = 1, 
+        chunk_size: int   = 2**20, 
+        retry_if  : Callable[[requests.Response], bool] = None,
+        partial   : str   = None) -> None:
+        """Instantiate an HttpSource.
+
+        Args:
+            url: The url to request.
+            retries: How many times a failed request is retried before giving up.
+            backoff: The seconds to wait before the first retry. The wait doubles with each retry.
+            chunk_size: The size of the chunks the response body is streamed in.
+            retry_if: An optional check for responses that should be retried even though they succeeded
+                (e.g., a server that reports it is under high load in the body of its response).
+            partial: An optional file path where a download that fails every retry is kept so that the next read
+                (e.g., the next time a benchmark is run) resumes from it. While downloading the body is written to a
+                file of its own next to this path so reads of the same url at once (e.g., in processes) never share
+                a file. A kept download is only resumed by one read.
+
+        Remarks:
+            Requests are made with a pooled session shared by every HttpSource in the process. A request
+            is retried if the connection fails, the status is 5xx or `retry_if` is true. If the connection
+            drops while the body is being streamed the download is resumed with a Range request when the
+            server allows it. The returned response always has its full body loaded. When `partial` is given
+            bodies are requested without compression because byte ranges refer to the compressed body.
+        """
+
+        self._url        = url
+        self._retries    = retries
+        self._backoff    = backoff
+        self._chunk_size = chunk_size
+        self._retry_if   = retry_if
+        self._partial    = partial
 
     def read(self) -> requests.Response:
-        return requests.get(self._url)
\ No newline at end of file
+
+        #each read downloads to its own file so that reads of the same url at once never write to the same file
+        download = f"{self._partial}.{uuid.uuid4().hex}" if self._partial else None
+        size     = self._claim_partial(download)
+        buffer   = io.BytesIO()
+        attempt  = 0
+
+        try:
+            while True:
+
+                #if we have part of the body from an earlier attempt we try to only request the rest of it
+                headers  = {'Range': f'bytes={size}-'} if size else {}
+                response = None
+
+                if self._partial: headers['Accept-Encoding'] = 'identity'
+
+                try:
+                    response = _session().get(self._url, headers=headers, stream=True)
+
+                    if size and response.status_code != 206:
+                        #the server ignored our range request so we start over
+                        size, buffer = 0, io.BytesIO()
+
+                    #we only keep the partial body of a successful response
+                    is_kept = download and response.status_code in [200,206]
+
+                    if is_kept:
+                        with open(download, 'ab' if size else 'wb') as f:
+                            for chunk in response.iter_content(self._chunk_size): f.write(chunk)
+
+                        #the body is read back from its file so that it is only held in memory once
+                        with open(download, 'rb') as f:
+                            response._content = f.read() #type: ignore
+                    else:
+                        #a response that isn't kept (e.g., a 5xx) never changes what is in the download file
+                        if download: buffer = io.BytesIO()
+
+                        for chunk in response.iter_content(self._chunk_size): buffer.write(chunk)
+
+                        response._content = buffer.getvalue() #type: ignore
+
+                    size, buffer = 0, io.BytesIO()
+
+                    if is_kept: _remove(download)
+
+                    if attempt < self._retries and (response.status_code >= 500 or (self._retry_if and self._retry_if(response))):
+                        raise requests.exceptions.RetryError(f"{self._url} responded with {response.status_code}.")
+
+                    if response.status_code == 206:
+                        response.status_code = 200
+
+                    return response
+
+                except requests.exceptions.RequestException:
+
+                    if attempt >= self._retries: raise
+
+                    is_encoded = response is not None and response.headers.get('Content-Encoding','identity') != 'identity'
+                    is_ranged  = response is not None and response.headers.get('Accept-Ranges','none') == 'bytes'
+
+                    #the download file (when given) has everything we've downloaded so far
+                    size = (os.path.getsize(download) if os.path.isfile(download) else 0) if download else buffer.tell()
+
+                    #byte ranges refer to the encoded body so we can't resume an encoded body that we've decoded
+                    if is_encoded or not is_ranged: size, buffer = 0, io.BytesIO()
+
+                    time.sleep(self._backoff * 2**attempt)
+                    attempt += 1
+
+                finally:
+                    if response is not None: response.close()
+
+        except BaseException:
+            #we give up so what we downloaded is put back where the next read (e.g., by another process) will claim it
+            if download and os.path.isfile(download): os.replace(download, self._partial)
+            raise
+
+    def _claim_partial(self, download: Optional[str]) -> int:
+
+        if not download: return 0
+
+        try:
+            #moving a file is atomic so when several reads try to claim the same partial download only one will
+            os.replace(self._partial, download)
+        except FileNotFoundError:
+            return 0
+
+        return os.path.getsize(download)
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
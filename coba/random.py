@@ -15,11 +15,31 @@ import math
 import random as std_random
 import itertools
 
-from typing import Optional, Sequence, Any, List
+from typing import Optional, Sequence, Any, List, Tuple
+
+def _numpy() -> Any:
+    """Import numpy the first time it is needed or return None if it isn't installed."""
+
+    global np
+
+    if np is False:
+        try:
+            import numpy as np #type: ignore
+        except ImportError: #pragma: no cover
+            #numpy is only used to generate many numbers at once. Without it we generate them one at a time.
+            np = None
+
+    return np
+
+#numpy is imported lazily so that importing coba doesn't pay the cost of importing numpy
+np: Any = False
 
 class CobaRandom:
     """A random number generator via a linear congruential generator."""
 
+    #requests for at least this many numbers are generated with numpy (when it is installed)
+    _vector_min = 512
+
     def __init__(self, seed: Optional[int] = None) -> None:
         """Instantiate a Random class.
 
@@ -56,6 +76,9 @@ class CobaRandom:
             The `n` generated random numbers in [0,1].
         """
 
+        if self._use_numpy(n):
+            return (self._next_array(n)/self._m_minus_1).tolist()
+
         return [number/self._m_minus_1 for number in self._next(n)]
 
     def shuffle(self, sequence: Sequence[Any]) -> Sequence[Any]:
@@ -73,14 +96,19 @@ class CobaRandom:
         """
 
         n = len(sequence)
-        r = self.randoms(n)
         l = list(sequence)
 
-        for i in range(0,n-1):
+        if self._use_numpy(n):
+            #the swaps depend on each other but where each item is swapped to doesn't so we find those at once
+            i = np.arange(n-1)
+            r = self._next_array(n)[:n-1]/self._m_minus_1
+            J = np.minimum((i + (r * (n-i))).astype(np.int64), n-1).tolist()
+        else:
+            r = self.randoms(n)
+            J = [ min(int(i + (r[i] * (n-i))), n-1) for i in range(0,n-1) ]
 
-            j = int(i + (r[i] * (n-i))) # i <= j <= n
-            j = min(j, n-1)             # i <= j <= n-1 (min handles the edge case of r[i]==1 which would make j=n)
-            
+        for i, j in enumerate(J):
+            #i <= j <= n-1 (min handles the edge case of r[i]==1 which would make j=n)
             l[i], l[j] = l[j], l[i]
 
         return l
@@ -118,6 +146,107 @@ class CobaRandom:
 
             return seq[[ rng <= c for c in cdf].index(True)]
 
+    def skip(self, n: int) -> None:
+        """Skip the next `n` random numbers without generating them.
+
+        Args:
+            n: How many random numbers to skip. A negative `n` goes back to numbers that were already generated.
+
+        Remarks:
+            This takes O(log n) time. It gives the same state as generating `n` numbers and throwing them away.
+        """
+
+        a, c = self._jump(n)
+        self._seed = (a * self._seed + c) % self._m
+
+    def spawn(self, k: int) -> Sequence['CobaRandom']:
+        """Split the numbers this generator would generate next into `k` generators.
+
+        Args:
+            k: How many generators to split this generator into.
+
+        Returns:
+            The `k` generators. The i-th generator generates the i-th, (i+k)-th, (i+2k)-th, ... number that
+            this generator would have generated next. No two of them ever generate the same part of the sequence.
+
+        Remarks:
+            This takes O(k + log k) time. The spawned generators can be used in parallel (e.g., in processes) and
+            together still generate exactly the numbers of a single seed. This generator is left as it was so it
+            should not be used to generate more numbers while the spawned generators are in use.
+        """
+
+        if k <= 0 or not isinstance(k, int):
+            raise ValueError("k must be an integer greater than 0")
+
+        a, c = self._jump(k)
+
+        #each generator starts k-1 numbers before its first number so that one step of size k reaches it
+        start = CobaRandom(self._seed)
+        start._a, start._c = self._a, self._c
+        start.skip(1-k)
+
+        spawned: List[CobaRandom] = []
+
+        for _ in range(k):
+            generator = CobaRandom(start._seed)
+            generator._a, generator._c = a, c
+            spawned.append(generator)
+            start.skip(1)
+
+        return spawned
+
+    def _jump(self, n: int) -> Tuple[int,int]:
+        """Find the multiplier and increment that advance the generator `n` numbers in one step.
+
+        Remarks:
+            Advancing n numbers is the affine map x -> a^n*x + c*(a^(n-1)+...+a+1) (mod m). We build it by
+            repeated squaring in O(log n) steps. The generator has a period of m so negative `n` are taken mod m.
+        """
+
+        m    = self._m
+        n    = n % m
+        a, c = self._a, self._c
+        A, C = 1, 0
+
+        while n:
+            if n & 1: A, C = (a*A) % m, (a*C + c) % m
+            a, c = (a*a) % m, (a*c + c) % m
+            n >>= 1
+
+        return A, C
+
+    def _use_numpy(self, n: int) -> bool:
+        #products of two numbers less than m must fit in an int64 for numpy to generate exactly the same numbers
+        return n >= self._vector_min and self._m <= 2**31 and _numpy() is not None
+
+    def _next_array(self, n: int) -> 'np.ndarray':
+        """Generate `n` uniform random numbers in [0,m-1] as a numpy array.
+
+        Remarks:
+            After the first number we double the numbers we have by jumping each of them ahead by how many we
+            have. This generates exactly the numbers of `_next` but in O(log n) vectorized steps.
+        """
+
+        numbers    = np.empty(n, dtype=np.int64)
+        numbers[0] = (self._a * self._seed + self._c) % self._m
+
+        size = 1
+
+        while size < n:
+            a, c = self._jump(size)
+            end  = min(2*size, n)
+            step = numbers[size:end]
+
+            np.multiply(numbers[:end-size], a, out=step)
+            np.add(step, c, out=step)
+            np.remainder(step, self._m, out=step)
+
+            size = end
+
+        self._seed = int(numbers[-1])
+
+        return numbers
+
     def _next(self, n: int) -> Sequence[int]:
         """Generate `n` uniform random numbers in [0,m-1]
 
@@ -133,16 +262,22 @@ class CobaRandom:
         if n <= 0 or not isinstance(n, int):
             raise ValueError("n must be an integer greater than 0")
 
-        numbers: List[int] = []
+        if self._use_numpy(n):
+            return self._next_array(n).tolist()
 
-        for _ in range(n):
+        a, c, seed = self._a, self._c, self._seed
+        numbers    = [0]*n
 
-            if self._m_is_power_of_2:
-                self._seed = int((self._a * self._seed + self._c) & (self._m_minus_1))
-            else:
-                self._seed = int((self._a * self._seed + self._c) % self._m)
+        if self._m_is_power_of_2:
+            mask = self._m_minus_1
+            for i in range(n):
+                numbers[i] = seed = (a * seed + c) & mask
+        else:
+            m = self._m
+            for i in range(n):
+                numbers[i] = seed = (a * seed + c) % m
 
-            numbers.append(self._seed)
+        self._seed = seed
 
         return numbers
 
@@ -2,7 +2,7 @@ import collections
 
 from abc import abstractmethod
 from itertools import repeat, chain
-from typing import Optional, Sequence, List, Callable, Hashable, Any, Union, Iterable, cast
+from typing import Optional, Sequence, List, Callable, Hashable, Any, Union, Iterable, Iterator, Dict, Tuple, cast
 
 from coba.random import CobaRandom
 
@@ -146,13 +146,9 @@ class ClassificationSimulation(Simulation):
         else:
             labels_flat = labels #type: ignore
 
-        feedback      = lambda action,label: int(is_label(action,label) or in_multilabel(action,label)) #type: ignore
-        is_label      = lambda action,label: action == label #type: ignore
-        in_multilabel = lambda action,label: isinstance(label,collections.Sequence) and action in label #type: ignore
-
         contexts  = features 
-        actions   = list(sorted(set(labels_flat), key=lambda l: labels_flat.index(l)))
-        feedbacks = [ [ feedback(action,label) for action in actions ] for label in labels ]
+        actions   = list(dict.fromkeys(labels_flat))
+        feedbacks = [ ClassificationSimulation._feedbacks(actions, label) for label in labels ]
 
         self._interactions = list(map(Interaction, contexts, repeat(actions), feedbacks))
 
@@ -161,6 +157,11 @@ class ClassificationSimulation(Simulation):
         
         return self._interactions
 
+    @staticmethod
+    def _feedbacks(actions: Sequence[Action], label: Any) -> List[int]:
+        in_multilabel = isinstance(label,collections.Sequence) and not isinstance(label,str)
+        return [ int(action == label or (in_multilabel and action in label)) for action in actions ]
+
 class LambdaSimulation(Simulation):
     """A Simulation created from lambda functions that generate contexts, actions and rewards.
 
@@ -237,7 +238,19 @@ class ReaderSimulation(Simulation):
         reader      : Filter[Iterable[str], Any], 
         source      : Union[str,Source[Iterable[str]]], 
         label_column: Union[str,int], 
-        with_header : bool=True) -> None:
+        with_header : bool=True,
+        streaming   : bool=False) -> None:
+        """Instantiate a ReaderSimulation.
+
+        Args:
+            reader: The filter used to parse the lines of the source into rows.
+            source: A file path, url or source providing the lines of the data set.
+            label_column: The header name or index of the column containing labels.
+            with_header: Indicates if the first row parsed from the source is a header.
+            streaming: Indicates if the source should be read twice row by row (once to find the labels
+                and once to create interactions) instead of being loaded and transposed in memory. The
+                interactions are identical either way but when streaming they are created lazily.
+        """
         
         self._reader = reader
 
@@ -250,11 +263,80 @@ class ReaderSimulation(Simulation):
         
         self._label_column = label_column
         self._with_header  = with_header
+        self._streaming    = streaming
         self._interactions = cast(Optional[Sequence[Interaction]], None)
 
     def read(self) -> Iterable[Interaction]:
         """Read the interactions in this simulation."""
-        return self._load_interactions()
+        return self._stream_interactions() if self._streaming else self._load_interactions()
+
+    def _label_index(self, header: Sequence[str]) -> int:
+        return header.index(self._label_column) if isinstance(self._label_column, str) else self._label_column
+
+    def _stream_interactions(self) -> Iterable[Interaction]:
+
+        rows, label_col_index = self._parsed_rows()
+
+        #The first pass only keeps the distinct labels (i.e., the actions) and, for sparse rows, the width of 
+        #each column (i.e., how many features a column becomes when it is flattened). Interactions are then 
+        #made one row at a time in the second pass so that rows never need to be held in memory.
+        actions: Dict[Any,None] = {}
+        widths : Dict[int,int]  = {}
+
+        is_sequence = lambda value: isinstance(value,collections.Sequence) and not isinstance(value,str)
+
+        for row in rows:
+            label = self._split_row(row, label_col_index)[1]
+            actions.update(dict.fromkeys(label if is_sequence(label) else [label]))
+
+            if self._is_sparse(row):
+                for index, value in zip(*row):
+                    if index != label_col_index: widths[index] = len(value) if is_sequence(value) else 1
+
+        actions_list = list(actions)
+        offsets      = {}
+        offset       = 0
+
+        #a flattened column starts after every earlier column (other than the label) has been flattened
+        for index in range(max(widths, default=-1)+1):
+            if index != label_col_index:
+                offsets[index] = offset
+                offset += widths.get(index,1)
+
+        for row in self._parsed_rows()[0]:
+            features, label = self._split_row(row, label_col_index)
+
+            if self._is_sparse(row):
+                keys, values = [], []
+
+                for index, value in sorted(features):
+                    flat_values = value if is_sequence(value) else (value,)
+                    keys  .extend(range(offsets[index], offsets[index]+len(flat_values)))
+                    values.extend(flat_values)
+
+                context = (tuple(keys), tuple(values))
+            else:
+                context = tuple(chain.from_iterable(value if is_sequence(value) else (value,) for value in features))
+
+            yield Interaction(context, actions_list, ClassificationSimulation._feedbacks(actions_list, label))
+
+    def _parsed_rows(self) -> Tuple[Iterator[Any], int]:
+        parsed_rows_iter = iter(self._reader.filter(self._source.read()))
+        header           = list(next(parsed_rows_iter)) if self._with_header else []
+        is_sparse_header = len(header) == 2 and isinstance(header[0],tuple) and isinstance(header[1],tuple)
+
+        return parsed_rows_iter, self._label_index(list(header[1]) if is_sparse_header else header)
+
+    def _is_sparse(self, row: Any) -> bool:
+        return len(row) == 2 and isinstance(row[0],tuple) and isinstance(row[1],tuple)
+
+    def _split_row(self, row: Any, label_col_index: int) -> Tuple[Any, Any]:
+        if self._is_sparse(row):
+            features = dict(zip(*row))
+            label    = features.pop(label_col_index, '0')
+            return list(features.items()), label
+        else:
+            return row[:label_col_index] + row[label_col_index+1:], row[label_col_index]
 
     def _load_interactions(self) -> Sequence[Interaction]:
         parsed_rows_iter = iter(self._reader.filter(self._source.read()))
@@ -264,10 +346,7 @@ class ReaderSimulation(Simulation):
         else:
             header = []
 
-        if isinstance(self._label_column, str):
-            label_col_index = header.index(self._label_column)
-        else:
-            label_col_index = self._label_column
+        label_col_index = self._label_index(header)
 
         parsed_cols = list(Transpose().filter(parsed_rows_iter))
         
@@ -291,8 +370,8 @@ class ReaderSimulation(Simulation):
         return str(self._source)
 
 class CsvSimulation(ReaderSimulation):
-    def __init__(self, source:Union[str,Source[Iterable[str]]], label_column:Union[str,int], with_header:bool=True) -> None:
-        super().__init__(CsvReader(), source, label_column, with_header)
+    def __init__(self, source:Union[str,Source[Iterable[str]]], label_column:Union[str,int], with_header:bool=True, streaming:bool=False) -> None:
+        super().__init__(CsvReader(), source, label_column, with_header, streaming)
 
     def __repr__(self) -> str:
         return f'{{"CsvSimulation":"{super().__repr__()}"}}'
@@ -1,4 +1,8 @@
+import io
+import os
 import json
+import pickle
+import tempfile
 
 from itertools import compress
 from hashlib import md5
@@ -11,6 +15,10 @@ from coba.simulations.core import Context, Action, ClassificationSimulation, Int
 
 class OpenmlSource(Source[Tuple[Sequence[Context], Sequence[Action]]]):
 
+    #this should be incremented whenever a change is made that
+    #would alter the parsed output of a previously cached dataset
+    _PARSED_VERSION = 1
+
     def __init__(self, id:int, md5_checksum:str = None):
         self._data_id      = id
         self._md5_checksum = md5_checksum
@@ -24,6 +32,7 @@ class OpenmlSource(Source[Tuple[Sequence[Context], Sequence[Action]]]):
         d_key = None
         t_key = None
         o_key = None
+        p_key = None
 
         try:
             data_id        = self._data_id
@@ -38,6 +47,12 @@ class OpenmlSource(Source[Tuple[Sequence[Context], Sequence[Action]]]):
             if d_object['status'] == 'deactivated':
                 raise Exception(f"Openml {data_id} has been deactivated. This is often due to flags on the data.")
 
+            p_key  = self._parsed_key(d_object)
+            parsed = self._get_parsed(p_key)
+
+            if parsed is not None:
+                return parsed
+
             t_bytes  = self._query(t_key, "types")
             t_object = json.loads(t_bytes.decode('utf-8'))["data_features"]["feature"]
 
@@ -74,20 +89,20 @@ class OpenmlSource(Source[Tuple[Sequence[Context], Sequence[Action]]]):
                 if csv_url in CobaConfig.Cacher or arff_url not in CobaConfig.Cacher:
                     o_key     = csv_url
                     o_bytes   = self._query(o_key, "obser", md5_checksum)
-                    file_rows = list(CsvReader().filter(o_bytes.decode('utf-8').splitlines()))
+                    file_rows = list(CsvReader().filter(self._lines(o_bytes)))
                 else:
                     o_key     = arff_url
                     o_bytes   = self._query(o_key, "obser", md5_checksum)
-                    file_rows = list(ArffReader(skip_encoding=[target]).filter(o_bytes.decode('utf-8').splitlines()))
+                    file_rows = list(ArffReader(skip_encoding=[target]).filter(self._lines(o_bytes)))
             except:
                 if o_key == csv_url:
                     o_key     = arff_url
                     o_bytes   = self._query(o_key, "obser", md5_checksum)
-                    file_rows = list(ArffReader(skip_encoding=[target]).filter(o_bytes.decode('utf-8').splitlines()))
+                    file_rows = list(ArffReader(skip_encoding=[target]).filter(self._lines(o_bytes)))
                 else:
                     o_key     = csv_url
                     o_bytes   = self._query(o_key, "obser", md5_checksum)
-                    file_rows = list(CsvReader().filter(o_bytes.decode('utf-8').splitlines()))
+                    file_rows = list(CsvReader().filter(self._lines(o_bytes)))
 
             is_sparse_data = isinstance(file_rows[0], tuple) and len(file_rows[0]) == 2
 
@@ -121,6 +136,9 @@ class OpenmlSource(Source[Tuple[Sequence[Context], Sequence[Action]]]):
             else:
                 dense_label_col = list(label_col)
 
+            #a warm read only needs the parsed output so we store it in a single cache entry
+            CobaConfig.Cacher.put(p_key, pickle.dumps((feature_rows, dense_label_col), protocol=pickle.HIGHEST_PROTOCOL))
+
             return feature_rows, dense_label_col
 
         except KeyboardInterrupt:
@@ -130,11 +148,71 @@ class OpenmlSource(Source[Tuple[Sequence[Context], Sequence[Action]]]):
         except Exception:
             #if something went wrong we want to clear the
             #cache just in case it was corrupted somehow
-            for k in [d_key, t_key, o_key]:
-                if k is not None: CobaConfig.Cacher.rmv(k)
+            for k in [d_key, t_key, o_key, p_key]:
+                if k is not None and k in CobaConfig.Cacher: CobaConfig.Cacher.rmv(k)
             
             raise
 
+    def prefetch(self) -> None:
+        """Download the raw files that `read` needs into the cache without parsing them.
+
+        Remarks:
+            Downloading spends almost all of its time waiting on the network so many sources can be prefetched at 
+            once on threads. Parsing is CPU bound and is left to `read` which can be called in another process.
+        """
+
+        data_id = self._data_id
+
+        d_key = f'https://www.openml.org/api/v1/json/data/{data_id}'
+        t_key = f'https://www.openml.org/api/v1/json/data/features/{data_id}'
+
+        d_bytes  = self._query(d_key, "descr")
+        d_object = json.loads(d_bytes.decode('utf-8'))["data_set_description"]
+
+        if d_key not in CobaConfig.Cacher: CobaConfig.Cacher.put(d_key, d_bytes)
+
+        if d_object['status'] == 'deactivated':
+            raise Exception(f"Openml {data_id} has been deactivated. This is often due to flags on the data.")
+
+        if self._parsed_key(d_object) in CobaConfig.Cacher:
+            return
+
+        t_bytes  = self._query(t_key, "types")
+        t_object = json.loads(t_bytes.decode('utf-8'))["data_features"]["feature"]
+
+        if t_key not in CobaConfig.Cacher: CobaConfig.Cacher.put(t_key, t_bytes)
+
+        #read looks up a classification target when the data set doesn't have one (this caches the lookup)
+        if not any(tipe['is_target'] == 'true' and tipe['data_type'] != 'numeric' for tipe in t_object):
+            self._get_classification_target(data_id)
+
+        csv_url  = f"http://www.openml.org/data/v1/get_csv/{d_object['file_id']}"
+        arff_url = f"http://www.openml.org/data/v1/download/{d_object['file_id']}"
+        o_key    = csv_url if csv_url in CobaConfig.Cacher or arff_url not in CobaConfig.Cacher else arff_url
+
+        o_bytes = self._query(o_key, "obser", self._md5_checksum)
+
+        if o_key not in CobaConfig.Cacher: CobaConfig.Cacher.put(o_key, o_bytes)
+
+    def _parsed_key(self, d_object: dict) -> str:
+        #the description's checksum changes whenever openml's data changes so our parsed output can't go stale
+        return f"openml://data/{self._data_id}?checksum={d_object.get('md5_checksum')}&version={self._PARSED_VERSION}"
+
+    def _get_parsed(self, p_key: str) -> Optional[Tuple[Sequence[Sequence[Any]], Sequence[Any]]]:
+        #a bad parsed entry is only a cache miss, it says nothing about the raw data caches
+        try:
+            return pickle.loads(CobaConfig.Cacher.get(p_key)) if p_key in CobaConfig.Cacher else None
+        except KeyboardInterrupt:
+            raise
+        except Exception:
+            CobaConfig.Cacher.rmv(p_key)
+            return None
+
+    def _lines(self, bites: bytes) -> Iterable[str]:
+        #we decode lazily so that we never hold the decoded text and all of its lines at once
+        for line in io.TextIOWrapper(io.BytesIO(bites), encoding='utf-8'):
+            yield line.rstrip('\n')
+
     def _query(self, url:str, description:str, checksum:str=None) -> bytes:
         
         if url in CobaConfig.Cacher:
@@ -145,7 +223,10 @@ class OpenmlSource(Source[Tuple[Sequence[Context], Sequence[Action]]]):
             api_key = CobaConfig.Api_Keys['openml']
 
             #with CobaConfig.Logger.time(f'loading {description} from http... '):
-            response = HttpSource(url + (f'?api_key={api_key}' if api_key else '')).read()
+            #openml asks that we try again in a few seconds when it reports high server load
+            #a dropped download is kept in a temporary file so that it can be resumed by a later query
+            partial  = os.path.join(tempfile.gettempdir(), f"coba_{md5(url.encode('utf-8')).hexdigest()}.partial")
+            response = HttpSource(url + (f'?api_key={api_key}' if api_key else ''), retry_if=self._is_high_load, partial=partial).read()
 
             if response.status_code == 412:
                 if 'please provide api key' in response.text:
@@ -168,7 +249,7 @@ class OpenmlSource(Source[Tuple[Sequence[Context], Sequence[Action]]]):
                     "for this is openml not providing the requested dataset in a format that COBA can process.")
                 raise CobaException(message) from None
 
-            if "Usually due to high server load" in response.text:
+            if self._is_high_load(response):
                 message = (
                     "Openml has experienced an error that they believe is the result of high server loads ."
                     "Openml recommends that you try again in a few seconds. Additionally, if not already "
@@ -176,7 +257,7 @@ class OpenmlSource(Source[Tuple[Sequence[Context], Sequence[Action]]]):
                     "calls in the future.")
                 raise CobaException(message) from None
 
-            if '' == response.text:
+            if not response.content:
                 raise CobaException("The http response was empty. Try re-running the benchmark.") from None
 
             bites = response.content
@@ -194,6 +275,10 @@ class OpenmlSource(Source[Tuple[Sequence[Context], Sequence[Action]]]):
 
         return bites
 
+    def _is_high_load(self, response) -> bool:
+        #the message is only ever in a small body so we don't need to decode large data sets to look for it
+        return len(response.content) < 10000 and b"Usually due to high server load" in response.content
+
     def _get_classification_target(self, data_id):
 
         t_key = f'https://www.openml.org/api/v1/json/task/list/data_id/{data_id}'
@@ -231,5 +316,9 @@ class OpenmlSimulation(Simulation):
         """Read the interactions in this simulation."""
         return ClassificationSimulation(*self._source.read()).read()
 
+    def prefetch(self) -> None:
+        """Download this simulation's raw data into the cache without parsing it."""
+        self._source.prefetch()
+
     def __repr__(self) -> str:
         return f'{{"OpenmlSimulation":{self._source._data_id}}}'
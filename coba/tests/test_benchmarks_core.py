@@ -6,11 +6,17 @@ from typing import cast
 
 from coba.simulations import LambdaSimulation
 from coba.pipes import Source, MemorySink, MemorySource
-from coba.learners import Learner, RandomLearner
+from coba.learners import Learner, RandomLearner, LearnerFactory
 from coba.config import CobaConfig, NoneLogger, IndentLogger, BasicLogger
 from coba.benchmarks import Benchmark
+from coba.benchmarks.results import Result
+from coba.multiprocessing import CobaExecutor
+from coba.benchmarks.tasks import SharedSource
 
 #for testing purposes
+def last_shared_path():
+    return SharedSource._last[0]
+
 class ModuloLearner(Learner):
     def __init__(self, param:str="0"):
         self._param = param
@@ -29,6 +35,21 @@ class ModuloLearner(Learner):
     def learn(self, key, context, action, reward, probability):
         pass
 
+class DuckLearner:
+    @property
+    def family(self):
+        return "Duck"
+
+    @property
+    def params(self):
+        return {}
+
+    def predict(self, key, context, actions):
+        return [ int(i == 0) for i in range(len(actions)) ]
+
+    def learn(self, key, context, action, reward, probability):
+        pass
+
 class BrokenLearner(Learner):
     
     @property
@@ -45,6 +66,36 @@ class BrokenLearner(Learner):
     def learn(self, key, context, action, reward, probability):
         pass
 
+class SpinningLearner(Learner):
+
+    @property
+    def family(self):
+        return "Spinning"
+
+    @property
+    def params(self):
+        return {}
+
+    def predict(self, key, context, actions):
+        while True:
+            try:
+                pass
+            except Exception:
+                pass
+
+    def learn(self, key, context, action, reward, probability):
+        pass
+
+class SpinningOnceLearner(ModuloLearner):
+    spun = False
+
+    def predict(self, key, context, actions):
+        if not SpinningOnceLearner.spun:
+            SpinningOnceLearner.spun = True
+            while True: pass
+
+        return super().predict(key, context, actions)
+
 class InfoLearner(Learner):
     def __init__(self, param:str="0"):
         self._param = param
@@ -153,6 +204,57 @@ class Benchmark_Single_Tests(unittest.TestCase):
         self.assertCountEqual(actual_simulations, expected_simulations)
         self.assertCountEqual(actual_interactions, expected_interactions)
 
+    def test_chunk_by_source_shared(self):
+        sim1       = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        learner1   = ModuloLearner("0")
+        learner2   = ModuloLearner("1")
+
+        expected = Benchmark([sim1], shuffle=[1,4]).chunk_by('source').evaluate([learner1, learner2])
+        actual   = Benchmark([sim1], shuffle=[1,4]).chunk_by('source_shared').evaluate([learner1, learner2])
+
+        self.assertCountEqual(expected.simulations.to_tuples(), actual.simulations.to_tuples())
+        self.assertCountEqual(expected.interactions.to_tuples(), actual.interactions.to_tuples())
+        self.assertEqual(20, len(actual.interactions.to_tuples()))
+        self.assertIsNone(last_shared_path())
+
+    def test_chunk_by_source_shared_processes(self):
+        sim1       = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        sim2       = LambdaSimulation(4, lambda i: i, lambda i,c: [3,4,5], lambda i,c,a: cast(float,a))
+        learner1   = ModuloLearner("0")
+        learner2   = ModuloLearner("1")
+
+        expected = Benchmark([sim1,sim2], shuffle=[1,4]).chunk_by('source').evaluate([learner1, learner2])
+        actual   = Benchmark([sim1,sim2], shuffle=[1,4]).chunk_by('source_shared').processes(2).evaluate([learner1, learner2])
+
+        self.assertCountEqual(expected.simulations.to_tuples(), actual.simulations.to_tuples())
+        self.assertCountEqual(expected.interactions.to_tuples(), actual.interactions.to_tuples())
+        self.assertEqual(36, len(actual.interactions.to_tuples()))
+
+    def test_preload(self):
+        sim1       = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        learner1   = ModuloLearner("0")
+        learner2   = ModuloLearner("1")
+
+        expected = Benchmark([sim1], shuffle=[1,4]).evaluate([learner1, learner2])
+        actual   = Benchmark([sim1], shuffle=[1,4]).preload().evaluate([learner1, learner2])
+
+        self.assertCountEqual(expected.simulations.to_tuples(), actual.simulations.to_tuples())
+        self.assertCountEqual(expected.interactions.to_tuples(), actual.interactions.to_tuples())
+        self.assertEqual(20, len(actual.interactions.to_tuples()))
+
+    def test_preload_selected(self):
+        sim1       = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        sim2       = LambdaSimulation(4, lambda i: i, lambda i,c: [3,4,5], lambda i,c,a: cast(float,a))
+        learner1   = ModuloLearner("0")
+        learner2   = ModuloLearner("1")
+
+        expected = Benchmark([sim1,sim2]).evaluate([learner1, learner2])
+        actual   = Benchmark([sim1,sim2]).preload(lambda source: source is sim2).evaluate([learner1, learner2])
+
+        self.assertCountEqual(expected.simulations.to_tuples(), actual.simulations.to_tuples())
+        self.assertCountEqual(expected.interactions.to_tuples(), actual.interactions.to_tuples())
+        self.assertEqual(18, len(actual.interactions.to_tuples()))
+
     def test_shuffle_seeds(self):
         sim1      = LambdaSimulation(3, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
         learner   = ModuloLearner()
@@ -307,6 +409,99 @@ class Benchmark_Single_Tests(unittest.TestCase):
         self.assertCountEqual(actual_simulations, expected_simulations)
         self.assertCountEqual(actual_interactions, expected_interactions)
 
+    def test_timeout(self):
+        sim1     = LambdaSimulation(2, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        learners = [ModuloLearner(), SpinningLearner()]
+
+        result = Benchmark([sim1]).timeout(0.2).evaluate(learners)
+
+        self.assertCountEqual([(0, 0, 1, 0), (0, 0, 2, 1)], result.interactions.to_tuples())
+        self.assertEqual([(0, 1, 'timeout', 0.2, 1)], result.failures.to_tuples())
+
+    def test_timeout_retry(self):
+        SpinningOnceLearner.spun = False
+
+        sim1   = LambdaSimulation(2, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        result = Benchmark([sim1]).timeout(0.2, retry=True).evaluate([SpinningOnceLearner()])
+
+        self.assertCountEqual([(0, 0, 1, 0), (0, 0, 2, 1)], result.interactions.to_tuples())
+        self.assertEqual([], result.failures.to_tuples())
+
+    def test_lockstep(self):
+        sim1     = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        sim2     = LambdaSimulation(4, lambda i: i, lambda i,c: [3,4,5], lambda i,c,a: cast(float,a))
+        learners = [ModuloLearner("0"), RandomLearner(), BrokenLearner()]
+        expected = Benchmark([sim1,sim2]).evaluate(learners)
+        actual   = Benchmark([sim1,sim2]).lockstep().evaluate(learners)
+
+        self.assertCountEqual(expected.interactions.to_tuples(), actual.interactions.to_tuples())
+
+    def test_batch_size(self):
+        sim1     = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        learners = [ModuloLearner("0"), RandomLearner()]
+        expected = Benchmark([sim1]).evaluate(learners)
+        actual   = Benchmark([sim1]).batch_size(2).evaluate(learners)
+
+        self.assertCountEqual(expected.interactions.to_tuples(), actual.interactions.to_tuples())
+
+    def test_checkpoint(self):
+        sim1     = LambdaSimulation(9, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        learners = [ModuloLearner("0"), RandomLearner()]
+        expected = Benchmark([sim1]).evaluate(learners)
+
+        try:
+            actual = Benchmark([sim1]).checkpoint(2).evaluate(learners, "coba/tests/.temp/checkpoint.log")
+
+            self.assertFalse(Path("coba/tests/.temp/checkpoint.log.checkpoints").exists())
+            self.assertCountEqual(expected.interactions.to_tuples(), actual.interactions.to_tuples())
+        finally:
+            if Path('coba/tests/.temp/checkpoint.log').exists(): Path('coba/tests/.temp/checkpoint.log').unlink()
+
+    def test_segments(self):
+        sim1     = LambdaSimulation(9, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        learners = [ModuloLearner("0"), RandomLearner()]
+        expected = Benchmark([sim1]).evaluate(learners)
+
+        try:
+            actual = Benchmark([sim1]).segments(2).evaluate(learners, "coba/tests/.temp/segments.log")
+
+            self.assertCountEqual(expected.interactions.to_tuples(), actual.interactions.to_tuples())
+
+            #the final segments are dropped as if the benchmark had stopped before writing them
+            lines = Path("coba/tests/.temp/segments.log").read_text().splitlines()
+            Path("coba/tests/.temp/segments.log").write_text("".join(line+"\n" for line in lines if '"_start":8' not in line))
+
+            self.assertEqual(2, len(Result.from_file("coba/tests/.temp/segments.log")._partial))
+
+            actual = Benchmark([sim1]).segments(2).evaluate(learners, "coba/tests/.temp/segments.log")
+
+            self.assertEqual({}, actual._partial)
+            self.assertCountEqual(expected.interactions.to_tuples(), actual.interactions.to_tuples())
+        finally:
+            if Path('coba/tests/.temp/segments.log').exists(): Path('coba/tests/.temp/segments.log').unlink()
+
+    def test_learner_without_learner_base(self):
+        sim1   = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        result = Benchmark([sim1]).evaluate([DuckLearner()])
+
+        self.assertEqual([(0,"Duck","Duck")], result.learners.to_tuples())
+        self.assertEqual(5, len(result.interactions.to_tuples()))
+
+    def test_learner_factory(self):
+        sim1     = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        sim2     = LambdaSimulation(4, lambda i: i, lambda i,c: [3,4,5], lambda i,c,a: cast(float,a))
+        expected = Benchmark([sim1,sim2]).evaluate([ModuloLearner("1")])
+        actual   = Benchmark([sim1,sim2]).evaluate([LearnerFactory(ModuloLearner, "1")])
+
+        self.assertEqual(expected.learners.to_tuples(), actual.learners.to_tuples())
+        self.assertCountEqual(expected.interactions.to_tuples(), actual.interactions.to_tuples())
+
+    def test_not_picklable_learner_factory(self):
+        sim1   = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        result = Benchmark([sim1]).evaluate([LearnerFactory(NotPicklableLearner)])
+
+        self.assertEqual(5, len(result.interactions.to_tuples()))
+
 class Benchmark_Multi_Tests(Benchmark_Single_Tests):
     
     @classmethod
@@ -315,6 +510,48 @@ class Benchmark_Multi_Tests(Benchmark_Single_Tests):
         CobaConfig.Benchmark['processes'] = 2
         CobaConfig.Benchmark['maxtasksperchild'] = None
 
+    def test_executor_reused(self):
+        sim1      = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        learner   = ModuloLearner()
+        expected  = Benchmark([sim1]).evaluate([learner]).interactions.to_tuples()
+
+        with CobaExecutor(2) as executor:
+            actual1 = Benchmark([sim1]).evaluate([learner], executor=executor).interactions.to_tuples()
+            actual2 = Benchmark([sim1]).evaluate([learner], executor=executor).interactions.to_tuples()
+
+        self.assertCountEqual(expected, actual1)
+        self.assertCountEqual(expected, actual2)
+
+    def test_memory_limits(self):
+        sim1     = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        learner  = ModuloLearner()
+        expected = Benchmark([sim1]).evaluate([learner]).interactions.to_tuples()
+        actual   = Benchmark([sim1]).memory(max_process_mb=1, min_free_mb=1).evaluate([learner]).interactions.to_tuples()
+
+        self.assertCountEqual(expected, actual)
+
+    def test_executor_released_after_source_shared(self):
+        sim1    = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        learner = ModuloLearner()
+
+        with CobaExecutor(2) as executor:
+            Benchmark([sim1], shuffle=[1,4]).chunk_by('source_shared').evaluate([learner], executor=executor)
+            paths = executor.broadcast(last_shared_path)
+
+        self.assertEqual([None,None], paths)
+
+    def test_executor_reused_with_preload(self):
+        simA    = LambdaSimulation(5 , lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: 0.0)
+        simB    = LambdaSimulation(50, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: 1.0)
+        learner = ModuloLearner()
+
+        with CobaExecutor(2) as executor:
+            resultA = Benchmark([simA]).preload().evaluate([learner], executor=executor)
+            resultB = Benchmark([simB]).preload().evaluate([learner], executor=executor)
+
+        self.assertEqual([0.0]*5 , [ t[3] for t in resultA.interactions.to_tuples() ])
+        self.assertEqual([1.0]*50, [ t[3] for t in resultB.interactions.to_tuples() ])
+
     def test_not_picklable_learner_sans_reduce(self):
         sim1      = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
         learner   = NotPicklableLearner()
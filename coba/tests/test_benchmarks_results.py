@@ -209,6 +209,44 @@ class Table_Tests(unittest.TestCase):
             table = Table("test", ['a'])
             table['A'] = dict(c=1,_packed=dict(b=['B','b'],d=['D','d','e']))
 
+    def test_extend_item(self):
+        table = Table("test", ['a'])
+
+        table.extend('A', dict(c=1, _packed=dict(b=['B','b'])), 0)
+        table.extend('A', dict(c=2, _packed=dict(b=['C'],d=['D'])), 2)
+
+        self.assertEqual(table['A'], {'a':'A', 'index':[1,2,3], 'b':['B','b','C'], 'c':2, 'd':[None,None,'D']})
+        self.assertEqual(3, len(table))
+
+    def test_extend_item_again(self):
+        table = Table("test", ['a'])
+
+        table.extend('A', dict(_packed=dict(b=[1,2])), 0)
+        table.extend('A', dict(_packed=dict(b=[3,4])), 2)
+        table.extend('A', dict(_packed=dict(b=[5,6])), 2)
+
+        self.assertEqual(table['A'], {'a':'A', 'index':[1,2,3,4], 'b':[1,2,5,6]})
+
+    def test_pop_item(self):
+        table = Table("test", ['a'])
+
+        table['A'] = dict(c=1, _packed=dict(b=['B','b']))
+        table['B'] = dict(c=2)
+
+        self.assertEqual(dict(c=1, _packed=dict(b=['B','b'])), table.pop('A'))
+        self.assertEqual(dict(c=2), table.pop('B'))
+        self.assertNotIn('A', table)
+        self.assertEqual(0, len(table))
+
+    def test_extend_does_not_change_values(self):
+        table  = Table("test", ['a'])
+        values = dict(_packed=dict(b=[1,2]))
+
+        table.extend('A', values, 0)
+        table.extend('A', dict(_packed=dict(b=[3])), 2)
+
+        self.assertEqual([1,2], values['_packed']['b'])
+
 class Result_Tests(unittest.TestCase):
 
     def test_has_interactions_key(self):
@@ -224,6 +262,26 @@ class Result_Tests(unittest.TestCase):
 
         self.assertEqual(len(result._interactions), 4)
 
+    def test_has_failures(self):
+        result = Result.from_transactions([
+            Transaction.interactions(0, 1, _packed=dict(reward=[1,1])),
+            Transaction.failure(0, 2, reason="timeout")
+        ])
+
+        self.assertEqual([(0,2,"timeout")], result.failures.to_tuples())
+        self.assertNotIn((0,2), result._interactions)
+
+    def test_partial_interactions_merged(self):
+        result = Result.from_transactions([
+            Transaction.interactions(0, 1, _packed=dict(reward=[1,2]), _start=0, _partial=True),
+            Transaction.interactions(0, 2, _packed=dict(reward=[5]), _start=0, _partial=True),
+            Transaction.interactions(0, 1, _packed=dict(reward=[3]), _start=2)
+        ])
+
+        self.assertEqual([(0,1,1,1),(0,1,2,2),(0,1,3,3)], result.interactions.to_tuples())
+        self.assertEqual({(0,2):1}, result._partial)
+        self.assertNotIn((0,2), result._interactions)
+
     def test_has_version(self):
         result = Result.from_transactions([Transaction.version(1)])
         self.assertEqual(result.version, 1)
@@ -1,13 +1,27 @@
+import os
+import time
 import unittest
+import pickle
+import threading
+import unittest.mock
+
+import tempfile
+
+from array import array
 
 from typing import cast
 
-from coba.simulations import LambdaSimulation
-from coba.pipes import Source
-from coba.learners import Learner
+from coba.random import CobaRandom
+from coba.simulations import LambdaSimulation, Take
+from coba.pipes import Source, Pipe
+from coba.learners import Learner, LearnerFactory, RandomLearner, EpsilonBanditLearner
+from coba.config import CobaConfig, NoneLogger, MemoryCacher, NoneCacher
 
 from coba.benchmarks.results import Result
-from coba.benchmarks.tasks import BenchmarkTask, Tasks, Unfinished, ChunkBySource
+from coba.benchmarks.transactions import Transaction, TransactionIsNew
+from coba.benchmarks.tasks import BenchmarkTask, Tasks, Unfinished, ChunkBySource, PrefetchSources, LongestFirst, TaskCosts, Transactions, ChunkBySourceShared, PreloadSources, PreloadedSource, SharedSource
+from coba.benchmarks.tasks import TaskTimer, TaskTimeout, Checkpoints, InteractionColumns
+from coba.multiprocessing import MultiprocessFilter
 
 #for testing purposes
 class ModuloLearner(Learner):
@@ -28,6 +42,58 @@ class ModuloLearner(Learner):
     def learn(self, key, context, action, reward, probability):
         pass
 
+class CountingLearner(ModuloLearner):
+    created = 0
+
+    def __init__(self, param:str="0"):
+        CountingLearner.created += 1
+        super().__init__(param)
+
+    def __deepcopy__(self, memo):
+        raise Exception("A learner created by a factory shouldn't be copied")
+
+class OrderLearner(ModuloLearner):
+    calls = []
+
+    def predict(self, key, context, actions):
+        OrderLearner.calls.append((self._param, key))
+        return super().predict(key, context, actions)
+
+class BrokenLearner(ModuloLearner):
+    def predict(self, key, context, actions):
+        if key == 1: raise Exception("Broken Learner")
+        return super().predict(key, context, actions)
+
+class BatchLearner(ModuloLearner):
+    calls = []
+
+    def predict_batch(self, keys, contexts, actions):
+        BatchLearner.calls.append(("predict", list(keys)))
+        return [ self.predict(key, context, acts) for key, context, acts in zip(keys, contexts, actions) ]
+
+    def learn_batch(self, keys, contexts, actions, rewards, probabilities):
+        BatchLearner.calls.append(("learn", list(keys)))
+        return [ {"action":action} for action in actions ]
+
+class Crash(BaseException):
+    pass
+
+class CrashingLearner(EpsilonBanditLearner):
+    crash_at = None
+
+    def predict(self, key, context, actions):
+        if key == CrashingLearner.crash_at: raise Crash()
+        return super().predict(key, context, actions)
+
+class SpinningLearner(ModuloLearner):
+    def predict(self, key, context, actions):
+        while True: pass
+
+class SleepingLearner(ModuloLearner):
+    def predict(self, key, context, actions):
+        time.sleep(0.4)
+        return super().predict(key, context, actions)
+
 class OneTimeSource(Source):
 
     def __init__(self, source: Source) -> None:
@@ -119,6 +185,355 @@ class Unifinshed_Tests(unittest.TestCase):
         self.assertEqual(0, unfinished_tasks[1].lrn_id)
         self.assertEqual(1, unfinished_tasks[2].lrn_id)
 
+    def test_partially_finished(self):
+
+        restored = Result.from_transactions([
+            Transaction.interactions(0, 0, _packed={"reward":[1,2]}, _start=0),
+            Transaction.interactions(0, 1, _packed={"reward":[1,2]}, _start=0, _partial=True)
+        ])
+
+        sim1 = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        lrn1 = ModuloLearner("1")
+
+        tasks = [ BenchmarkTask(0,0,0,sim1,lrn1,10), BenchmarkTask(0,0,1,sim1,lrn1,10) ]
+
+        self.assertEqual([1], [ task.lrn_id for task in Unfinished(restored).filter(tasks) ])
+
+class CountingSource(Source):
+
+    def __init__(self, source: Source, fail: bool = False) -> None:
+        self._source         = source
+        self._fail           = fail
+        self._read_count     = 0
+        self._prefetch_count = 0
+
+    def read(self):
+        self._read_count += 1
+        return self._source.read()
+
+    def prefetch(self):
+        self._prefetch_count += 1
+        if self._fail: raise Exception("Unable to prefetch")
+
+class PrefetchSources_Tests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        CobaConfig.Logger = NoneLogger()
+
+    def test_each_source_prefetched_once(self):
+        sim1 = CountingSource(LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a)))
+        sim2 = CountingSource(LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a)))
+        lrn1 = ModuloLearner("1")
+
+        tasks = [
+            BenchmarkTask(0,0,0,sim1,lrn1,10),
+            BenchmarkTask(0,0,1,sim1,lrn1,10),
+            BenchmarkTask(1,1,0,sim2,lrn1,10),
+            BenchmarkTask(1,1,1,sim2,lrn1,10),
+        ]
+
+        prefetched = list(PrefetchSources(2).filter(tasks))
+
+        self.assertEqual(tasks, prefetched)
+        self.assertEqual(1, sim1._prefetch_count)
+        self.assertEqual(1, sim2._prefetch_count)
+        self.assertEqual(0, sim1._read_count)
+        self.assertEqual(0, sim2._read_count)
+
+    def test_only_should_prefetch_sources_prefetched(self):
+        sim1 = CountingSource(LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a)))
+        sim2 = CountingSource(LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a)))
+        lrn1 = ModuloLearner("1")
+
+        tasks = [
+            BenchmarkTask(0,0,0,sim1,lrn1,10),
+            BenchmarkTask(1,1,0,sim2,lrn1,10),
+        ]
+
+        prefetched = list(PrefetchSources(2, lambda source: source is sim1).filter(tasks))
+
+        self.assertEqual(tasks, prefetched)
+        self.assertEqual(1, sim1._prefetch_count)
+        self.assertEqual(0, sim2._prefetch_count)
+
+    def test_failed_source_does_not_stop_prefetch(self):
+        sim1 = CountingSource(LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a)), fail=True)
+        sim2 = CountingSource(LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a)))
+        lrn1 = ModuloLearner("1")
+
+        tasks = [
+            BenchmarkTask(0,0,0,sim1,lrn1,10),
+            BenchmarkTask(1,1,0,sim2,lrn1,10),
+        ]
+
+        prefetched = list(PrefetchSources(1).filter(tasks))
+
+        self.assertEqual(tasks, prefetched)
+        self.assertEqual(1, sim1._prefetch_count)
+        self.assertEqual(1, sim2._prefetch_count)
+
+    def test_sources_without_prefetch_skipped(self):
+        sim1 = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        lrn1 = ModuloLearner("1")
+
+        tasks = [ BenchmarkTask(0,0,0,sim1,lrn1,10) ]
+
+        self.assertEqual(tasks, list(PrefetchSources(2).filter(tasks)))
+
+class NamedSource(Source):
+
+    def __init__(self, name: str, n_interactions: int = 5) -> None:
+        self._name   = name
+        self._source = LambdaSimulation(n_interactions, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+
+    def read(self):
+        return self._source.read()
+
+    def __repr__(self) -> str:
+        return self._name
+
+class LongestFirst_Tests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        CobaConfig.Logger = NoneLogger()
+        CobaConfig.Cacher = MemoryCacher()
+
+    def tearDown(self) -> None:
+        CobaConfig.Cacher = NoneCacher()
+
+    def test_take_orders_chunks_without_records(self):
+        lrn1 = ModuloLearner("1")
+        sim1 = Pipe.join(NamedSource("a"), [Take(10)])
+        sim2 = Pipe.join(NamedSource("b"), [Take(100)])
+
+        chunks = [ [BenchmarkTask(0,0,0,sim1,lrn1,10)], [BenchmarkTask(1,1,0,sim2,lrn1,10)] ]
+
+        ordered = LongestFirst().filter(chunks)
+
+        self.assertEqual([1,0], [ chunk[0].sim_id for chunk in ordered ])
+
+    def test_more_learners_first(self):
+        lrn1 = ModuloLearner("1")
+        sim1 = NamedSource("a")
+        sim2 = NamedSource("b")
+
+        chunks = [ [BenchmarkTask(0,0,0,sim1,lrn1,10)], [BenchmarkTask(1,1,0,sim2,lrn1,10), BenchmarkTask(1,1,1,sim2,lrn1,10)] ]
+
+        ordered = LongestFirst().filter(chunks)
+
+        self.assertEqual([1,0], [ chunk[0].sim_id for chunk in ordered ])
+
+    def test_records_order_chunks(self):
+        lrn1 = ModuloLearner("1")
+        sim1 = NamedSource("a")
+        sim2 = NamedSource("b")
+
+        TaskCosts.record(sim1, 100, 1)
+        TaskCosts.record(sim2, 10 , 1)
+
+        chunks = [ [BenchmarkTask(1,1,0,sim2,lrn1,10)], [BenchmarkTask(0,0,0,sim1,lrn1,10)] ]
+
+        ordered = LongestFirst().filter(chunks)
+
+        self.assertEqual([0,1], [ chunk[0].sim_id for chunk in ordered ])
+
+    def test_transactions_record_costs(self):
+        lrn1 = ModuloLearner("1")
+        sim1 = NamedSource("a", 7)
+
+        list(Transactions().filter([[BenchmarkTask(0,0,0,sim1,lrn1,10)]]))
+
+        estimate = TaskCosts.estimates([BenchmarkTask(0,0,0,Pipe.join(sim1, [Take(5)]),lrn1,10)])[0]
+
+        self.assertIn("coba://costs/a", CobaConfig.Cacher)
+        self.assertLess(estimate, 1)
+
+    def test_unidentified_sources_not_recorded(self):
+        lrn1 = ModuloLearner("1")
+        sim1 = LambdaSimulation(50, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        sim2 = CountingSource(LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a)))
+
+        list(Transactions().filter([[BenchmarkTask(0,0,0,sim1,lrn1,10)], [BenchmarkTask(1,1,0,sim2,lrn1,10)]]))
+
+        self.assertEqual([1000,1000], TaskCosts.estimates([BenchmarkTask(0,0,0,sim1,lrn1,10), BenchmarkTask(1,1,0,sim2,lrn1,10)]))
+        self.assertEqual([], [ key for key in CobaConfig.Cacher._cache if key.startswith("coba://costs/") ])
+
+class ChunkBySourceShared_Tests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        CobaConfig.Logger = NoneLogger()
+
+    def tearDown(self) -> None:
+        SharedSource.clear()
+
+    def test_source_read_once_chunk_per_task(self):
+        sim1 = OneTimeSource(NamedSource("a"))
+        sim2 = Pipe.join(sim1, [Take(2)])
+        lrn1 = ModuloLearner("1")
+
+        tasks = [
+            BenchmarkTask(0,0,0,sim1,lrn1,10),
+            BenchmarkTask(0,0,1,sim1,lrn1,10),
+            BenchmarkTask(0,1,0,sim2,lrn1,10),
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            chunks = list(ChunkBySourceShared(directory).filter(tasks))
+
+            self.assertEqual([1,1,1], [ len(chunk) for chunk in chunks ])
+            self.assertEqual([(0,0),(0,1),(1,0)], [ (chunk[0].sim_id, chunk[0].lrn_id) for chunk in chunks ])
+
+            self.assertEqual(5, len(list(chunks[0][0].simulation.read())))
+            self.assertEqual(2, len(list(chunks[2][0].simulation.read())))
+
+            transactions = list(Transactions().filter(chunks))
+
+        self.assertEqual(3, len(transactions))
+        self.assertEqual([5,5,2], [ len(t[2]["_packed"]["reward"]) for t in transactions ])
+
+    def test_sources_not_created_until_read(self):
+        sim1 = CountingSource(NamedSource("a"))
+        sim2 = CountingSource(NamedSource("b"))
+        lrn1 = ModuloLearner("1")
+
+        tasks = [ BenchmarkTask(0,0,0,sim1,lrn1,10), BenchmarkTask(1,1,0,sim2,lrn1,10) ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            chunks = LongestFirst().filter(ChunkBySourceShared(directory).filter(tasks))
+
+            self.assertEqual([0,0], [sim1._read_count, sim2._read_count])
+            self.assertEqual([], os.listdir(directory))
+
+            list(chunks[1][0].simulation.read())
+
+            self.assertEqual(1, sim1._read_count + sim2._read_count)
+
+    def test_source_removed_after_every_reader(self):
+        sim1 = CountingSource(NamedSource("a"))
+        lrn1 = ModuloLearner("1")
+
+        tasks = [ BenchmarkTask(0,0,0,sim1,lrn1,10), BenchmarkTask(0,0,1,sim1,lrn1,10) ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            chunks = list(ChunkBySourceShared(directory).filter(tasks))
+
+            list(chunks[0][0].simulation.read())
+            SharedSource.clear()
+            self.assertIn("0.pickle", os.listdir(directory))
+
+            list(chunks[1][0].simulation.read())
+            self.assertNotIn("0.pickle", os.listdir(directory))
+
+        self.assertEqual(1, sim1._read_count)
+
+    def test_reader_waits_for_creator(self):
+        sim1 = CountingSource(NamedSource("a"))
+        lrn1 = ModuloLearner("1")
+
+        with tempfile.TemporaryDirectory() as directory:
+            chunks = list(ChunkBySourceShared(directory).filter([BenchmarkTask(0,0,0,sim1,lrn1,10)]))
+            path   = os.path.join(directory, "0.pickle")
+
+            #another process has claimed the source and will write it shortly
+            open(f"{path}.lock", 'wb').close()
+
+            def create():
+                time.sleep(.2)
+                with open(path, 'wb') as f:
+                    pickle.dump(list(NamedSource("a", 3).read()), f)
+
+            creator = threading.Thread(target=create)
+            creator.start()
+
+            self.assertEqual(3, len(list(chunks[0][0].simulation.read())))
+            creator.join()
+
+        self.assertEqual(0, sim1._read_count)
+
+    def test_failed_creation_retried_by_next_reader(self):
+        sim1 = OneTimeSource(NamedSource("a"))
+        lrn1 = ModuloLearner("1")
+
+        tasks = [ BenchmarkTask(0,0,0,sim1,lrn1,10), BenchmarkTask(0,0,1,sim1,lrn1,10) ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            chunks = list(ChunkBySourceShared(directory).filter(tasks))
+
+            sim1._read_count = 1
+            with self.assertRaises(Exception):
+                list(chunks[0][0].simulation.read())
+
+            sim1._read_count = 0
+            self.assertEqual(5, len(list(chunks[1][0].simulation.read())))
+
+class PreloadSources_Tests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        CobaConfig.Logger = NoneLogger()
+
+    def tearDown(self) -> None:
+        PreloadedSource.loaded.clear()
+        PreloadedSource.clear()
+
+    def test_source_read_once(self):
+        sim1 = OneTimeSource(NamedSource("a"))
+        sim2 = Pipe.join(sim1, [Take(2)])
+        lrn1 = ModuloLearner("1")
+
+        tasks = [
+            BenchmarkTask(0,0,0,sim1,lrn1,10),
+            BenchmarkTask(0,0,1,sim1,lrn1,10),
+            BenchmarkTask(0,1,0,sim2,lrn1,10),
+        ]
+
+        preloaded = PreloadSources().filter(tasks)
+
+        self.assertEqual(3, len(preloaded))
+        self.assertEqual([str(sim1)]*3, [ str(task.simulation.source) for task in preloaded ])
+        self.assertEqual([5,5,2], [ len(list(task.simulation.read())) for task in preloaded ])
+
+    def test_not_preloaded_reads_source(self):
+        sim1 = NamedSource("a")
+        lrn1 = ModuloLearner("1")
+
+        preloaded = PreloadSources().filter([BenchmarkTask(0,0,0,sim1,lrn1,10)])
+        PreloadedSource.loaded.clear()
+
+        self.assertEqual(5, len(list(preloaded[0].simulation.read())))
+
+    def test_only_selected_sources_preloaded(self):
+        sim1 = NamedSource("a")
+        sim2 = NamedSource("b")
+        lrn1 = ModuloLearner("1")
+
+        tasks     = [ BenchmarkTask(0,0,0,sim1,lrn1,10), BenchmarkTask(1,1,0,sim2,lrn1,10) ]
+        preloaded = PreloadSources(lambda source: source is sim2).filter(tasks)
+
+        self.assertEqual(1, len(PreloadedSource.loaded))
+        self.assertIs(tasks[0], preloaded[0])
+        self.assertIsInstance(preloaded[1].simulation.source, PreloadedSource)
+
+    def test_unpickled_once_per_source(self):
+        sim1 = NamedSource("a")
+        sim2 = NamedSource("b")
+        lrn1 = ModuloLearner("1")
+
+        tasks = [
+            BenchmarkTask(0,0,0,sim1,lrn1,10),
+            BenchmarkTask(0,0,1,sim1,lrn1,10),
+            BenchmarkTask(1,1,0,sim2,lrn1,10),
+        ]
+
+        preloaded = PreloadSources().filter(tasks)
+
+        with unittest.mock.patch('coba.benchmarks.tasks.pickle.loads', wraps=pickle.loads) as loads:
+            self.assertEqual([5,5,5], [ len(list(task.simulation.read())) for task in preloaded ])
+            self.assertEqual(2, loads.call_count)
+
+            PreloadedSource.clear()
+            list(preloaded[2].simulation.read())
+            self.assertEqual(3, loads.call_count)
+
 class GroupBySource_Tests(unittest.TestCase):
 
     def test_one_group(self):
@@ -169,5 +584,335 @@ class GroupBySource_Tests(unittest.TestCase):
         self.assertEqual(0, group_2_tasks[0].lrn_id)
         self.assertEqual(1, group_2_tasks[1].lrn_id)
 
+class Transactions_Tests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        CobaConfig.Logger = NoneLogger()
+        MultiprocessFilter.Processor.retire = False
+
+    def tearDown(self) -> None:
+        MultiprocessFilter.Processor.retire = False
+
+    def test_timeout_writes_failure_and_replaces_process(self):
+        sim1 = LambdaSimulation(2, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+
+        tasks = [ BenchmarkTask(0,0,0,sim1,ModuloLearner(),10), BenchmarkTask(0,0,1,sim1,SpinningLearner(),10) ]
+
+        transactions = list(Transactions(timeout=0.1).filter([tasks]))
+
+        self.assertEqual(["F","I"], sorted(transaction[0] for transaction in transactions))
+        self.assertEqual(["F", (0,1), {"reason":"timeout", "seconds":0.1, "attempts": 1}], [ t for t in transactions if t[0] == "F" ][0])
+        self.assertTrue(MultiprocessFilter.Processor.retire)
+
+    def test_no_timeout_keeps_process(self):
+        sim1 = LambdaSimulation(2, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+
+        transactions = list(Transactions(timeout=10).filter([[BenchmarkTask(0,0,0,sim1,ModuloLearner(),10)]]))
+
+        self.assertEqual(["I"], [ transaction[0] for transaction in transactions ])
+        self.assertFalse(MultiprocessFilter.Processor.retire)
+
+    def test_lockstep_same_as_one_at_a_time(self):
+        sim1     = LambdaSimulation(20, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        tasks    = lambda: [ BenchmarkTask(0,0,lrn_id,sim1,RandomLearner(),seed) for lrn_id,seed in enumerate([1,2,3]) ]
+        expected = list(Transactions().filter([tasks()]))
+        actual   = list(Transactions(lockstep=True).filter([tasks()]))
+
+        alone    = list(Transactions().filter([[BenchmarkTask(0,0,0,sim1,RandomLearner(),1)]]))
+
+        self.assertEqual(expected, actual)
+        self.assertEqual(alone[0], expected[0])
+        self.assertNotEqual(expected[0][2]['_packed']['reward'], expected[1][2]['_packed']['reward'])
+
+    def test_lockstep_walks_interactions_once(self):
+        sim1  = LambdaSimulation(2, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        tasks = [ BenchmarkTask(0,0,0,sim1,OrderLearner("a"),10), BenchmarkTask(0,0,1,sim1,OrderLearner("b"),10) ]
+
+        OrderLearner.calls = []
+        list(Transactions(lockstep=True).filter([tasks]))
+
+        self.assertEqual([("a",0),("b",0),("a",1),("b",1)], OrderLearner.calls)
+
+    def test_lockstep_broken_learner_dropped(self):
+        sim1  = LambdaSimulation(3, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        tasks = [ BenchmarkTask(0,0,0,sim1,BrokenLearner(),10), BenchmarkTask(0,0,1,sim1,ModuloLearner(),10) ]
+
+        transactions = list(Transactions(lockstep=True).filter([tasks]))
+
+        self.assertEqual([["I", (0,1), {"_packed": {"reward":array('d',[0,1,2])}}]], transactions)
+
+    def test_lockstep_timeout_one_at_a_time(self):
+        sim1  = LambdaSimulation(2, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        tasks = [ BenchmarkTask(0,0,0,sim1,ModuloLearner(),10), BenchmarkTask(0,0,1,sim1,SpinningLearner(),10) ]
+
+        transactions = list(Transactions(timeout=0.1, lockstep=True).filter([tasks]))
+
+        self.assertEqual([("I",(0,0)),("F",(0,1))], [ (t[0],t[1]) for t in transactions ])
+
+    def test_batch_size_predicts_before_learning(self):
+        sim1  = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        tasks = [ BenchmarkTask(0,0,0,sim1,BatchLearner(),10) ]
+
+        BatchLearner.calls = []
+        transactions = list(Transactions(batch_size=2).filter([tasks]))
+
+        expected_calls = [("predict",[0,1]),("learn",[0,1]),("predict",[2,3]),("learn",[2,3]),("predict",[4]),("learn",[4])]
+
+        self.assertEqual(expected_calls, BatchLearner.calls)
+        self.assertEqual([["I", (0,0), {"_packed": {"reward":array('d',[0,1,2,0,1]), "action":array('d',[0,1,2,0,1])}}]], transactions)
+
+    def test_batch_size_without_batch_methods(self):
+        sim1     = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        tasks    = lambda: [ BenchmarkTask(0,0,0,sim1,RandomLearner(),1), BenchmarkTask(0,0,1,sim1,OrderLearner("a"),1) ]
+        expected = list(Transactions().filter([tasks()]))
+
+        OrderLearner.calls = []
+        actual = list(Transactions(batch_size=3).filter([tasks()]))
+
+        self.assertEqual(expected, actual)
+        self.assertEqual([("a",i) for i in range(5)], OrderLearner.calls)
+
+    def test_batch_size_lockstep(self):
+        sim1  = LambdaSimulation(3, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        tasks = [ BenchmarkTask(0,0,0,sim1,BatchLearner(),10), BenchmarkTask(0,0,1,sim1,OrderLearner("a"),10) ]
+
+        BatchLearner.calls = []
+        OrderLearner.calls = []
+        transactions = list(Transactions(lockstep=True, batch_size=2).filter([tasks]))
+
+        self.assertEqual(["I","I"], [ transaction[0] for transaction in transactions ])
+        self.assertEqual([("predict",[0,1]),("learn",[0,1]),("predict",[2]),("learn",[2])], BatchLearner.calls)
+        self.assertEqual([("a",0),("a",1),("a",2)], OrderLearner.calls)
+
+    def test_learner_factory_creates_learners(self):
+        sim1 = LambdaSimulation(2, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        sim2 = LambdaSimulation(3, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+
+        CountingLearner.created = 0
+
+        factory = LearnerFactory(CountingLearner, "1")
+        tasks   = [ BenchmarkTask(0,0,0,sim1,factory,10), BenchmarkTask(1,1,0,sim2,factory,10) ]
+
+        transactions = list(Transactions().filter([tasks]))
+
+        self.assertEqual(["I","I"], [ transaction[0] for transaction in transactions ])
+        self.assertEqual(2, CountingLearner.created)
+        self.assertIs(factory, Transactions._factories[0])
+
+class InteractionColumns_Tests(unittest.TestCase):
+
+    def test_numbers_in_arrays(self):
+        columns = InteractionColumns()
+
+        columns.append(1, {"a":2.5, "b":"B"})
+        columns.append(0.5, {"a":3, "b":"C"})
+
+        self.assertEqual(2, len(columns))
+        self.assertEqual({"reward":array('d',[1,0.5]), "a":array('d',[2.5,3]), "b":["B","C"]}, columns.columns)
+
+    def test_not_number_changes_array_to_list(self):
+        columns = InteractionColumns()
+
+        columns.append(1, {"a":1})
+        columns.append(2, {"a":"A"})
+
+        self.assertEqual({"reward":array('d',[1,2]), "a":[1.,"A"]}, columns.columns)
+
+    def test_info_keys_change(self):
+        columns = InteractionColumns()
+
+        columns.append(1, None)
+        columns.append(2, {"a":1, "b":2})
+        columns.append(3, {"b":3})
+        columns.append(4, {"a":2, "b":4})
+
+        self.assertEqual({"reward":array('d',[1,2,3,4]), "a":[None,1,None,2], "b":[None,2,3,4]}, columns.columns)
+
+    def test_empty(self):
+        self.assertEqual({}, InteractionColumns().columns)
+        self.assertEqual(0, len(InteractionColumns()))
+
+class Checkpoints_Tests(unittest.TestCase):
+
+    def test_write_read_remove_clear(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoints = Checkpoints(os.path.join(directory, "checkpoints"), 5)
+
+            self.assertIsNone(checkpoints.read(0,1))
+
+            checkpoints.write(0, 1, 5, ModuloLearner("1"), CobaRandom(3), {"reward":[1,2]})
+            index, learner, random, row_data = checkpoints.read(0,1)
+
+            self.assertEqual(5, index)
+            self.assertEqual({"p":"1"}, learner.params)
+            self.assertEqual(CobaRandom(3).random(), random.random())
+            self.assertEqual({"reward":[1,2]}, row_data)
+
+            checkpoints.remove(0,1)
+            checkpoints.clear()
+
+            self.assertIsNone(checkpoints.read(0,1))
+            self.assertFalse(os.path.exists(os.path.join(directory, "checkpoints")))
+
+    def test_unreadable_checkpoint_ignored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "0_1.pickle"), 'w') as f: f.write("abc")
+
+            self.assertIsNone(Checkpoints(directory, 5).read(0,1))
+
+    def test_clear_keeps_checkpoints(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoints = Checkpoints(os.path.join(directory, "checkpoints"), 5)
+            checkpoints.write(0, 1, 5, ModuloLearner("1"), CobaRandom(3), {"reward":[1,2]})
+            checkpoints.clear()
+
+            self.assertIsNotNone(checkpoints.read(0,1))
+
+class Transactions_Checkpoint_Tests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        CobaConfig.Logger = NoneLogger()
+        CrashingLearner.crash_at = None
+
+    def tearDown(self) -> None:
+        CrashingLearner.crash_at = None
+
+    def _transactions(self, checkpoints: Checkpoints = None, lockstep: bool = False, batch_size: int = 1):
+        sim1  = LambdaSimulation(20, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        tasks = [ BenchmarkTask(0,0,0,sim1,CrashingLearner(0.5),1), BenchmarkTask(0,0,1,sim1,CrashingLearner(0.2),2) ]
+
+        return list(Transactions(lockstep=lockstep, batch_size=batch_size, checkpoints=checkpoints).filter([tasks]))
+
+    def test_continue_after_crash(self):
+        for lockstep, batch_size in [(False,1), (True,1), (False,2)]:
+            with tempfile.TemporaryDirectory() as directory:
+                CrashingLearner.crash_at = None
+
+                checkpoints = Checkpoints(directory, 4)
+                expected    = self._transactions()
+
+                CrashingLearner.crash_at = 14
+                with self.assertRaises(Crash):
+                    self._transactions(checkpoints, lockstep, batch_size)
+
+                self.assertEqual(12, checkpoints.read(0,0)[0])
+                self.assertEqual(12 if lockstep else None, (checkpoints.read(0,1) or [None])[0])
+
+                #learners that continue from a checkpoint never see interaction 3 again
+                CrashingLearner.crash_at = 3 if lockstep else None
+                actual = self._transactions(checkpoints, lockstep, batch_size)
+
+                self.assertEqual(expected, actual)
+                self.assertEqual([], os.listdir(directory))
+
+    def test_checkpoint_from_other_batch_size_ignored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoints = Checkpoints(directory, 3)
+            expected    = self._transactions(batch_size=2)
+
+            CrashingLearner.crash_at = 5
+            with self.assertRaises(Crash):
+                self._transactions(checkpoints)
+
+            self.assertEqual(3, checkpoints.read(0,0)[0])
+
+            CrashingLearner.crash_at = None
+            self.assertEqual(expected, self._transactions(checkpoints, batch_size=2))
+
+class Transactions_Segment_Tests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        CobaConfig.Logger = NoneLogger()
+        CrashingLearner.crash_at = None
+
+    def tearDown(self) -> None:
+        CrashingLearner.crash_at = None
+
+    def _transactions(self, segment: int = None, checkpoints: Checkpoints = None, lockstep: bool = False, batch_size: int = 1):
+        sim1  = LambdaSimulation(20, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        tasks = [ BenchmarkTask(0,0,0,sim1,CrashingLearner(0.5),1), BenchmarkTask(0,0,1,sim1,CrashingLearner(0.2),2) ]
+
+        return Transactions(lockstep=lockstep, batch_size=batch_size, checkpoints=checkpoints, segment=segment).filter([tasks])
+
+    def test_segments_merge_to_unsegmented(self):
+        expected = Result.from_transactions(self._transactions()).interactions.to_tuples()
+
+        for lockstep, batch_size in [(False,1), (True,1), (False,3)]:
+            transactions = list(self._transactions(6, None, lockstep, batch_size))
+            result       = Result.from_transactions(transactions)
+
+            self.assertEqual(8, len(transactions))
+            self.assertEqual([0,0,6,6,12,12,18,18], sorted(t[2]["_start"] for t in transactions))
+            self.assertEqual(expected, result.interactions.to_tuples())
+            self.assertEqual({}, result._partial)
+
+    def test_broken_learner_segments_not_in_interactions(self):
+        sim1  = LambdaSimulation(3, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        tasks = [ BenchmarkTask(0,0,0,sim1,BrokenLearner(),10), BenchmarkTask(0,0,1,sim1,ModuloLearner(),10) ]
+
+        transactions = list(Transactions(segment=1).filter([tasks]))
+        result       = Result.from_transactions(transactions)
+
+        self.assertIn((0,0), [ t[1] for t in transactions ])
+        self.assertEqual([(0,1,1,0),(0,1,2,1),(0,1,3,2)], result.interactions.to_tuples())
+        self.assertEqual({(0,0):1}, result._partial)
+
+    def test_segments_sent_from_worker_before_chunk_ends(self):
+        sim1  = LambdaSimulation(6, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        tasks = [ BenchmarkTask(0,0,0,sim1,SleepingLearner(),10) ]
+
+        arrived = []
+        for _ in MultiprocessFilter([Transactions(segment=2)], 2, None).filter([tasks]): arrived.append(time.time())
+
+        self.assertEqual(3, len(arrived))
+        self.assertGreater(arrived[-1]-arrived[0], 0.5)
+
+    def test_segments_written_before_crash_kept(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoints = Checkpoints(directory, 4)
+            expected    = Result.from_transactions(self._transactions()).interactions.to_tuples()
+            written     = []
+
+            CrashingLearner.crash_at = 14
+            with self.assertRaises(Crash):
+                for transaction in self._transactions(4, checkpoints): written.append(transaction)
+
+            restored = Result.from_transactions(written)
+
+            self.assertEqual({(0,0):12}, restored._partial)
+
+            CrashingLearner.crash_at = None
+            resumed = list(TransactionIsNew(restored).filter(self._transactions(4, checkpoints)))
+
+            self.assertEqual([12,16], [ t[2]["_start"] for t in resumed if t[1] == (0,0) ])
+            self.assertEqual(expected, Result.from_transactions(written+resumed).interactions.to_tuples())
+
+class TaskTimer_Tests(unittest.TestCase):
+
+    def test_timeout(self):
+        with self.assertRaises(TaskTimeout):
+            with TaskTimer(0.05):
+                while True: pass
+
+    def test_no_timeout(self):
+        with TaskTimer(0.05):
+            pass
+
+        time.sleep(0.1) #the timer should have been stopped so nothing is raised here
+
+    def test_none(self):
+        with TaskTimer(None):
+            time.sleep(0.01)
+
+    def test_paused(self):
+        with TaskTimer(0.05) as timer:
+            with timer.paused():
+                time.sleep(0.1)
+
+        with self.assertRaises(TaskTimeout):
+            with TaskTimer(0.05) as timer:
+                with timer.paused(): pass
+                while True: pass
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -41,5 +41,30 @@ class TransactionIsNew_Test(unittest.TestCase):
 
         self.assertEqual(len(transactions), 3)
 
+    def test_written_segments_are_dropped(self):
+        existing = Result.from_transactions([
+            Transaction.interactions(0, 1, _packed=dict(reward=[1,2]), _start=0, _partial=True),
+            Transaction.interactions(0, 1, _packed=dict(reward=[3,4]), _start=2, _partial=True)
+        ])
+
+        filter = TransactionIsNew(existing)
+
+        transactions = list(filter.filter([
+            Transaction.interactions(0, 1, _packed=dict(reward=[1,2]), _start=0, _partial=True),
+            Transaction.interactions(0, 1, _packed=dict(reward=[3,4]), _start=2, _partial=True),
+            Transaction.interactions(0, 1, _packed=dict(reward=[5]), _start=4)]
+        ))
+
+        self.assertEqual([4], [ transaction[2]["_start"] for transaction in transactions ])
+
+    def test_unsegmented_interactions_kept_after_segments(self):
+        existing = Result.from_transactions([
+            Transaction.interactions(0, 1, _packed=dict(reward=[1,2]), _start=0, _partial=True)
+        ])
+
+        transactions = list(TransactionIsNew(existing).filter([Transaction.interactions(0, 1, _packed=dict(reward=[1,2,3]))]))
+
+        self.assertEqual(1, len(transactions))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
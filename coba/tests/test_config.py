@@ -250,6 +250,21 @@ class IndentLogger_Tests(unittest.TestCase):
 
         self.assertAlmostEqual(float(logs[0][3:7 ]), 0.15, 1)
 
+    def test_time_with_base_exception(self):
+
+        sink   = MemorySink()
+        logger = IndentLogger(sink,with_stamp=False, with_name=False)
+        logs   = sink.items
+
+        with self.assertRaises(SystemExit):
+            with logger.time('a'):
+                logger.log('c')
+                raise SystemExit()
+
+        self.assertEqual(2, len(logs))
+        self.assertRegex(logs[0], '^a \\(\\d+\\.\\d+ seconds\\) \\(exception\\)$')
+        self.assertEqual(logs[1], '  * c')
+
     def test_time_with_3(self):
 
         sink   = MemorySink()
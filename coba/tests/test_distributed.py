@@ -0,0 +1,207 @@
+import os
+import time
+import unittest
+
+from multiprocessing import Process
+from typing import Iterable, Any, cast
+
+from coba.config       import CobaConfig, NoneLogger, BasicLogger
+from coba.pipes        import Filter, MemorySink
+from coba.distributed  import CobaCoordinator, CobaWorker, DistributedFilter
+from coba.simulations  import LambdaSimulation
+from coba.learners     import Learner
+from coba.benchmarks   import Benchmark
+
+class PidFilter(Filter):
+    def filter(self, items: Iterable[Any]) -> Iterable[Any]:
+        item = next(iter(items))
+        time.sleep(0.05)
+        yield (item, os.getpid())
+        yield (item, os.getpid())
+
+class ExitOnceFilter(Filter):
+    def __init__(self, path: str) -> None:
+        self._path = path
+
+    def filter(self, items: Iterable[Any]) -> Iterable[Any]:
+        item = next(iter(items))
+
+        yield item
+
+        if item == 0 and not os.path.exists(self._path):
+            open(self._path, 'w').close()
+            os._exit(1)
+
+class LoggingFilter(Filter):
+    def filter(self, items: Iterable[Any]) -> Iterable[Any]:
+        item = next(iter(items))
+        CobaConfig.Logger.log(f"logged {item}")
+        yield item
+
+class ExceptionFilter(Filter):
+    def filter(self, items: Iterable[Any]) -> Iterable[Any]:
+        raise Exception("Exception Filter")
+
+class ModuloLearner(Learner):
+    def __init__(self, param:str="0"):
+        self._param = param
+
+    @property
+    def family(self) -> str:
+        return "Modulo"
+
+    @property
+    def params(self):
+        return {"p":self._param}
+
+    def predict(self, key, context, actions):
+        return [ int(i == actions.index(actions[context%len(actions)])) for i in range(len(actions)) ]
+
+    def learn(self, key, context, action, reward, probability):
+        pass
+
+def start_workers(coordinator: CobaCoordinator, n: int):
+    workers = [ Process(target=CobaWorker(coordinator.address, coordinator.authkey).run) for _ in range(n) ]
+    for worker in workers: worker.start()
+    return workers
+
+class CobaCoordinator_Tests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        CobaConfig.Logger = NoneLogger()
+
+    def test_several_workers(self):
+        with CobaCoordinator(('localhost',0)) as coordinator:
+            workers = start_workers(coordinator, 3)
+            items   = list(DistributedFilter([PidFilter()], coordinator).filter(range(12)))
+
+        for worker in workers: worker.join(5)
+
+        self.assertCountEqual([ i for i in range(12) for _ in range(2) ], [ item for item, _ in items ])
+        self.assertGreater(len(set(pid for _, pid in items)), 1)
+        self.assertEqual([0,0,0], [ worker.exitcode for worker in workers ])
+
+    def test_output_of_an_item_is_together(self):
+        with CobaCoordinator(('localhost',0)) as coordinator:
+            workers = start_workers(coordinator, 2)
+            items   = list(DistributedFilter([PidFilter()], coordinator).filter(range(6)))
+
+        for worker in workers: worker.join(5)
+
+        self.assertEqual([ item for item, _ in items[0::2] ], [ item for item, _ in items[1::2] ])
+
+    def test_lost_worker_item_requeued(self):
+        path = "coba/tests/.temp/distributed.exited"
+
+        if os.path.exists(path): os.remove(path)
+
+        try:
+            with CobaCoordinator(('localhost',0)) as coordinator:
+                workers = start_workers(coordinator, 2)
+                items   = list(DistributedFilter([ExitOnceFilter(path)], coordinator).filter(range(6)))
+
+            for worker in workers: worker.join(5)
+
+            self.assertTrue(os.path.exists(path))
+            self.assertCountEqual(list(range(6)), items)
+            self.assertEqual([0,1], sorted(worker.exitcode for worker in workers))
+        finally:
+            if os.path.exists(path): os.remove(path)
+
+    def test_lost_too_many_times_skipped(self):
+        path = "coba/tests/.temp/distributed.exited"
+
+        if os.path.exists(path): os.remove(path)
+
+        try:
+            with CobaCoordinator(('localhost',0), retries=0) as coordinator:
+                workers = start_workers(coordinator, 2)
+                items   = list(DistributedFilter([ExitOnceFilter(path)], coordinator).filter(range(6)))
+
+            for worker in workers: worker.join(5)
+
+            self.assertCountEqual([1,2,3,4,5], items)
+        finally:
+            if os.path.exists(path): os.remove(path)
+
+    def test_logs_and_exceptions_returned(self):
+        CobaConfig.Logger = BasicLogger(MemorySink())
+
+        with CobaCoordinator(('localhost',0)) as coordinator:
+            workers = start_workers(coordinator, 1)
+            items   = list(DistributedFilter([LoggingFilter()], coordinator).filter(range(2)))
+            errors  = list(DistributedFilter([ExceptionFilter()], coordinator).filter(range(1)))
+
+        for worker in workers: worker.join(5)
+
+        self.assertEqual([0,1], items)
+        self.assertEqual([], errors)
+        self.assertEqual(2, len([ line for line in CobaConfig.Logger.sink.items if "logged" in line ]))
+        self.assertEqual(1, len([ line for line in CobaConfig.Logger.sink.items if "Exception Filter" in line ]))
+
+    def test_authkey(self):
+        with CobaCoordinator(('localhost',0), authkey=b'secret') as coordinator:
+            workers = start_workers(coordinator, 1)
+            items   = list(DistributedFilter([PidFilter()], coordinator).filter(range(2)))
+
+        for worker in workers: worker.join(5)
+
+        self.assertCountEqual([0,0,1,1], [ item for item, _ in items ])
+
+    def test_authkey_made_when_not_given(self):
+        with CobaCoordinator() as coordinator:
+            self.assertEqual('127.0.0.1', coordinator.address[0])
+            self.assertEqual(32, len(coordinator.authkey))
+
+            workers = start_workers(coordinator, 1)
+            items   = list(DistributedFilter([PidFilter()], coordinator).filter(range(1)))
+
+        for worker in workers: worker.join(5)
+
+        self.assertEqual([0,0], [ item for item, _ in items ])
+
+    def test_worker_requires_authkey(self):
+        with self.assertRaises(Exception):
+            CobaWorker(('localhost',0), None)
+
+    def test_wrong_authkey_refused(self):
+        from multiprocessing import AuthenticationError
+
+        with CobaCoordinator() as coordinator:
+            with self.assertRaises(AuthenticationError):
+                CobaWorker(coordinator.address, b'wrong').run()
+
+            self.assertEqual(0, coordinator.workers)
+
+    def test_early_close(self):
+        with CobaCoordinator(('localhost',0)) as coordinator:
+            workers = start_workers(coordinator, 2)
+            items   = DistributedFilter([PidFilter()], coordinator).filter(range(40))
+            next(items)
+            items.close()
+            items = list(DistributedFilter([PidFilter()], coordinator).filter(range(4)))
+
+        for worker in workers: worker.join(5)
+
+        self.assertCountEqual([0,0,1,1,2,2,3,3], [ item for item, _ in items ])
+
+    def test_empty_list(self):
+        with CobaCoordinator(('localhost',0)) as coordinator:
+            self.assertEqual([], list(DistributedFilter([PidFilter()], coordinator).filter([])))
+
+    def test_benchmark(self):
+        sim1     = LambdaSimulation(5, lambda i: i, lambda i,c: [0,1,2], lambda i,c,a: cast(float,a))
+        sim2     = LambdaSimulation(4, lambda i: i, lambda i,c: [3,4,5], lambda i,c,a: cast(float,a))
+        learner  = ModuloLearner()
+        expected = Benchmark([sim1,sim2]).chunk_by('task').evaluate([learner]).interactions.to_tuples()
+
+        with CobaCoordinator(('localhost',0)) as coordinator:
+            workers = start_workers(coordinator, 2)
+            actual  = Benchmark([sim1,sim2]).chunk_by('task').evaluate([learner], executor=coordinator).interactions.to_tuples()
+
+        for worker in workers: worker.join(5)
+
+        self.assertCountEqual(expected, actual)
+
+if __name__ == '__main__':
+    unittest.main()
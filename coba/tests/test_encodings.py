@@ -52,6 +52,23 @@ class Encoder_Interface_Tests(ABC):
 
         cast(unittest.TestCase, self).assertEqual(actual, expected)
 
+    def test_correctly_encodes_after_partial_fitting(self):
+        unfit_encoder,train,test,expected = self._make_unfit_encoder()
+
+        partial_encoder = unfit_encoder.partial_fit(train[:2]).partial_fit(train[2:4])
+
+        cast(unittest.TestCase, self).assertFalse(partial_encoder.is_fit)
+
+        actual = partial_encoder.fit(train[4:]).encode(test)
+
+        cast(unittest.TestCase, self).assertEqual(actual, expected)
+
+    def test_fit_encoder_throws_exception_on_partial_fit(self):
+        unfit_encoder,train,_,_ = self._make_unfit_encoder()
+
+        with cast(unittest.TestCase, self).assertRaises(Exception):
+            unfit_encoder.fit(train).partial_fit(train)
+
 class StringEncoder_Tests(Encoder_Interface_Tests, unittest.TestCase):
 
     def _make_unfit_encoder(self) -> Tuple[Encoder, Sequence[str], Sequence[str], Sequence[Any]]:
@@ -155,6 +172,20 @@ class OneHotEncoder_Tests(Encoder_Interface_Tests, unittest.TestCase):
         #was approximately 0.040
         self.assertLess(time, 1)
 
+    def test_performance_fit(self):
+
+        values = [ str(i) for i in range(100) ]*5000
+
+        time = min(timeit.repeat(lambda:OneHotEncoder().fit(values), repeat=10, number = 1))
+
+        #was approximately 0.005
+        self.assertLess(time, .1)
+
+    def test_partial_fit_first_seen_order(self):
+        encoder = OneHotEncoder().partial_fit(["b","a"]).partial_fit(["c","a"]).fit(["d","b"])
+
+        self.assertEqual(encoder.encode(["b","a","c","d"]), [(1,0,0,0),(0,1,0,0),(0,0,1,0),(0,0,0,1)])
+
 class FactorEncoder_Tests(Encoder_Interface_Tests, unittest.TestCase):
     def _make_unfit_encoder(self) -> Tuple[Encoder, Sequence[str], Sequence[str], Sequence[Any]]:
         return FactorEncoder(), ["a","z","a","z","1"], ["1","a","z"], [1,2,3]
@@ -1,9 +1,11 @@
 from re import S
+import pickle
 import unittest
 from unittest.case import SkipTest
 
 from coba.utilities import PackageChecker
-from coba.learners import RandomLearner, EpsilonBanditLearner, VowpalLearner, UcbBanditLearner
+from coba.registry import CobaRegistry
+from coba.learners import RandomLearner, EpsilonBanditLearner, VowpalLearner, UcbBanditLearner, LearnerFactory, LinUCBLearner
 
 class RandomLearner_Tests(unittest.TestCase):
     
@@ -76,6 +78,98 @@ class UcbBanditLearner_Tests(unittest.TestCase):
 
         self.assertEqual([0, 0, 0, 1], learner.predict(3, None, actions))
 
+class LearnerFactory_Tests(unittest.TestCase):
+
+    def tearDown(self) -> None:
+        CobaRegistry.clear()
+
+    def test_create_from_callable(self):
+        factory = LearnerFactory(EpsilonBanditLearner, epsilon=0.1)
+
+        learner1 = factory.create()
+        learner2 = factory.create()
+
+        self.assertIsInstance(learner1, EpsilonBanditLearner)
+        self.assertIsNot(learner1, learner2)
+        self.assertEqual(learner1.params, learner2.params)
+
+    def test_create_from_recipe(self):
+        CobaRegistry.register("EpsilonBandit", EpsilonBanditLearner)
+
+        learner = LearnerFactory({"EpsilonBandit": [0.2]}).create()
+
+        self.assertIsInstance(learner, EpsilonBanditLearner)
+        self.assertEqual(EpsilonBanditLearner(0.2).params, learner.params)
+
+    def test_recipe_with_args_raises(self):
+        with self.assertRaises(Exception):
+            LearnerFactory("EpsilonBandit", 0.2)
+
+    def test_family_params_imports(self):
+        factory = LearnerFactory(EpsilonBanditLearner, 0.1)
+
+        self.assertEqual(EpsilonBanditLearner(0.1).family, factory.family)
+        self.assertEqual(EpsilonBanditLearner(0.1).params, factory.params)
+        self.assertEqual(EpsilonBanditLearner(0.1).imports, factory.imports)
+
+    def test_pickle_drops_prototype(self):
+        factory = LearnerFactory(EpsilonBanditLearner, 0.1)
+        factory.family
+
+        unpickled = pickle.loads(pickle.dumps(factory))
+
+        self.assertIsNone(unpickled._prototype)
+        self.assertEqual(factory, unpickled)
+        self.assertIsInstance(unpickled.create(), EpsilonBanditLearner)
+
+    def test_eq(self):
+        self.assertEqual   (LearnerFactory(EpsilonBanditLearner, 0.1), LearnerFactory(EpsilonBanditLearner, 0.1))
+        self.assertNotEqual(LearnerFactory(EpsilonBanditLearner, 0.1), LearnerFactory(EpsilonBanditLearner, 0.2))
+
+class LinUCBLearner_Tests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            PackageChecker.numpy('LinUCBLearner_Tests')
+        except ImportError:
+            #if somebody is using the package with no intention of
+            #using the LinUCBLearner we don't want them to see failed
+            #tests and think something is wrong so we skip these tests
+            raise SkipTest("numpy is not installed so no need to test LinUCBLearner")
+
+    def test_predict_batch_same_as_predict(self):
+        contexts = [(1,0),(0,1),(1,1)]
+        actions  = [[(1,0),(0,1)],[(1,0),(0,1)],[(1,0),(0,1)]]
+
+        learner = LinUCBLearner(alpha=0.2)
+        learner.predict(0, (1,0), [(1,0),(0,1)])
+        learner.learn(0, (1,0), (0,1), 1, .5)
+
+        expected = [ learner.predict(i, c, a) for i,(c,a) in enumerate(zip(contexts,actions)) ]
+        actual   = learner.predict_batch(range(3), contexts, actions)
+
+        self.assertEqual(expected, actual)
+        self.assertEqual([0,1], actual[0])
+
+    def test_learn_batch_same_as_learn(self):
+        contexts = [(1,0),(0,1),(1,1)]
+        actions  = [(1,0),(0,1),(1,0)]
+        rewards  = [1,0,.5]
+
+        learner1 = LinUCBLearner(alpha=0.2)
+        learner2 = LinUCBLearner(alpha=0.2)
+
+        learner1.predict_batch(range(3), contexts, [[(1,0),(0,1)]]*3)
+        learner2.predict_batch(range(3), contexts, [[(1,0),(0,1)]]*3)
+
+        for i in range(3): learner1.learn(i, contexts[i], actions[i], rewards[i], .5)
+        learner2.learn_batch(range(3), contexts, actions, rewards, [.5]*3)
+
+        self.assertEqual(learner1.predict(3, (1,1), [(1,0),(0,1)]), learner2.predict(3, (1,1), [(1,0),(0,1)]))
+        self.assertEqual(learner1._A.tolist(), learner2._A.tolist())
+        self.assertEqual(learner1._b.tolist(), learner2._b.tolist())
+
 class VowpalLearner_Tests(unittest.TestCase):
     
     @classmethod
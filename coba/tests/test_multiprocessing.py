@@ -1,14 +1,17 @@
+import os
 import timeit
 import time
 import unittest
 
+from array import array
+
 from threading       import Thread
 from multiprocessing import current_process, Process
 from typing          import Iterable, Any
 
 from coba.config          import CobaConfig, IndentLogger, BasicLogger
 from coba.pipes           import Filter, MemorySink
-from coba.multiprocessing import MultiprocessFilter
+from coba.multiprocessing import MultiprocessFilter, CobaExecutor, WorkerInitializer
 
 class NotPicklableFilter(Filter):
     def __init__(self):
@@ -35,8 +38,55 @@ class ProcessNameFilter(Filter):
     def filter(self, items: Iterable[Any]) -> Iterable[Any]:
         process_name = f"pid-{current_process().pid}"
         CobaConfig.Logger.log(process_name)
+        time.sleep(0.01) #so that one process can't finish every item before the other has started
         yield process_name
 
+class ManyItemsFilter(Filter):
+    def filter(self, items: Iterable[Any]) -> Iterable[Any]:
+        item = next(iter(items))
+        for i in range(250): yield (item,i)
+
+class PackedFilter(Filter):
+    def filter(self, items: Iterable[Any]) -> Iterable[Any]:
+        item = next(iter(items))
+        yield ["I", item, {"_packed": {"ints": list(range(100)), "floats": [i/2 for i in range(100)], "strs": ["a"]*100}}]
+        yield ["I", item, {"_packed": {"ints": list(range(5))}}]
+
+class PackedArrayFilter(Filter):
+    def filter(self, items: Iterable[Any]) -> Iterable[Any]:
+        item = next(iter(items))
+        yield ["I", item, {"_packed": {"floats": array('d', [i/2 for i in range(100)]), "chars": array('u', "a"*100)}}]
+
+class WorkerStateFilter(Filter):
+    def filter(self, items: Iterable[Any]) -> Iterable[Any]:
+        import os, sys
+        yield (os.environ.get("OMP_NUM_THREADS"), "colorsys" in sys.modules)
+
+class SlotFilter(Filter):
+    def filter(self, seconds: Iterable[float]) -> Iterable[Any]:
+        import os
+        second = next(iter(seconds)) #type: ignore
+        time.sleep(second)
+        yield (second, os.environ.get("COBA_TEST_SLOT"))
+
+class SlotInitializer(WorkerInitializer):
+    def __call__(self, index: int, processes: int) -> None:
+        import os
+        os.environ["COBA_TEST_SLOT"] = str(index)
+
+class ExceptionInitializer(WorkerInitializer):
+    def __call__(self, index: int, processes: int) -> None:
+        raise OSError()
+
+class BloatingFilter(Filter):
+    kept = []
+
+    def filter(self, items: Iterable[Any]) -> Iterable[Any]:
+        item = next(iter(items))
+        if item == 0: BloatingFilter.kept.append(b'1'*100*2**20)
+        time.sleep(0.05)
+        yield (item, os.getpid())
+
 class ExceptionFilter(Filter):
     def filter(self, items: Iterable[Any]) -> Iterable[Any]:
         raise Exception("Exception Filter")
@@ -91,9 +141,10 @@ class MultiprocessFilter_Tests(unittest.TestCase):
 
         items = list(MultiprocessFilter([ProcessNameFilter()], 2, 1).filter(range(4)))
 
+        #output and logs are read from separate pipes so their order across processes can differ
         self.assertEqual(len(logger_sink.items), 4)
-        self.assertEqual(items, [ l.split(' ')[ 3] for l in logger_sink.items ] )
-        self.assertEqual(items, [ l.split(' ')[-1] for l in logger_sink.items ] )
+        self.assertCountEqual(items, [ l.split(' ')[ 3] for l in logger_sink.items ] )
+        self.assertCountEqual(items, [ l.split(' ')[-1] for l in logger_sink.items ] )
 
     def test_not_picklable_sans_reduce(self):
         CobaConfig.Logger = BasicLogger(MemorySink())
@@ -103,6 +154,168 @@ class MultiprocessFilter_Tests(unittest.TestCase):
         self.assertEqual(1, len(CobaConfig.Logger.sink.items))
         self.assertIn("pickle", CobaConfig.Logger.sink.items[0])
 
+    def test_batched_items_all_returned(self):
+        items = list(MultiprocessFilter([ManyItemsFilter()], 2, None, batch_size=100).filter(range(4)))
+
+        self.assertCountEqual([ (item,i) for item in range(4) for i in range(250) ], items)
+
+    def test_shared_columns(self):
+        items = sorted(MultiprocessFilter([PackedFilter()], 2, None, shared_min=10).filter(range(2)), key=lambda item: (item[1],len(item[2]["_packed"])))
+
+        self.assertEqual(4, len(items))
+
+        for item in items:
+            packed = item[2]["_packed"]
+            self.assertEqual(list(range(len(packed["ints"]))), list(packed["ints"]))
+
+        self.assertIsInstance(items[1][2]["_packed"]["ints"], array)
+        self.assertIsInstance(items[1][2]["_packed"]["floats"], array)
+        self.assertIsInstance(items[1][2]["_packed"]["strs"], list)
+        self.assertIsInstance(items[0][2]["_packed"]["ints"], list)
+        self.assertEqual([i/2 for i in range(100)], list(items[1][2]["_packed"]["floats"]))
+        self.assertEqual(["a"]*100, items[1][2]["_packed"]["strs"])
+
+    def test_shared_array_columns(self):
+        items = list(MultiprocessFilter([PackedArrayFilter()], 2, None, shared_min=10).filter(range(2)))
+
+        for item in items:
+            self.assertEqual(array('d', [i/2 for i in range(100)]), item[2]["_packed"]["floats"])
+            self.assertEqual(array('u', "a"*100), item[2]["_packed"]["chars"])
+
+    @unittest.skipUnless(os.path.isdir('/dev/shm'), "This test requires /dev/shm.")
+    def test_shared_columns_released_after_early_close(self):
+        before = [ name for name in os.listdir('/dev/shm') if name.startswith('coba_') ]
+
+        items = MultiprocessFilter([PackedFilter()], 2, None, shared_min=10).filter(range(40))
+        next(items)
+        items.close()
+
+        self.assertEqual(before, [ name for name in os.listdir('/dev/shm') if name.startswith('coba_') ])
+
+    @unittest.skipUnless(os.path.isdir('/dev/shm'), "This test requires /dev/shm.")
+    def test_shared_columns_released_after_keyboard_interrupt(self):
+        before = [ name for name in os.listdir('/dev/shm') if name.startswith('coba_') ]
+
+        items = MultiprocessFilter([PackedFilter()], 2, None, shared_min=10).filter(range(40))
+        next(items)
+
+        with self.assertRaises(KeyboardInterrupt):
+            items.throw(KeyboardInterrupt)
+
+        self.assertEqual(before, [ name for name in os.listdir('/dev/shm') if name.startswith('coba_') ])
+
+    def test_executor_reused(self):
+        with CobaExecutor(2) as executor:
+            items1 = list(MultiprocessFilter([ProcessNameFilter()], executor=executor).filter(range(8)))
+            items2 = list(MultiprocessFilter([ProcessNameFilter()], executor=executor).filter(range(8)))
+
+        self.assertEqual(8, len(items1))
+        self.assertEqual(8, len(items2))
+        self.assertLessEqual(len(set(items1+items2)), 2)
+
+    def test_executor_recreated_after_exception(self):
+        with CobaExecutor(2) as executor:
+            items1 = MultiprocessFilter([ProcessNameFilter()], executor=executor).filter(range(8))
+            next(items1)
+            items1.close()
+            items2 = list(MultiprocessFilter([ProcessNameFilter()], executor=executor).filter(range(8)))
+
+        self.assertEqual(8, len(items2))
+
+    def test_executor_reused_after_early_close(self):
+        with CobaExecutor(2) as executor:
+            items1 = MultiprocessFilter([ProcessNameFilter()], executor=executor).filter(range(8))
+            first  = next(items1)
+            items1.close()
+            items2 = list(MultiprocessFilter([ProcessNameFilter()], executor=executor).filter(range(8)))
+
+        self.assertEqual(8, len(items2))
+        self.assertLessEqual(len(set([first]+items2)), 2)
+
+    def test_early_close_skips_remaining_items(self):
+        start_time = time.time()
+
+        with CobaExecutor(2) as executor:
+            items = MultiprocessFilter([SleepingFilter()], executor=executor).filter([0.1]+[1]*10)
+            next(items)
+            items.close()
+
+        self.assertLess(time.time()-start_time, 4)
+
+    def test_executor_broadcast(self):
+        with CobaExecutor(2) as executor:
+            list(MultiprocessFilter([ProcessNameFilter()], executor=executor).filter(range(4)))
+            pids = executor.broadcast(os.getpid)
+
+        self.assertEqual(2, len(set(pids)))
+
+    def test_executor_broadcast_not_started(self):
+        self.assertEqual([], CobaExecutor(2).broadcast(os.getpid))
+
+    @unittest.skipUnless(os.path.exists('/proc/self/statm'), "This test requires /proc.")
+    def test_max_process_mb_replaces_every_process(self):
+        items = list(MultiprocessFilter([ProcessNameFilter()], 2, max_process_mb=1).filter(range(4)))
+        self.assertEqual(len(set(items)), 4)
+
+    @unittest.skipUnless(os.path.exists('/proc/self/statm'), "This test requires /proc.")
+    def test_max_process_mb_replaces_only_large_processes(self):
+        limit = MultiprocessFilter.Processor._process_mb() + 50
+        items = list(MultiprocessFilter([BloatingFilter()], 2, max_process_mb=limit).filter(range(10)))
+
+        bloated_pid = [ pid for item, pid in items if item == 0 ][0]
+
+        self.assertEqual(10, len(items))
+        self.assertEqual(1, [ pid for _, pid in items ].count(bloated_pid))
+        self.assertLessEqual(len(set(pid for _, pid in items)), 3)
+
+    @unittest.skipUnless(os.path.exists('/proc/meminfo'), "This test requires /proc.")
+    def test_min_free_mb_runs_one_process_at_a_time(self):
+        start_time = time.time()
+        items      = list(MultiprocessFilter([SleepingFilter()], 2, 1, min_free_mb=2**40).filter([0.5]*4))
+
+        self.assertEqual([0.5]*4, items)
+        self.assertGreaterEqual(time.time()-start_time, 2)
+
+    def test_worker_initializer(self):
+        initializer = WorkerInitializer(blas_threads=3, imports=["colorsys"])
+        items       = list(MultiprocessFilter([WorkerStateFilter()], 2, 1, initializer=initializer).filter(range(4)))
+
+        self.assertEqual([("3",True)]*4, items)
+
+    def test_worker_initializer_default_threads(self):
+        import os
+
+        items = list(MultiprocessFilter([WorkerStateFilter()], 2, 1).filter(range(2)))
+
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+
+        self.assertEqual([(str(max(1,cores//2)),False)]*2, items)
+
+    def test_worker_initializer_slots_not_shared(self):
+        items = list(MultiprocessFilter([SlotFilter()], 2, 1, initializer=SlotInitializer()).filter([1,0.01,0.01,0.01,0.01]))
+
+        long_slot   = [ slot for second, slot in items if second == 1    ]
+        short_slots = [ slot for second, slot in items if second == 0.01 ]
+
+        self.assertEqual(5, len(items))
+        self.assertEqual(4, len(short_slots))
+        self.assertNotIn(long_slot[0], short_slots)
+        self.assertEqual(1, len(set(short_slots)))
+
+    def test_worker_initializer_exception(self):
+        items = list(MultiprocessFilter([ProcessNameFilter()], 2, 1, initializer=ExceptionInitializer()).filter(range(4)))
+
+        self.assertEqual(4, len(items))
+
+    def test_executor_imports(self):
+        initializer = WorkerInitializer()
+
+        with CobaExecutor(2, initializer=initializer) as executor:
+            items = list(MultiprocessFilter([WorkerStateFilter()], executor=executor, imports=["colorsys"]).filter(range(2)))
+
+        self.assertEqual(["colorsys"], initializer.imports)
+        self.assertEqual([True,True], [ imported for _, imported in items ])
+
     def test_empty_list(self):
         items = list(MultiprocessFilter([ProcessNameFilter()], 1, 1).filter([]))
         self.assertEqual(len(items), 0)
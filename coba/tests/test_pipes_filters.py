@@ -1,5 +1,7 @@
 import unittest
 
+from array import array
+
 from coba.pipes import LibSvmReader, ArffReader, CsvReader, Flatten, Transpose, Encode, JsonEncode
 from coba.encodings import NumericEncoder, OneHotEncoder
 from coba.config import NoneLogger, CobaConfig
@@ -314,5 +316,23 @@ class JsonEncode_Tests(unittest.TestCase):
     def test_dict_minified(self):
         self.assertEqual('{"a":[1.23,2],"b":{"c":1}}',JsonEncode().filter({'a':[1.23,2],'b':{'c':1.}}))
 
+    def test_packed_interactions_minified(self):
+        item     = ["I", (0,1), {"a":2., "_packed": {"reward":[1.,0.5,-0.,-10.,float('nan'),3], "c":[(1,2.)], "d":[True,1]}}]
+        expected = '["I",[0,1],{"a":2,"_packed":{"reward":[1,0.5,0,-10,NaN,3],"c":[[1,2]],"d":[true,1]}}]'
+
+        self.assertEqual(expected, JsonEncode().filter(item))
+
+    def test_packed_interactions_large_floats_minified(self):
+        item     = ["I", (0,1), {"_packed": {"reward":[1.5e16,1e-05,float('inf')]}}]
+        expected = '["I",[0,1],{"_packed":{"reward":[15000000000000000,1e-05,Infinity]}}]'
+
+        self.assertEqual(expected, JsonEncode().filter(item))
+
+    def test_packed_interactions_arrays_minified(self):
+        item     = ["I", (0,1), {"_packed": {"reward":array('d',[1.,0.5]), "action":array('q',[1,2])}, "a":array('d',[1.])}]
+        expected = '["I",[0,1],{"_packed":{"reward":[1,0.5],"action":[1,2]},"a":[1]}]'
+
+        self.assertEqual(expected, JsonEncode().filter(item))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,335 @@
+import os
+import time
+import requests
+import gzip
+import unittest
+import threading
+
+from queue import Queue
+
+from pathlib import Path
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from coba.pipes import DiskSink, DiskSource, HttpSource, QueueSink, QueueSource
+
+class DiskSink_Tests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._path = Path("coba/tests/.temp/disksink.log")
+        if self._path.exists(): self._path.unlink()
+
+    def tearDown(self) -> None:
+        if self._path.exists(): self._path.unlink()
+
+    def test_simple_write(self):
+        DiskSink(str(self._path)).write(["a","b"])
+        DiskSink(str(self._path)).write(["c"])
+
+        self.assertEqual(["a\n","b\n","c\n"], list(DiskSource(str(self._path)).read()))
+
+    def test_persistent_write_flushes_on_write_boundaries(self):
+        sink = DiskSink(str(self._path), flush_items=100)
+
+        sink.write(["a","b"])
+        self.assertEqual(["a\n","b\n"], list(DiskSource(str(self._path)).read()))
+
+        sink.write(["c"])
+        self.assertEqual(["a\n","b\n","c\n"], list(DiskSource(str(self._path)).read()))
+
+        sink.close()
+
+    def test_persistent_write_flushes_every_n_items(self):
+        sink = DiskSink(str(self._path), flush_items=2)
+
+        def items():
+            yield "a"
+            yield "b"
+            self.assertEqual(["a\n","b\n"], list(DiskSource(str(self._path)).read()))
+            yield "c"
+            self.assertEqual(["a\n","b\n"], list(DiskSource(str(self._path)).read()))
+
+        sink.write(items())
+        sink.close()
+
+        self.assertEqual(["a\n","b\n","c\n"], list(DiskSource(str(self._path)).read()))
+
+    def test_persistent_write_flushes_every_t_seconds(self):
+        sink = DiskSink(str(self._path), flush_seconds=0)
+
+        def items():
+            yield "a"
+            self.assertEqual(["a\n"], list(DiskSource(str(self._path)).read()))
+            yield "b"
+
+        sink.write(items())
+        sink.close()
+
+        self.assertEqual(["a\n","b\n"], list(DiskSource(str(self._path)).read()))
+
+    def test_persistent_write_flushes_while_waiting_on_items(self):
+        sink = DiskSink(str(self._path), flush_seconds=0.1)
+
+        def items():
+            yield "a"
+            time.sleep(0.5)
+            self.assertEqual(["a\n"], list(DiskSource(str(self._path)).read()))
+            yield "b"
+
+        sink.write(items())
+        sink.close()
+
+        self.assertEqual(["a\n","b\n"], list(DiskSource(str(self._path)).read()))
+
+    def test_partial_line_removed(self):
+        self._path.write_text('a\nb\n{"partial')
+
+        DiskSink(str(self._path)).write(["c"])
+
+        self.assertEqual(["a\n","b\n","c\n"], list(DiskSource(str(self._path)).read()))
+
+    def test_partial_line_removed_persistent(self):
+        self._path.write_text('{"partial')
+
+        sink = DiskSink(str(self._path), flush_items=1)
+        sink.write(["c"])
+        sink.close()
+
+        self.assertEqual(["c\n"], list(DiskSource(str(self._path)).read()))
+
+class CompressedDiskSinkSource_Tests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._paths = [ Path(f"coba/tests/.temp/disksink.log{ext}") for ext in ['.gz','.bz2','.xz'] ]
+        for path in self._paths:
+            if path.exists(): path.unlink()
+
+    def tearDown(self) -> None:
+        for path in self._paths:
+            if path.exists(): path.unlink()
+
+    def test_write_read_by_extension(self):
+        for path in self._paths:
+            DiskSink(str(path)).write(["a","b"])
+            DiskSink(str(path)).write(["c"])
+
+            self.assertEqual(["a\n","b\n","c\n"], list(DiskSource(str(path)).read()))
+
+    def test_persistent_write_read_by_extension(self):
+        for path in self._paths:
+            sink = DiskSink(str(path), flush_items=1)
+            sink.write(["a","b"])
+            self.assertEqual(["a\n","b\n"], list(DiskSource(str(path)).read()))
+            sink.write(["c"])
+            sink.close()
+
+            self.assertEqual(["a\n","b\n","c\n"], list(DiskSource(str(path)).read()))
+
+    def test_gzip_is_compressed(self):
+        DiskSink(str(self._paths[0])).write(["a","b"])
+
+        self.assertEqual(b"a\nb\n", gzip.decompress(self._paths[0].read_bytes()))
+
+    def test_explicit_compression(self):
+        path = Path("coba/tests/.temp/disksink.log")
+
+        try:
+            DiskSink(str(path), compression='gzip').write(["a"])
+            self.assertEqual(b"a\n", gzip.decompress(path.read_bytes()))
+            self.assertEqual(["a\n"], list(DiskSource(str(path), compression='gzip').read()))
+        finally:
+            if path.exists(): path.unlink()
+
+    def test_truncated_stream_repaired(self):
+        path = self._paths[0]
+
+        DiskSink(str(path)).write(["a","b"])
+        path.write_bytes(path.read_bytes() + gzip.compress(b"c\n{\"partial")[:-12])
+
+        self.assertEqual(["a\n","b\n"], list(DiskSource(str(path)).read())[0:2])
+
+        DiskSink(str(path)).write(["d"])
+
+        self.assertEqual(["a\n","b\n","c\n","d\n"], list(DiskSource(str(path)).read()))
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            DiskSource("a.txt", compression="zip")
+
+class QueueSinkSource_Tests(unittest.TestCase):
+
+    def test_unbatched(self):
+        queue = Queue()
+
+        QueueSink(queue).write([1,2,3])
+        queue.put(None)
+
+        self.assertEqual(4, queue.qsize())
+        self.assertEqual([1,2,3], list(QueueSource(queue).read()))
+
+    def test_batched(self):
+        queue = Queue()
+
+        QueueSink(queue, batch_size=2).write([1,2,3])
+        QueueSink(queue, batch_size=2).write([None])
+        queue.put(None)
+
+        self.assertEqual(4, queue.qsize())
+        self.assertEqual([1,2,3,None], list(QueueSource(queue, batched=True).read()))
+
+    def test_batched_max_seconds(self):
+        queue = Queue()
+
+        def items():
+            yield 1
+            time.sleep(0.3)
+            self.assertEqual([1], queue.get(timeout=1))
+            yield 2
+            yield 3
+
+        QueueSink(queue, batch_size=10, max_seconds=0.1).write(items())
+
+        self.assertEqual([2,3], queue.get(timeout=1))
+        self.assertTrue(queue.empty())
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    body     = b"a,b,c\n" * 1000
+    requests = []
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+
+        StandInHandler.requests.append((self.path, self.headers.get('Range')))
+
+        n_requests = len(StandInHandler.requests)
+
+        if self.path == '/busy' and n_requests < 3:
+            self._send(503, b"busy")
+
+        elif self.path == '/load' and n_requests < 2:
+            self._send(200, b"Usually due to high server load")
+
+        elif self.path == '/drop' and n_requests == 1:
+            #promise the whole body but only send half of it before closing the connection
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(self.body)))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.end_headers()
+            self.wfile.write(self.body[:len(self.body)//2])
+            self.wfile.flush()
+            self.close_connection = True
+
+        elif self.headers.get('Range'):
+            start = int(self.headers.get('Range')[6:-1])
+            self._send(206, self.body[start:])
+
+        elif self.path == '/missing':
+            self._send(404, b"missing")
+
+        else:
+            self._send(200, self.body)
+
+    def _send(self, status:int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        self.wfile.write(body)
+
+class HttpSource_Tests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._server = HTTPServer(('127.0.0.1', 0), StandInHandler)
+        cls._thread = threading.Thread(target=cls._server.serve_forever, daemon=True)
+        cls._thread.start()
+        cls._url = f"http://127.0.0.1:{cls._server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._server.shutdown()
+        cls._server.server_close()
+
+    def setUp(self) -> None:
+        StandInHandler.requests = []
+
+    def test_simple(self):
+        response = HttpSource(self._url + "/data").read()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(StandInHandler.body, response.content)
+        self.assertEqual(1, len(StandInHandler.requests))
+
+    def test_small_chunks(self):
+        response = HttpSource(self._url + "/data", chunk_size=7).read()
+
+        self.assertEqual(StandInHandler.body, response.content)
+
+    def test_retry_5xx(self):
+        response = HttpSource(self._url + "/busy", backoff=0).read()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(StandInHandler.body, response.content)
+        self.assertEqual(3, len(StandInHandler.requests))
+
+    def test_retry_5xx_gives_up(self):
+        response = HttpSource(self._url + "/busy", retries=1, backoff=0).read()
+
+        self.assertEqual(503, response.status_code)
+        self.assertEqual(2, len(StandInHandler.requests))
+
+    def test_retry_if(self):
+        is_high_load = lambda response: "high server load" in response.text
+        response     = HttpSource(self._url + "/load", backoff=0, retry_if=is_high_load).read()
+
+        self.assertEqual(StandInHandler.body, response.content)
+        self.assertEqual(2, len(StandInHandler.requests))
+
+    def test_no_retry_4xx(self):
+        response = HttpSource(self._url + "/missing", backoff=0).read()
+
+        self.assertEqual(404, response.status_code)
+        self.assertEqual(1, len(StandInHandler.requests))
+
+    def test_resume_dropped_download(self):
+        response = HttpSource(self._url + "/drop", backoff=0, chunk_size=100).read()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(StandInHandler.body, response.content)
+        self.assertEqual(2, len(StandInHandler.requests))
+        self.assertEqual(f"bytes={len(StandInHandler.body)//2}-", StandInHandler.requests[1][1])
+
+    def test_resume_dropped_download_across_reads(self):
+        partial = "coba/tests/.temp/http.partial"
+
+        with self.assertRaises(requests.exceptions.RequestException):
+            HttpSource(self._url + "/drop", retries=0, chunk_size=100, partial=partial).read()
+
+        self.assertEqual(len(StandInHandler.body)//2, os.path.getsize(partial))
+
+        response = HttpSource(self._url + "/drop", retries=0, chunk_size=100, partial=partial).read()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(StandInHandler.body, response.content)
+        self.assertEqual(f"bytes={len(StandInHandler.body)//2}-", StandInHandler.requests[1][1])
+        self.assertFalse(os.path.exists(partial))
+
+    def test_same_partial_read_at_once(self):
+        partial   = "coba/tests/.temp/http.partial"
+        responses = []
+
+        def read():
+            responses.append(HttpSource(self._url + "/data", chunk_size=10, partial=partial).read())
+
+        threads = [ threading.Thread(target=read) for _ in range(4) ]
+
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+
+        self.assertEqual([StandInHandler.body]*4, [ response.content for response in responses ])
+        self.assertEqual([], [ name for name in os.listdir("coba/tests/.temp") if name.startswith("http.partial") ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -258,5 +258,88 @@ class Random_Tests(unittest.TestCase):
 
         self.assertIsInstance(choice, tuple)
 
+class CobaRandom_Tests(unittest.TestCase):
+
+    @staticmethod
+    def _lcg(seed: int, n: int) -> Sequence[int]:
+        numbers = []
+        for _ in range(n):
+            seed = (116646453 * seed + 9) % 2**30
+            numbers.append(seed)
+        return numbers
+
+    def test_next_same_as_lcg(self):
+        for n in [1, 511, 512, 513, 5000]:
+            self.assertEqual(self._lcg(7, n), coba.random.CobaRandom(7)._next(n))
+
+    def test_next_without_numpy_same_as_lcg(self):
+        np = coba.random.np
+
+        try:
+            coba.random.np = None
+            self.assertEqual(self._lcg(7, 5000), coba.random.CobaRandom(7)._next(5000))
+        finally:
+            coba.random.np = np
+
+    def test_randoms_continue_sequence(self):
+        generator = coba.random.CobaRandom(3)
+        numbers   = generator.randoms(1000) + generator.randoms(3) + generator.randoms(600)
+
+        self.assertEqual([ n/(2**30-1) for n in self._lcg(3, 1603) ], numbers)
+
+    def test_large_shuffle_same_as_durstenfeld(self):
+        generator = coba.random.CobaRandom(3)
+
+        #shuffles of at least CobaRandom._vector_min items are found with numpy
+        expected = list(range(2000))
+        randoms  = generator.randoms(2000)
+
+        for i in range(0,1999):
+            j = min(int(i + (randoms[i] * (2000-i))), 1999)
+            expected[i], expected[j] = expected[j], expected[i]
+
+        self.assertEqual(expected, coba.random.CobaRandom(3).shuffle(list(range(2000))))
+
+    def test_numpy_imported_lazily(self):
+        import subprocess, sys
+
+        code = "import sys, coba.random; print('numpy' in sys.modules)"
+        self.assertEqual("False", subprocess.run([sys.executable, "-c", code], capture_output=True, text=True).stdout.strip())
+
+    def test_skip(self):
+        generator = coba.random.CobaRandom(3)
+        generator.skip(10**6)
+
+        expected = coba.random.CobaRandom(3)
+        expected._next(10**6)
+
+        self.assertEqual(expected.randoms(5), generator.randoms(5))
+
+    def test_skip_back(self):
+        generator = coba.random.CobaRandom(3)
+        expected  = generator.randoms(10)
+
+        generator.skip(-10)
+
+        self.assertEqual(expected, generator.randoms(10))
+
+    def test_spawn(self):
+        expected  = coba.random.CobaRandom(3).randoms(3000)
+        generator = coba.random.CobaRandom(3)
+        spawned   = [ g.randoms(1000) for g in generator.spawn(3) ]
+
+        self.assertEqual(expected, [ spawned[i%3][i//3] for i in range(3000) ])
+        self.assertEqual(expected, generator.randoms(3000))
+
+    def test_spawn_spawned(self):
+        expected = coba.random.CobaRandom(3).randoms(40)
+        spawned  = coba.random.CobaRandom(3).spawn(2)[1].spawn(2)[0]
+
+        self.assertEqual(expected[1::4], spawned.randoms(10))
+
+    def test_spawn_bad_k(self):
+        with self.assertRaises(ValueError):
+            coba.random.CobaRandom(3).spawn(0)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
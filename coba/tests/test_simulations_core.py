@@ -164,6 +164,33 @@ class CsvSimulation_Tests(unittest.TestCase):
         self.assertEqual([1,0], interactions[0].feedbacks)
         self.assertEqual([0,1], interactions[1].feedbacks)
 
+    def test_streaming(self):
+        source       = MemorySource(['a,b,c','1,x,3','?,y,6','7,x,6'])
+        expected     = list(CsvSimulation(source,'c').read())
+        interactions = list(CsvSimulation(source,'c',streaming=True).read())
+
+        self.assertEqual(3, len(interactions))
+
+        self.assertEqual(('1','x'), interactions[0].context)
+        self.assertEqual(('?','y'), interactions[1].context)
+        self.assertEqual(('7','x'), interactions[2].context)
+
+        self.assertEqual(['3','6'], interactions[0].actions)
+        self.assertEqual([1,0], interactions[0].feedbacks)
+        self.assertEqual([0,1], interactions[1].feedbacks)
+
+        for expected_interaction, interaction in zip(expected, interactions):
+            self.assertEqual(expected_interaction.context  , interaction.context)
+            self.assertEqual(expected_interaction.actions  , interaction.actions)
+            self.assertEqual(expected_interaction.feedbacks, interaction.feedbacks)
+
+    def test_streaming_is_lazy(self):
+        source       = MemorySource(['a,b,c','1,x,3','4,y,6','7,x,6'])
+        interactions = CsvSimulation(source,'c',streaming=True).read()
+
+        self.assertNotIsInstance(interactions, list)
+        self.assertEqual(('1','x'), next(iter(interactions)).context)
+
 class ArffSimulation_Tests(unittest.TestCase):
 
     def test_simple(self):